@@ -2,6 +2,13 @@
 
 from board import BiDAQBoard
 from fpga import BiDAQFPGA
+from fpga import CounterRates
+from fpga import FifoOccupancy
+from fpga import MacStatistics
+from fpga import MarkerInjector
+from fpga import PacketAccounting
+from fpga import StartSequencer
+from fpga import LiveSampler
 from backplane import BiDAQBackplane
 from firmware_flash import FirmwareFlash
 
@@ -72,8 +79,26 @@ class BiDAQ:
         # looking at the SysID register defined at build time
         self.FPGA = BiDAQFPGA.BiDAQFPGA(BoardList)
 
+        # Background capture of the ADC samples (see StartLiveSampler)
+        self.LiveSampler = None
+
+        # Background sampling of the FPGA statistics counters (see StartCounterRates)
+        self.CounterRates = None
+
+        # Background packet accounting along the data path (see StartPacketAccounting)
+        self.PacketAccounting = None
+
+        # Background sampling of the MAC statistics (see StartMacStatistics)
+        self.MacStatistics = None
+
+        # Timing of the last start of the acquisition (see GetStartReport)
+        self.StartReport = None
+
+        # Markers written periodically in the virtual GPIO channels (see StartMarkerInjector)
+        self.MarkerInjector = None
+
         # Init the backplane class
-        if self.FPGA.SysId.GetFwRevision() > 4:
+        if self.FPGA.FwCaps.Backplane:
             self.Backplane = BiDAQBackplane.BiDAQBackplane()
 
         # Get Crate number from Backplane class, or set from input arguments
@@ -350,17 +375,16 @@ class BiDAQ:
     def ReadAdcGenericN(self, Board, N, GetInputValueFcn):
         ValList = [0] * 12
         TimestampList = [-1] * 12
-        Timeout = self.FPGA.SyncGenerator.GetDivider(Board) / 500000 * 2 * 1.1 + 0.001
+        Period = self.FPGA.SyncGenerator.GetSamplePeriod(Board)
         for i in range(N):
             for Ch in range(12):
-                Val = TimestampList[Ch]
-                Start = time.time()
-                while Val == TimestampList[Ch]:
-                    if (time.time() - Start) > Timeout:
-                        log.error("Error. Timeout while reading data")
-                        return -1
-                    Val = self.FPGA.SyncGenerator.GetTimestamp(Board)
-                TimestampList[Ch] = Val
+                # Wait for a new sample (timeout after about two sample periods)
+                try:
+                    TimestampList[Ch] = self.FPGA.SyncGenerator.WaitTimestampChange(Board, TimestampList[Ch], None,
+                                                                                    Period)
+                except TimeoutError:
+                    log.error("Error. Timeout while reading data")
+                    return -1
                 Val = GetInputValueFcn(Board, Ch)
                 ValList[Ch] = (ValList[Ch] * i + Val) / (i + 1)
         return ValList
@@ -732,6 +756,9 @@ class BiDAQ:
         :rtype: int
         """
 
+        # The registers may have been changed by another process since the last command
+        self.FPGA.InvalidateRegisterCache()
+
         if BoardList is None:
             BoardListCurr = self.BoardList
         else:
@@ -769,26 +796,16 @@ class BiDAQ:
                                                                                         CmdReply.Value))
                 return CmdReply.Status
 
-        for Brd in BoardListCurr:
-            # Enable the SPI block
-            self.FPGA.BoardControl.SetADCMode(AdcParallelReadout, Brd)
-            self.FPGA.BoardControl.SetEnable(1, Brd)
-
-        # General enable (this is obsolete)
-        self.FPGA.GeneralEnable.SetEnable(1)
-
-        # Setup the sync generator block
-        for Brd in BoardListCurr:
-            if self.FPGA.SysId.GetFwRevision() > 4:
-                self.FPGA.SyncGenerator.SetTimestampResetValue(0xFFFFFFFF, Brd)
-            self.FPGA.SyncGenerator.Reset(Brd)
-            self.FPGA.SyncGenerator.SetEnable(1, Brd)
+        # Enable the SPI blocks and arm the sync generators of all the boards
+        Sequencer = StartSequencer.StartSequencer(self.FPGA, BoardListCurr, AdcParallelReadout=AdcParallelReadout)
+        Sequencer.EnableReadout()
+        Sequencer.Arm()
 
         # Each FPGA runs from its own clock, they are synced only when the DAQ is started (with StartDaq method)
         self.FPGA.SetLocal()
 
         # Start the acquisition by applying the sync clock, in common to all boards
-        self.FPGA.ClockRefGenerator.SetEnable(1)
+        self.StartReport = Sequencer.Fire()
 
         return 0
 
@@ -892,29 +909,25 @@ class BiDAQ:
                                                                                         CmdReply.Value))
                 return CmdReply.Status
 
-        # Setup the UDP packet creator with own and destination addresses
+        # Setup the UDP packet creator with own and destination addresses (address registers written in one go)
         self.FPGA.UdpStreamer.SetUdpStreamEnable(0)
-        self.FPGA.UdpStreamer.AutoSetUdpStreamSourAddr()
-        self.FPGA.UdpStreamer.SetUdpStreamDestIp(IpAdrDst)
-        self.FPGA.UdpStreamer.AutoSetUdpStreamDestMac()
-        self.FPGA.UdpStreamer.SetUdpStreamDestPort(UdpPortDst)
-        self.FPGA.UdpStreamer.SetUdpStreamSourPort(UdpPortDst)
+        with self.FPGA.UdpStreamer.FpgaReg.Transaction():
+            self.FPGA.UdpStreamer.AutoSetUdpStreamSourAddr()
+            self.FPGA.UdpStreamer.SetUdpStreamDestIp(IpAdrDst)
+            self.FPGA.UdpStreamer.AutoSetUdpStreamDestMac()
+            self.FPGA.UdpStreamer.SetUdpStreamDestPort(UdpPortDst)
+            self.FPGA.UdpStreamer.SetUdpStreamSourPort(UdpPortDst)
         self.FPGA.UdpStreamer.SetUdpStreamEnable(1)
 
-        for Brd in BoardListCurr:
-            # Enable the SPI block
-            self.FPGA.BoardControl.SetADCMode(AdcParallelReadout, Brd)
-            self.FPGA.BoardControl.SetEnable(1, Brd)
-
         BoardListCurrGpio = BoardListCurr.copy()
         if Gpio:
             BoardListCurrGpio.append(self.FPGA.Gpio)
 
-        for Brd in BoardListCurrGpio:
+        # Enable the SPI blocks (all the register values of the start are computed here, see StartSequencer)
+        Sequencer = StartSequencer.StartSequencer(self.FPGA, BoardListCurr, BoardListCurrGpio, AdcParallelReadout)
+        Sequencer.EnableReadout()
 
-            # Setup the RTP packet creator
-            self.FPGA.DataPacketizer.SetDropTimestamp(DropTimestamp, Brd)
-            self.FPGA.DataPacketizer.SetPacketSamples(SamplesPerPacket, Brd)
+        for Brd in BoardListCurrGpio:
 
             RTPPayloadTypeTmp = (RTPPayloadType & 0xFC)
             if not Gpio or Brd < self.FPGA.Gpio:
@@ -931,28 +944,36 @@ class BiDAQ:
                     return CmdReply.Status
                 RTPPayloadTypeTmp = RTPPayloadTypeTmp | (LatestHWRevision << 1) | FilterEnable
 
-            self.FPGA.DataPacketizer.SetRTPPayloadType(RTPPayloadTypeTmp, True, Brd)
-            self.FPGA.DataPacketizer.SetPayloadHeader(self.FPGA.SyncGenerator.GetDivider(Brd), Brd)
-            self.FPGA.DataPacketizer.SetEnable(1, Brd)
+            # Setup the RTP packet creator, all the fields of the same register are written at once
+            with self.FPGA.DataPacketizer.FpgaReg.Transaction():
+                self.FPGA.DataPacketizer.SetDropTimestamp(DropTimestamp, Brd)
+                self.FPGA.DataPacketizer.SetPacketSamples(SamplesPerPacket, Brd)
+                self.FPGA.DataPacketizer.SetRTPPayloadType(RTPPayloadTypeTmp, True, Brd)
+                self.FPGA.DataPacketizer.SetPayloadHeader(self.FPGA.SyncGenerator.GetDivider(Brd), Brd)
+                self.FPGA.DataPacketizer.SetEnable(1, Brd)
 
         # Powerdown all boards
         if self.SetPowerdownEnableAll():
             return -1
 
-        # General enable (this is obsolete)
-        self.FPGA.GeneralEnable.SetEnable(1)
+        # Arm the sync generators of all the boards, then start the acquisition by applying the sync clock, in common
+        # to all boards
+        self.StartReport = Sequencer.Run()
 
-        # Setup the sync generator block
-        for Brd in BoardListCurrGpio:
-            if self.FPGA.SysId.GetFwRevision() > 4:
-                self.FPGA.SyncGenerator.SetTimestampResetValue(0xFFFFFFFF, Brd)
-            self.FPGA.SyncGenerator.Reset(Brd)
-            self.FPGA.SyncGenerator.SetEnable(1, Brd)
+        return 0
 
-        # Start the acquisition by applying the sync clock, in common to all boards
-        self.FPGA.ClockRefGenerator.SetEnable(1)
+    def GetStartReport(self):
+        """
+        Get the timing of the last start of the acquisition (StartDaq or StartAdc).
 
-        return 0
+        :return: Dictionary with the duration of each stage (Stages), the time to arm all the boards in one batch
+            (ArmLatency), the time from the start of the arm batch to the sync clock enabled (FireLatency) and the whole
+            start time (StartLatency), in seconds, and the boards whose sync generator reset was not applied
+            (ResetErrors). None if the acquisition has not been started.
+        :rtype: dict
+        """
+
+        return self.StartReport
 
     # Stop DAQ
     def StopDaq(self, FullStop=True, OnlyFpga=False):
@@ -963,14 +984,18 @@ class BiDAQ:
         :rtype: int
         """
 
+        # The registers may have been changed by another process since the last command
+        self.FPGA.InvalidateRegisterCache()
+
         # A full stop means that the FPGA should stop pushing out data packets
         if FullStop:
             # Stop the reference clock generator so that all the sync blocks cannot generate SYNC signals
             self.FPGA.ClockRefGenerator.SetEnable(0)
             # Wait that all the FIFOs are empty
-            while self.FPGA.FifoOutDataAdapter.GetFillLevel() > 0 \
-                    or self.FPGA.FifoOutData.GetFillLevel() > 0:
-                pass
+            try:
+                self.FPGA.WaitOutputFifosEmpty()
+            except TimeoutError as Err:
+                log.error("Output FIFOs not empty, stopping anyway: {}".format(Err))
             # Also stops the other modules
             self.FPGA.SyncGenerator.SetEnable(0)
             self.FPGA.GeneralEnable.SetEnable(0)
@@ -1047,26 +1072,37 @@ class BiDAQ:
             print("FINAL STATUS: ", Status)
 
     def GetInputVoltage(self, Board, Channel):
-        if self.FPGA.SysId.GetFwRevision() >= 8:
+        if self.FPGA.FwCaps.InData:
             return (((self.FPGA.BoardControl.GetInData(Board, Channel) >> 8) & 0xFFFFFF) / 2 ** 23 - 1) * \
                    self.Board[Board].ADCFullRange * self.Board[Board].FilterGain
         else:
-            log.warning("FPGA firmware v{} does not support GetInputVoltage".format(self.FPGA.SysId.GetFwRevision()))
+            log.warning("FPGA firmware v{} does not support GetInputVoltage".format(self.FPGA.FwCaps.FwRevision))
             return None
 
     def GetInputValue(self, Board, Channel):
-        if self.FPGA.SysId.GetFwRevision() >= 8:
+        if self.FPGA.FwCaps.InData:
             return (self.FPGA.BoardControl.GetInData(Board, Channel) >> 8) & 0xFFFFFF
         else:
-            log.warning("FPGA firmware v{} does not support GetInputValue".format(self.FPGA.SysId.GetFwRevision()))
+            log.warning("FPGA firmware v{} does not support GetInputValue".format(self.FPGA.FwCaps.FwRevision))
             return None
 
     def GetInputValueAll(self):
-        InputValues = list()
-        for Brd in self.BoardList:
-            for Ch in range(0, 12):
-                InputValues = InputValues + [self.GetInputValue(Brd, Ch)]
-        return InputValues
+        # All the channels of all the boards, read with one block per board
+        if self.FPGA.FwCaps.InData:
+            return self.FPGA.BoardControl.GetInputCodeSnapshot(self.BoardList).ravel().tolist()
+        else:
+            log.warning("FPGA firmware v{} does not support GetInputValue".format(self.FPGA.FwCaps.FwRevision))
+            return [None] * (12 * len(self.BoardList))
+
+    def GetInputVoltageAll(self):
+        if self.FPGA.FwCaps.InData:
+            FullRange = [self.Board[Brd].ADCFullRange for Brd in self.BoardList]
+            FilterGain = [self.Board[Brd].FilterGain for Brd in self.BoardList]
+            Voltages = self.FPGA.BoardControl.GetInputVoltageSnapshot(FullRange, FilterGain, self.BoardList)
+            return Voltages.ravel().tolist()
+        else:
+            log.warning("FPGA firmware v{} does not support GetInputVoltage".format(self.FPGA.FwCaps.FwRevision))
+            return [None] * (12 * len(self.BoardList))
 
     def FlashBoards(self, BinFile):
 
@@ -1096,39 +1132,305 @@ class BiDAQ:
 
         pprint.pprint(self.GetFPGAMonitorRegisters())
 
-    def MonitorFPGAFifoFillLevels(self):
+    def StartRegisterTrace(self):
+        """
+        Start recording the FPGA register accesses (count, bytes and latency histogram of each register), to find the
+        accesses dominating the time of an operation. Tracing has no cost when it is not running.
+        """
+
+        self.FPGA.StartRegisterTrace()
+
+    def StopRegisterTrace(self):
+        """
+        Stop recording the FPGA register accesses. The statistics are kept until the next StartRegisterTrace.
+        """
+
+        self.FPGA.StopRegisterTrace()
+
+    def GetRegisterTrace(self):
+        """
+        Get the statistics of the last FPGA register trace.
+
+        :return: List of dictionaries (Address, Name, Kind, Count, Bytes, TotalNs, MeanNs, MaxNs, Histogram), sorted by
+            total access time.
+        :rtype: list
+        """
+
+        return self.FPGA.GetRegisterTraceStats()
+
+    def PrintRegisterTrace(self, Top=30):
+        """
+        Print a report of the last FPGA register trace.
+
+        :param Top: Number of registers to list, by total access time.
+        :type Top: int
+        """
+
+        print(self.FPGA.GetRegisterTraceReport(Top))
+
+    def StartLiveSampler(self, Depth=4096, BoardList=None):
+        """
+        Start capturing in background the ADC samples of the boards (from the FPGA IN_DATA registers, without using the
+        UDP stream), once per new sync timestamp. The last Depth samples are kept in a ring buffer.
+
+        :param Depth: Number of samples kept.
+        :type Depth: int
+        :param BoardList: Boards to capture, by default the enabled ones.
+        :type BoardList: list of integers
+        :return: The sampler, see :class:`fpga.LiveSampler.LiveSampler` (GetLast, GetMean, GetStd, WaitSamples).
+        :rtype: :class:`fpga.LiveSampler.LiveSampler`
+        """
+
+        if not self.FPGA.FwCaps.InData:
+            raise Exception("FPGA firmware v{} does not support StartLiveSampler".format(self.FPGA.FwCaps.FwRevision))
+        self.StopLiveSampler()
+        self.LiveSampler = LiveSampler.LiveSampler(self.FPGA, BoardList, Depth)
+        self.LiveSampler.Start()
+        return self.LiveSampler
+
+    def StopLiveSampler(self):
+        """
+        Stop the background capture of the ADC samples. The samples already captured are kept in the sampler.
+        """
+
+        if self.LiveSampler is not None:
+            self.LiveSampler.Stop()
+
+    def StartCounterRates(self, Period=1.0, History=3600):
+        """
+        Start sampling in background the FPGA statistics counters (packetizer packets, samples and dropped samples,
+        UDP streamer, HPS to MAC and MAC counters). The 32-bit counters are extended to 64 bits, so that they can be
+        converted to rates across wraparounds.
+
+        :param Period: Sampling period in seconds, shorter than the wrap time of the fastest counter.
+        :type Period: float
+        :param History: Number of samples kept.
+        :type History: int
+        :return: The sampler, see :class:`fpga.CounterRates.CounterRates` (GetRates, GetTotals, GetHistory).
+        :rtype: :class:`fpga.CounterRates.CounterRates`
+        """
+
+        self.StopCounterRates()
+        self.CounterRates = CounterRates.CounterRates(self.FPGA, Period, History)
+        self.CounterRates.Start()
+        return self.CounterRates
+
+    def StopCounterRates(self):
+        """
+        Stop sampling the FPGA statistics counters. The history already sampled is kept.
+        """
+
+        if self.CounterRates is not None:
+            self.CounterRates.Stop()
+
+    def GetCounterRates(self, Window=None):
+        """
+        Get the rates of the FPGA statistics counters (see StartCounterRates).
+
+        :param Window: Averaging time in seconds, by default the last sampling period.
+        :type Window: float
+        :return: Dictionary with the same structure of the monitor registers, with the counter names followed by
+            "PerSecond" (e.g. ["Board_0"]["DataPacketizer"]["SamplesSentPerSecond"]). Empty if not enough samples.
+        :rtype: dict
+        """
+
+        if self.CounterRates is None:
+            return dict()
+        return self.CounterRates.GetRates(Window)
+
+    def StartPacketAccounting(self, Period=1.0, Window=10.0, Threshold=8, Callback=None):
+        """
+        Start counting in background the packets through each stage of the data path (packetizers, UDP streamer, HPS
+        kernel interface, HPS to MAC converter, MAC), to find where packets are lost. An alert is logged (and Callback
+        is called) when a link between two stages loses more than Threshold packets in Window seconds.
+
+        :param Period: Sampling period in seconds.
+        :type Period: float
+        :param Window: Time in seconds the losses are computed over.
+        :type Window: float
+        :param Threshold: Packets that can be lost in the window without alert (packets in flight between stages).
+        :type Threshold: int
+        :param Callback: Function called with (Link, Lost, Accounting) at each alert.
+        :type Callback: function
+        :return: The accounting, see :class:`fpga.PacketAccounting.PacketAccounting`.
+        :rtype: :class:`fpga.PacketAccounting.PacketAccounting`
+        """
+
+        self.StopPacketAccounting()
+        self.PacketAccounting = PacketAccounting.PacketAccounting(self.FPGA, Period, Window, Threshold,
+                                                                  Callback=Callback)
+        self.PacketAccounting.Start()
+        return self.PacketAccounting
+
+    def StopPacketAccounting(self):
+        """
+        Stop counting the packets along the data path.
+        """
+
+        if self.PacketAccounting is not None:
+            self.PacketAccounting.Stop()
+
+    def GetPacketAccounting(self, Window=None):
+        """
+        Get the packets through each stage of the data path and lost between the stages (see StartPacketAccounting).
+
+        :param Window: Time in seconds, by default the one given to StartPacketAccounting.
+        :type Window: float
+        :return: Dictionary with Time, Window, Packets (for each stage, with the packetizer of each board and their
+            total), Lost (for each link) and DroppedSamples (for the packetizer of each board), None if not enough
+            samples.
+        :rtype: dict
+        """
+
+        if self.PacketAccounting is None:
+            return None
+        return self.PacketAccounting.GetAccounting(Window)
+
+    def StartMacStatistics(self, Period=1.0, History=3600, LineRate=1e9):
+        """
+        Start sampling in background all the statistics counters of the Ethernet MAC (TX and RX frames and octets,
+        errors, pause frames, frame sizes). The 32-bit counters are extended to 64 bits.
+
+        :param Period: Sampling period in seconds, shorter than the wrap time of the octet counters (34 s at 1 Gbit/s).
+        :type Period: float
+        :param History: Number of samples kept.
+        :type History: int
+        :param LineRate: Bit rate of the link, for the line utilisation.
+        :type LineRate: float
+        :return: The sampler, see :class:`fpga.MacStatistics.MacStatistics` (GetStatistics, GetTotals).
+        :rtype: :class:`fpga.MacStatistics.MacStatistics`
+        """
+
+        self.StopMacStatistics()
+        self.MacStatistics = MacStatistics.MacStatistics(self.FPGA, Period, History, LineRate)
+        self.MacStatistics.Start()
+        return self.MacStatistics
+
+    def StopMacStatistics(self):
+        """
+        Stop sampling the MAC statistics.
+        """
+
+        if self.MacStatistics is not None:
+            self.MacStatistics.Stop()
+
+    def GetMacStatistics(self, Window=None):
+        """
+        Get the MAC statistics of the last Window seconds (see StartMacStatistics).
+
+        :param Window: Time in seconds, by default the time between the last two samples.
+        :type Window: float
+        :return: Dictionary with Time, Window, Counters, Rates, TxUtilisation, RxUtilisation and RxFrameSizes
+            (fraction of the received frames in each size bucket), None if not enough samples.
+        :rtype: dict
+        """
+
+        if self.MacStatistics is None:
+            return None
+        return self.MacStatistics.GetStatistics(Window)
+
+    def StartMarkerInjector(self, Markers, Period=1.0):
+        """
+        Start writing markers (run number, slow-control values, wall-clock seconds, calibration state codes) in the
+        virtual GPIO channels at each multiple of Period seconds of the wall clock, so that they are packetized with
+        the data. Only the channels whose value changed are written. The GPIO must be enabled (see EnableGpio).
+
+        :param Markers: Marker of each virtual GPIO channel, {Channel: Value or function returning the value}. Only
+            the lower 24 bits are used. The wall-clock seconds are given by the WallClock method of the injector.
+        :type Markers: dict
+        :param Period: Time between two updates of the markers, in seconds.
+        :type Period: float
+        :return: The injector, see :class:`fpga.MarkerInjector.MarkerInjector` (SetMarker changes a marker while
+            running).
+        :rtype: :class:`fpga.MarkerInjector.MarkerInjector`
+        """
+
+        if not self.FPGA.FwCaps.Gpio:
+            raise Exception("Virtual GPIO not supported by the firmware")
+
+        self.StopMarkerInjector()
+        self.MarkerInjector = MarkerInjector.MarkerInjector(self.FPGA.GpioControl, Period)
+        for Channel, Marker in Markers.items():
+            self.MarkerInjector.SetMarker(Channel, Marker)
+        self.MarkerInjector.Start()
+        return self.MarkerInjector
+
+    def StopMarkerInjector(self):
+        """
+        Stop writing the markers in the virtual GPIO channels (the last values are kept).
+        """
+
+        if self.MarkerInjector is not None:
+            self.MarkerInjector.Stop()
+
+    def MeasureFifoOccupancy(self, Duration=10, Period=0, BinWidth=8):
+        """
+        Sample the fill levels of the FPGA output FIFOs and of the packetizer input FIFOs for some time, to get their
+        distribution (e.g. the headroom left under load). Only the fill level registers are read.
+
+        :param Duration: Measurement time in seconds.
+        :type Duration: float
+        :param Period: Time between two samples in seconds, 0 to sample as fast as possible.
+        :type Period: float
+        :param BinWidth: Width of the histogram bins, in words.
+        :type BinWidth: int
+        :return: Report with number of samples, sample rate and, for each FIFO, mean, max, percentiles (P50, P90, P99,
+            P99.9) and histogram, see :meth:`fpga.FifoOccupancy.FifoOccupancy.Report`.
+        :rtype: dict
+        """
+
+        Occupancy = FifoOccupancy.FifoOccupancy(self.FPGA, BinWidth=BinWidth)
+        return Occupancy.Run(Duration, Period)
+
+    def MonitorFPGAFifoFillLevels(self, Duration=None):
         """
         Continuously monitoring of the FIFO fill levels. Data is printed when a new and higher value is found in one of
         the FIFO's fill level registers. The function performs a polling, so the actual maximum fill level can be higher
-        than the one displayed. To stop the function, press CTRL+C.
+        than the one displayed. To stop the function, press CTRL+C, or give a Duration. For the distribution of the
+        fill levels use MeasureFifoOccupancy.
+
+        :param Duration: Monitoring time in seconds, None to monitor until interrupted.
+        :type Duration: float
+        :return: Maximum fill level found for each FIFO.
+        :rtype: dict
         """
 
         StoreMax = dict()
+        End = None if Duration is None else time.monotonic() + Duration
 
-        while True:
-            MonitorDict = self.GetFPGAMonitorRegisters()
+        FifoList = ("FifoHpsMac", "FifoOutDataAdapter", "FifoOutData", "FifoTxMac", "FifoMiiConversion")
+        Fifos = [(CurFifo, getattr(self.FPGA, CurFifo)) for CurFifo in FifoList]
+        MaxFill = None
 
-            FifoList = ("FifoHpsMac", "FifoOutDataAdapter", "FifoOutData", "FifoTxMac", "FifoMiiConversion")
-            for CurFifo in FifoList:
+        while End is None or time.monotonic() < End:
+            for CurFifo, Fifo in Fifos:
+                FillLevel = Fifo.GetFillLevel()
                 if CurFifo not in StoreMax:
-                    StoreMax[CurFifo] = MonitorDict[CurFifo]["FillLevel"]
-                elif MonitorDict[CurFifo]["FillLevel"] > StoreMax[CurFifo]:
-                    StoreMax[CurFifo] = MonitorDict[CurFifo]["FillLevel"]
+                    StoreMax[CurFifo] = FillLevel
+                elif FillLevel > StoreMax[CurFifo]:
+                    StoreMax[CurFifo] = FillLevel
                     print("New max - '{}': {}".format(CurFifo, StoreMax[CurFifo]))
                     pprint.pprint(StoreMax)
 
-            for Brd in self.BoardList:
-                for Ch in tuple(range(0, 12)):
-                    KeyName = "FifoIn_Brd{}_Ch{}".format(Brd, Ch)
-                    Value = MonitorDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)][
-                        "FIFOMaxFillLevel"]
-                    if KeyName not in StoreMax:
-                        StoreMax[KeyName] = Value
-                    elif Value > StoreMax[KeyName]:
-                        StoreMax[KeyName] = Value
+            # Maximum fill levels of the input FIFOs of all the boards, read in bulk
+            Snapshot = self.FPGA.DataPacketizer.GetSnapshot(self.BoardList)
+            if MaxFill is None:
+                MaxFill = Snapshot.MaxFill.copy()
+                for Row, Brd in enumerate(self.BoardList):
+                    for Ch in range(0, 12):
+                        StoreMax["FifoIn_Brd{}_Ch{}".format(Brd, Ch)] = int(MaxFill[Row, Ch])
+            else:
+                NewMax = Snapshot.MaxFill > MaxFill
+                if NewMax.any():
+                    MaxFill[NewMax] = Snapshot.MaxFill[NewMax]
+                    for Row, Ch in zip(*NewMax.nonzero()):
+                        KeyName = "FifoIn_Brd{}_Ch{}".format(self.BoardList[Row], Ch)
+                        StoreMax[KeyName] = int(MaxFill[Row, Ch])
                         print("New max - '{}': {}".format(KeyName, StoreMax[KeyName]))
                         pprint.pprint(StoreMax)
 
+        return StoreMax
+
 
 def __BoardsOptionsCallback(option, _opt, value, parser):
     setattr(parser.values, option.dest, list(map(int, value.split(','))))
@@ -1248,7 +1550,7 @@ def __MainFunction():
             ]
             Daq.SetChannelConfigList(CfgList)
 
-            if Daq.FPGA.SysId.GetFwRevision() > 4:
+            if Daq.FPGA.FwCaps.ExternalClock:
                 if Options.Master:
                     Daq.FPGA.SetMaster()
                 else:
@@ -1,13 +1,18 @@
 import BiDAQ
+import pprint
+import sys
+import time
 
 
 def main():
 
     b = BiDAQ.BiDAQ()
 
-    PktsDataPacketizer = b.FPGA.DataPacketizer.GetPacketCount(8)
+    PktsDataPacketizer = 0
     for i in b.BoardList:
         PktsDataPacketizer += b.FPGA.DataPacketizer.GetPacketCount(i)
+    if b.FPGA.Gpio is not None:
+        PktsDataPacketizer += b.FPGA.DataPacketizer.GetPacketCount(b.FPGA.Gpio)
 
     PktsUdpStreamer = b.FPGA.UdpStreamer.GetUdpStreamPacketCount()
 
@@ -23,6 +28,17 @@ def main():
     # print('TxMacUnicast - Eth0', PktsTxMacUnicast - PktsEth0)
     print('TxMacSent - Eth0:', PktsTxMacSent - PktsEth0)
 
+    # With a period in seconds as argument, keep printing the packets through each stage and lost between the stages
+    if len(sys.argv) > 1:
+        Period = float(sys.argv[1])
+        Accounting = b.StartPacketAccounting(Period, Window=Period)
+        try:
+            while True:
+                time.sleep(Period)
+                pprint.pprint(Accounting.GetAccounting())
+        except KeyboardInterrupt:
+            b.StopPacketAccounting()
+
 
 if __name__ == "__main__":
     main()
@@ -13,22 +13,58 @@ from .block import UdpStreamer
 from .block import SysId
 from .block import HpsClockManager
 from .register import FpgaReg
+from . import FwCapabilities
 from functools import reduce
+import threading
 
 
 class BiDAQFPGA:
 
+    # Factories of the FPGA blocks, {Attribute: Factory(BiDAQFPGA)}. The blocks share the register maps and the
+    # memory regions (see RegMapCache and RegRegion), so creating them is cheap once the first one exists
+    Blocks = {
+        "BoardControl": lambda Self: BoardControl.BoardControl(Self.BoardList),
+        "GpioControl": lambda Self: GpioControl.GpioControl(Self.BoardList),
+        "DataPacketizer": lambda Self: DataPacketizer.DataPacketizer(Self.BoardList, Self.Gpio),
+        "SyncGenerator": lambda Self: SyncGenerator.SyncGenerator(Self.BoardList, Self.Gpio),
+        "ClockRefGenerator": lambda Self: ClockRefGenerator.ClockRefGenerator(),
+        "UdpStreamer": lambda Self: UdpStreamer.UdpStreamer(),
+        "GeneralEnable": lambda Self: GeneralEnable.GeneralEnable(),
+        "TxMac": lambda Self: TxMac.TxMac(),
+        "HpsToTxMac": lambda Self: HpsToTxMac.HpsToTxMac(),
+        "HpsClockManager": lambda Self: HpsClockManager.HpsClockManager(),
+        "FifoHpsMac": lambda Self: ScFifo.ScFifo("sc_fifo_hps_mac"),
+        "FifoOutDataAdapter": lambda Self: ScFifo.ScFifo("fifo_adapter_data"),
+        "FifoOutData": lambda Self: ScFifo.ScFifo("sc_fifo_data"),
+        "FifoTxMac": lambda Self: ScFifo.ScFifo("sc_fifo_tx_eth_tse"),
+        "FifoMiiConversion": lambda Self: ScFifo.ScFifo("sc_fifo_mii_conversion"),
+        # Low level register access
+        "LL": lambda Self: FpgaReg.FpgaReg(Self.BoardList),
+    }
+    BlocksLock = threading.RLock()
+
     # Class constructor
     def __init__(self, BoardList=None):
 
         # Init SysID block containing the number of boards
         self.SysId = SysId.SysId()
+        # Firmware features, read only once from the SysID block (see RefreshFwCapabilities)
+        self.FwCaps = FwCapabilities.FwCapabilities(self.SysId)
         # If no list is given, use the default number of boards stored in the SysID block
+        self.DefaultBoardList = BoardList is None
+        self.SetBoards(BoardList)
+
+        # The classes for each FPGA block and the low level register access (LL) are created on first access (see
+        # __getattr__), so that short commands only pay for the blocks they use
+
+    # Set the board list (the default one of the firmware if BoardList is None) and the GPIO board number
+    def SetBoards(self, BoardList):
+
         if BoardList is None:
-            BoardList = list(range(self.SysId.GetBoardNumber()))
+            BoardList = list(range(self.FwCaps.BoardNumber))
 
-        if self.SysId.GetFwRevision() > 5:
-            Gpio = self.SysId.GetBoardNumber()
+        if self.FwCaps.Gpio:
+            Gpio = self.FwCaps.BoardNumber
         else:
             Gpio = None
         self.Gpio = Gpio
@@ -36,25 +72,20 @@ class BiDAQFPGA:
         # Store board list
         self.BoardList = BoardList
 
-        # Init the classes for each FPGA block
-        self.BoardControl = BoardControl.BoardControl(BoardList)
-        self.GpioControl = GpioControl.GpioControl(BoardList)
-        self.DataPacketizer = DataPacketizer.DataPacketizer(BoardList, Gpio)
-        self.SyncGenerator = SyncGenerator.SyncGenerator(BoardList, Gpio)
-        self.ClockRefGenerator = ClockRefGenerator.ClockRefGenerator()
-        self.UdpStreamer = UdpStreamer.UdpStreamer()
-        self.GeneralEnable = GeneralEnable.GeneralEnable()
-        self.TxMac = TxMac.TxMac()
-        self.HpsToTxMac = HpsToTxMac.HpsToTxMac()
-        self.HpsClockManager = HpsClockManager.HpsClockManager()
-        self.FifoHpsMac = ScFifo.ScFifo("sc_fifo_hps_mac")
-        self.FifoOutDataAdapter = ScFifo.ScFifo("fifo_adapter_data")
-        self.FifoOutData = ScFifo.ScFifo("sc_fifo_data")
-        self.FifoTxMac = ScFifo.ScFifo("sc_fifo_tx_eth_tse")
-        self.FifoMiiConversion = ScFifo.ScFifo("sc_fifo_mii_conversion")
+    # Called only for the attributes not set yet: create the FPGA block, then store it as a normal attribute so that
+    # the next accesses don't get here
+    def __getattr__(self, Name):
 
-        # Low level register access
-        self.LL = FpgaReg.FpgaReg(BoardList)
+        Factory = BiDAQFPGA.Blocks.get(Name)
+        if Factory is None:
+            raise AttributeError("'BiDAQFPGA' object has no attribute '{}'".format(Name))
+
+        with BiDAQFPGA.BlocksLock:
+            Block = self.__dict__.get(Name)
+            if Block is None:
+                Block = Factory(self)
+                setattr(self, Name, Block)
+        return Block
 
     def __merge(self, a, b, path=None):
 
@@ -131,6 +162,43 @@ class BiDAQFPGA:
 
         return MonitorDict
 
+    def WaitOutputFifosEmpty(self, Timeout=1.0):
+        # Wait until the output FIFOs have sent all their data, raises TimeoutError if they are still not empty after
+        # Timeout seconds (e.g. the link is down)
+        return self.LL.FpgaMem.WaitFor([(self.FifoOutDataAdapter.RegName, "fill_level"),
+                                        (self.FifoOutData.RegName, "fill_level")],
+                                       lambda AdapterFill, DataFill: AdapterFill == 0 and DataFill == 0, Timeout)
+
+    def InvalidateRegisterCache(self):
+        # The configuration registers are cached, drop the cache if something else (another process or a FPGA
+        # reprogramming) changed them
+        self.LL.FpgaMem.InvalidateShadow()
+
+    def RefreshFwCapabilities(self):
+        # After the FPGA has been reprogrammed, the cached registers and the firmware features must be read again. The
+        # board list (if it was the default one), the GPIO and the blocks depend on the firmware, the blocks already
+        # created are dropped and created again on the next access
+        self.InvalidateRegisterCache()
+        self.FwCaps.Refresh()
+        with BiDAQFPGA.BlocksLock:
+            self.SetBoards(None if self.DefaultBoardList else self.BoardList)
+            for Name in BiDAQFPGA.Blocks:
+                self.__dict__.pop(Name, None)
+
+    def StartRegisterTrace(self):
+        # Record count, size and latency of all the register accesses, until StopRegisterTrace is called
+        self.LL.FpgaMem.StartTrace()
+
+    def StopRegisterTrace(self):
+        self.LL.FpgaMem.StopTrace()
+
+    def GetRegisterTraceStats(self):
+        # The packetizer map also includes the GPIO registers
+        return self.DataPacketizer.FpgaReg.FpgaMem.GetTraceStats()
+
+    def GetRegisterTraceReport(self, Top=30):
+        return self.DataPacketizer.FpgaReg.FpgaMem.GetTraceReport(Top)
+
     def EnableExternalGpioWhileNotAcquiring(self):
 
         self.BoardControl.SetADCMode(1)
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import CounterSampler
+
+
+############################################################
+# Rates of the FPGA statistics counters                    #
+############################################################
+class CounterRates(CounterSampler.CounterSampler):
+
+    # Global counters, (Block, Name, RegName, BitName)
+    GlobalCounters = (
+        ("UdpStreamer", "PacketsSent", "udp_payload_inserter", "PACKET_COUNT"),
+        ("HpsToMac", "PacketsSent", "gmii_to_avalon_st_converter", "PKT_CNT"),
+        ("HpsToMac", "DataSent", "gmii_to_avalon_st_converter", "DAT_CNT"),
+        ("TxMac", "PacketsSent", "eth_mac", "aFramesTransmittedOK"),
+        ("TxMac", "BytesSent", "eth_mac", "aOctetsTransmittedOK"),
+    )
+
+    # Class constructor. FPGA is the BiDAQFPGA class, Period and History as in CounterSampler
+    def __init__(self, FPGA, Period=1.0, History=3600, BoardList=None):
+
+        self.DataPacketizer = FPGA.DataPacketizer
+        self.Reg = FPGA.LL.FpgaMem
+
+        # Packetizers of the boards and of the GPIO
+        if BoardList is None:
+            BoardList = list(FPGA.BoardList)
+            if FPGA.Gpio is not None:
+                BoardList.append(FPGA.Gpio)
+        self.BoardList = list(BoardList)
+
+        # Layout of the counter vector: PKT_CNT and DAT_CNT of each board, CNT_DROPPED of each board and channel, then
+        # the global counters
+        self.BoardCount = len(self.BoardList)
+        self.DroppedStart = 2 * self.BoardCount
+        self.GlobalStart = self.DroppedStart + 12 * self.BoardCount
+        self.GlobalFields = [self.Reg.RegIndex[(RegName, BitName)] for _, _, RegName, BitName in self.GlobalCounters]
+        self.GlobalNames = [(Block, Name) for Block, Name, _, _ in self.GlobalCounters]
+
+        # Counters read from outside the FPGA (see AddCounter), [Read function]
+        self.ExtraCounters = list()
+
+        CounterNumber = self.GlobalStart + len(self.GlobalNames)
+        CounterSampler.CounterSampler.__init__(self, self.ReadCounters, CounterNumber, Period, History)
+
+    # Add a counter read by the function Read (e.g. a kernel interface statistic), reported as [Block][Name]. Only
+    # the lower 32 bits are used, the counter is extended as the FPGA ones. It must be called before the first sample
+    def AddCounter(self, Block, Name, Read):
+        if self.Raw is not None:
+            raise Exception("Counters must be added before sampling")
+        self.GlobalNames.append((Block, Name))
+        self.ExtraCounters.append(Read)
+        self.CounterNumber += 1
+
+    # Index of a global counter in the counter vector
+    def GetIndex(self, Block, Name):
+        return self.GlobalStart + self.GlobalNames.index((Block, Name))
+
+    # Read all the counters, as a uint32 vector (from the counter snapshot of the broker, if there is one)
+    def ReadCounters(self):
+        Snapshot = self.DataPacketizer.GetSnapshot(self.BoardList)
+        Global = [self.Reg.ReadSnapshotField(Field) for Field in self.GlobalFields]
+        Global += [Read() & 0xFFFFFFFF for Read in self.ExtraCounters]
+        return numpy.concatenate((Snapshot.Counters.ravel(), Snapshot.Dropped.ravel(),
+                                  numpy.array(Global, dtype=numpy.uint32)))
+
+    # Convert a counter vector to the nested dictionary of the monitor registers (see BiDAQFPGA.GetMonitorRegisters)
+    def ToDict(self, Values, Suffix="", Scale=int):
+
+        RetDict = dict()
+        for Row, Brd in enumerate(self.BoardList):
+            Dropped = Values[self.DroppedStart + 12 * Row:self.DroppedStart + 12 * (Row + 1)]
+            RetDict["Board_{}".format(Brd)] = {"Board": Brd, "DataPacketizer": {
+                "PacketsSent" + Suffix: Scale(Values[2 * Row]),
+                "SamplesSent" + Suffix: Scale(Values[2 * Row + 1]),
+                "DroppedSamples" + Suffix: [Scale(Val) for Val in Dropped]}}
+        for Index, (Block, Name) in enumerate(self.GlobalNames):
+            RetDict.setdefault(Block, dict())[Name + Suffix] = Scale(Values[self.GlobalStart + Index])
+        return RetDict
+
+    # Get the 64-bit counters of the last sample, as a nested dictionary
+    def GetTotals(self):
+        Total = self.GetTotal()
+        if Total is None:
+            return dict()
+        return self.ToDict(Total.tolist())
+
+    # Get the rates (counts per second) averaged over the last Window seconds (by default between the last two
+    # samples), as a nested dictionary with the names of the counters followed by "PerSecond" (e.g. the samples/s of
+    # a board are in ["Board_0"]["DataPacketizer"]["SamplesSentPerSecond"], the bytes/s of the MAC in
+    # ["TxMac"]["BytesSentPerSecond"])
+    def GetRates(self, Window=None):
+
+        Samples = self.GetWindow(Window)
+        if Samples is None:
+            return dict()
+        First, Last = Samples
+        Elapsed = Last[1] - First[1]
+        if Elapsed <= 0:
+            return dict()
+        Rates = (Last[2] - First[2]).astype(numpy.float64) / Elapsed
+        return self.ToDict(Rates.tolist(), "PerSecond", float)
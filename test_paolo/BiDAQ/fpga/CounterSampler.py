@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+import collections
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+############################################################
+# Periodic sampling of 32-bit counters, extended to 64 bits #
+############################################################
+class CounterSampler:
+
+    # Class constructor. Read is the function reading the CounterNumber counters, as a uint32 vector. The counters are
+    # read every Period seconds (by the thread started with Start, or at each call of Sample) and the last History
+    # samples are kept. The 32-bit counters are extended to 64 bits, so Period must be shorter than the time the
+    # fastest counter takes to wrap
+    def __init__(self, Read, CounterNumber, Period=1.0, History=3600):
+
+        if numpy is None:
+            raise ImportError("NumPy is required by {}".format(type(self).__name__))
+
+        self.Read = Read
+        self.CounterNumber = CounterNumber
+        self.Period = Period
+
+        # Last raw values and their 64-bit extension (None before the first sample)
+        self.Raw = None
+        self.Total = None
+
+        # History of the samples, (Time, Monotonic time, Total)
+        self.History = collections.deque(maxlen=History)
+        self.Lock = threading.Lock()
+
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Read the counters and add them to the history
+    def Sample(self):
+
+        Now = time.time()
+        Monotonic = time.monotonic()
+        Raw = self.Read()
+
+        with self.Lock:
+            if self.Raw is None:
+                Total = Raw.astype(numpy.uint64)
+            else:
+                # The uint32 difference is modulo 2^32, so a wrap between two samples is accounted correctly
+                Total = self.Total + (Raw - self.Raw).astype(numpy.uint64)
+            self.Raw = Raw
+            self.Total = Total
+            self.History.append((Now, Monotonic, Total))
+
+    # Restart the extension from the current values, to be called after the counters have been reset (a reset would
+    # be seen as a wrap otherwise)
+    def Rebase(self):
+        with self.Lock:
+            self.Raw = None
+            self.Total = None
+            self.History.clear()
+        self.Sample()
+
+    # Start the thread sampling the counters every Period seconds
+    def Start(self):
+        if self.Thread is None:
+            self.StopEvent.clear()
+            self.Sample()
+            self.Thread = threading.Thread(target=self.Run, name=type(self).__name__, daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def Run(self):
+        while not self.StopEvent.wait(self.Period):
+            self.Sample()
+
+    # Get the history, as the sample times (time.time) and the (samples, counters) array of the 64-bit counters
+    def GetHistory(self):
+        with self.Lock:
+            History = list(self.History)
+        if not History:
+            return numpy.zeros(0), numpy.zeros((0, self.CounterNumber), dtype=numpy.uint64)
+        return numpy.array([Entry[0] for Entry in History]), numpy.array([Entry[2] for Entry in History])
+
+    # Get the 64-bit counters of the last sample (None before the first sample)
+    def GetTotal(self):
+        with self.Lock:
+            return self.Total
+
+    # Get the first and the last sample, (Time, Monotonic time, Total), of the last Window seconds of history (by
+    # default the last two samples). None if there are less than two samples
+    def GetWindow(self, Window=None):
+
+        with self.Lock:
+            if len(self.History) < 2:
+                return None
+            Last = self.History[-1]
+            First = self.History[-2]
+            if Window is not None:
+                for Entry in reversed(self.History):
+                    First = Entry
+                    if Last[1] - Entry[1] >= Window:
+                        break
+        return First, Last
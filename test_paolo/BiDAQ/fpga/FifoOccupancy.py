@@ -0,0 +1,129 @@
+#!/usr/bin/python
+
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+############################################################
+# Histograms of the FIFO fill levels of the FPGA           #
+############################################################
+class FifoOccupancy:
+
+    # FIFOs of the output path, (Name, RegName)
+    Fifos = (
+        ("FifoHpsMac", "sc_fifo_hps_mac"),
+        ("FifoOutDataAdapter", "fifo_adapter_data"),
+        ("FifoOutData", "sc_fifo_data"),
+        ("FifoTxMac", "sc_fifo_tx_eth_tse"),
+        ("FifoMiiConversion", "sc_fifo_mii_conversion"),
+    )
+
+    # Percentiles in the report
+    Percentiles = (50, 90, 99, 99.9)
+
+    # Class constructor. FPGA is the BiDAQFPGA class, BoardList the boards whose packetizer FIFOs are sampled (by
+    # default all the boards and the GPIO). The fill levels are counted in Bins bins BinWidth words wide, the last bin
+    # also counts all the higher levels
+    def __init__(self, FPGA, BoardList=None, BinWidth=8, Bins=512):
+
+        if numpy is None:
+            raise ImportError("NumPy is required by FifoOccupancy")
+
+        # The packetizer map also includes the GPIO registers
+        self.Reg = FPGA.DataPacketizer.FpgaReg.FpgaMem
+        self.Gpio = FPGA.Gpio
+        if BoardList is None:
+            BoardList = list(FPGA.BoardList)
+            if FPGA.Gpio is not None:
+                BoardList.append(FPGA.Gpio)
+        self.BoardList = list(BoardList)
+        self.BinWidth = BinWidth
+        self.Bins = Bins
+
+        # Names of the sampled FIFOs, in the order of the fill level vector: the output FIFOs, then the input FIFOs
+        # of each board (only the GPIO channels for the GPIO packetizer)
+        self.FifoFields = [self.Reg.RegIndex[(RegName, "fill_level")] for _, RegName in self.Fifos]
+        self.Names = [Name for Name, _ in self.Fifos]
+        self.Channels = list()
+        for Brd in self.BoardList:
+            ChannelNumber = self.Gpio if Brd == self.Gpio else 12
+            self.Channels.append(ChannelNumber)
+            self.Names += ["FifoIn_Brd{}_Ch{}".format(Brd, Ch) for Ch in range(ChannelNumber)]
+
+        self.Clear()
+
+    # Drop the statistics collected so far
+    def Clear(self):
+        self.Histogram = numpy.zeros((len(self.Names), self.Bins), dtype=numpy.int64)
+        self.Max = numpy.zeros(len(self.Names), dtype=numpy.uint32)
+        self.Sum = numpy.zeros(len(self.Names), dtype=numpy.float64)
+        self.Samples = 0
+        self.Elapsed = 0.0
+
+    # Read the fill levels of all the FIFOs, as a uint32 vector in the order of Names
+    def ReadFillLevels(self):
+
+        Reg = self.Reg
+        Levels = [numpy.array([Reg.ReadField(Field) for Field in self.FifoFields], dtype=numpy.uint32)]
+        for Brd, ChannelNumber in zip(self.BoardList, self.Channels):
+            Levels.append(Reg.ReadBlockArray("BiDAQ_packetizer_" + str(Brd), "FIFO_FILL_LEVEL_0", ChannelNumber))
+        return numpy.concatenate(Levels)
+
+    # Add a fill level vector to the statistics
+    def Add(self, Levels):
+
+        Bin = numpy.minimum(Levels // self.BinWidth, self.Bins - 1)
+        self.Histogram[numpy.arange(len(Levels)), Bin] += 1
+        numpy.maximum(self.Max, Levels, out=self.Max)
+        self.Sum += Levels
+        self.Samples += 1
+
+    # Sample the fill levels for Duration seconds, as fast as possible or every Period seconds. Returns the report
+    def Run(self, Duration, Period=0):
+
+        Start = time.monotonic()
+        End = Start + Duration
+        Now = Start
+        while Now < End:
+            self.Add(self.ReadFillLevels())
+            if Period:
+                time.sleep(Period)
+            Now = time.monotonic()
+        self.Elapsed += Now - Start
+
+        return self.Report()
+
+    # Fill level below which the fraction Percentile/100 of the samples of each FIFO are (upper edge of the bin, so
+    # the value is rounded up to the bin width)
+    def GetPercentile(self, Percentile):
+
+        if not self.Samples:
+            return numpy.zeros(len(self.Names))
+        Cumulative = numpy.cumsum(self.Histogram, axis=1)
+        Bin = (Cumulative < self.Samples * Percentile / 100).sum(axis=1)
+        return numpy.minimum((Bin + 1) * self.BinWidth - 1, self.Max)
+
+    # Get the statistics as a dictionary (JSON serializable), {"Samples", "Duration", "SampleRate", "BinWidth",
+    # "Fifos": {Name: {"Mean", "Max", "P50", ..., "Histogram"}}}. The histograms are truncated after the last non-empty
+    # bin
+    def Report(self):
+
+        Percentiles = [self.GetPercentile(Percentile) for Percentile in self.Percentiles]
+        Mean = self.Sum / self.Samples if self.Samples else self.Sum
+
+        Fifos = dict()
+        for Index, Name in enumerate(self.Names):
+            NonZero = numpy.flatnonzero(self.Histogram[Index])
+            Length = NonZero[-1] + 1 if len(NonZero) else 0
+            Fifos[Name] = {"Mean": float(Mean[Index]), "Max": int(self.Max[Index])}
+            for Percentile, Values in zip(self.Percentiles, Percentiles):
+                Fifos[Name]["P{:g}".format(Percentile)] = int(Values[Index])
+            Fifos[Name]["Histogram"] = self.Histogram[Index, :Length].tolist()
+
+        return {"Samples": self.Samples, "Duration": self.Elapsed,
+                "SampleRate": self.Samples / self.Elapsed if self.Elapsed else 0.0,
+                "BinWidth": self.BinWidth, "Fifos": Fifos}
@@ -0,0 +1,41 @@
+#!/usr/bin/python
+
+
+############################################################
+# Features of the FPGA firmware, read once from the SysID  #
+############################################################
+class FwCapabilities:
+
+    # Class constructor, SysId is the SysId block of the FPGA
+    def __init__(self, SysId):
+
+        self.SysId = SysId
+        self.Refresh()
+
+    # Read again the SysID registers, to be called only after the FPGA has been reprogrammed
+    def Refresh(self):
+
+        SysIdValue = self.SysId.GetSysId()
+        self.SysIdValue = SysIdValue
+        self.SysIdTimestamp = self.SysId.GetSysIdTimestamp()
+
+        # Number of boards and firmware revision, as in SysId.GetBoardNumber and SysId.GetFwRevision
+        self.BoardNumber = (SysIdValue >> 8) & 0xF
+        self.FwRevision = SysIdValue & 0xFF
+
+        # Backplane with I2C peripherals, external clock input/output (master/slave) and timestamp reset value
+        self.Backplane = self.FwRevision > 4
+        self.ExternalClock = self.FwRevision > 4
+        self.TimestampReset = self.FwRevision > 4
+
+        # GPIO packetizer and virtual GPIO (the GPIO uses the board index after the last board)
+        self.Gpio = self.FwRevision > 5
+
+        # Readback of the last ADC samples (BoardControl.GetInData)
+        self.InData = self.FwRevision >= 8
+
+    # Get all the capabilities as a dictionary
+    def GetDict(self):
+        return {"SysId": self.SysIdValue, "SysIdTimestamp": self.SysIdTimestamp, "BoardNumber": self.BoardNumber,
+                "FwRevision": self.FwRevision, "Backplane": self.Backplane, "ExternalClock": self.ExternalClock,
+                "TimestampReset": self.TimestampReset, "Gpio": self.Gpio, "InData": self.InData}
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+import threading
+import time
+
+
+############################################################
+# Timed sequence of GPIO port values                       #
+############################################################
+class GpioPattern:
+
+    # Time before each step spent polling the clock instead of sleeping, in seconds (the sleep of the OS is not
+    # accurate enough for the edges of the pattern)
+    SpinTime = 0.0005
+
+    # Class constructor. GpioControl is the GpioControl block, Steps the pattern as [(Time, Value)], with the times in
+    # seconds from the start of the pattern (increasing), and Value the port value written to the pins selected by
+    # Mask. The pattern is played Repeat times (0 repeats it until stopped), each repetition starts Period seconds
+    # after the previous one (by default the time of the last step)
+    def __init__(self, GpioControl, Steps, Mask=0xFF, Repeat=1, Period=None):
+
+        if not Steps:
+            raise Exception("GpioPattern: empty pattern")
+        Times = [Time for Time, _ in Steps]
+        if Times != sorted(Times) or Times[0] < 0:
+            raise Exception("GpioPattern: step times must be positive and increasing")
+        if Period is None:
+            Period = Times[-1]
+        if Period < Times[-1]:
+            raise Exception("GpioPattern: the period is shorter than the pattern")
+        if Repeat != 1 and Period <= 0:
+            raise Exception("GpioPattern: the period must be positive to repeat the pattern")
+
+        self.GpioControl = GpioControl
+        self.Steps = list(Steps)
+        self.Mask = Mask
+        self.Repeat = Repeat
+        self.Period = Period
+
+        # Output value register of the port, looked up once
+        self.Reg = GpioControl.FpgaReg.FpgaMem
+        self.Field = self.Reg.RegIndex[("BiDAQ_gpio_control", "PIN_OUTPUT_VALUE")]
+
+        # Steps written, and delay of the writes from their scheduled time
+        self.Count = 0
+        self.MaxLate = 0.0
+        self.SumLate = 0.0
+
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Pattern of Count pulses of the pins selected by Mask, Width seconds long, one every Period seconds
+    @classmethod
+    def Pulses(cls, GpioControl, Mask, Width, Period, Count=1):
+        return cls(GpioControl, [(0, Mask), (Width, 0)], Mask, Count, Period)
+
+    # Enable the pins of the pattern as outputs, driving the first value of the pattern (see GpioControl.UpdatePort)
+    def Configure(self):
+        self.GpioControl.UpdatePort(self.Mask, self.Steps[0][1], self.Mask, 0xFF, self.Mask, 0xFF)
+
+    # Start playing the pattern in background. The pins must already be enabled outputs (see Configure)
+    def Start(self):
+        if self.Thread is None:
+            self.StopEvent.clear()
+            self.Thread = threading.Thread(target=self.Run, name="GpioPattern", daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def GetRunning(self):
+        return self.Thread is not None and self.Thread.is_alive()
+
+    # Wait until the pattern has been played Repeat times. Returns False on timeout
+    def Wait(self, Timeout=None):
+        if self.Thread is not None:
+            self.Thread.join(Timeout)
+            if self.Thread.is_alive():
+                return False
+            self.Thread = None
+        return True
+
+    # Play the pattern. The steps are scheduled from the start time, so the delays of the writes do not accumulate
+    def Run(self):
+
+        Reg = self.Reg
+        Field = self.Field
+        Mask = self.Mask
+        StopEvent = self.StopEvent
+        SpinTime = self.SpinTime
+
+        Start = time.perf_counter()
+        Repetition = 0
+        while not self.Repeat or Repetition < self.Repeat:
+            Base = Start + Repetition * self.Period
+            for Time, Value in self.Steps:
+                Deadline = Base + Time
+                Remaining = Deadline - time.perf_counter() - SpinTime
+                if Remaining > 0 and StopEvent.wait(Remaining):
+                    return
+                if StopEvent.is_set():
+                    return
+                while time.perf_counter() < Deadline:
+                    pass
+                Reg.ModifyField(Field, Mask, Value)
+                Late = time.perf_counter() - Deadline
+                self.Count += 1
+                self.SumLate += Late
+                if Late > self.MaxLate:
+                    self.MaxLate = Late
+            Repetition += 1
+
+    # Statistics of the played steps, delays of the writes from their scheduled times in seconds
+    def GetStats(self):
+        return {"Steps": self.Count, "MaxLate": self.MaxLate,
+                "MeanLate": self.SumLate / self.Count if self.Count else 0.0}
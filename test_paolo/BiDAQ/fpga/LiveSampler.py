@@ -0,0 +1,152 @@
+#!/usr/bin/python
+
+import logging
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger('BiDAQ.LiveSampler')
+
+
+############################################################
+# Background capture of the ADC samples in a ring buffer   #
+############################################################
+class LiveSampler:
+
+    # Longest wait for a new timestamp before checking again if the sampler has been stopped, in seconds
+    StopLatency = 0.1
+
+    # Class constructor. FPGA is the BiDAQFPGA class, BoardList the boards to capture (by default the ones with the
+    # BoardControl block enabled), Depth the number of samples kept in the ring buffer. The samples are taken each
+    # time the timestamp of the sync generator of SyncBoard (by default the first board) changes
+    def __init__(self, FPGA, BoardList=None, Depth=4096, SyncBoard=None, ChannelNumber=12):
+
+        if numpy is None:
+            raise ImportError("NumPy is required by LiveSampler")
+        if not FPGA.FwCaps.InData:
+            raise Exception("LiveSampler: FPGA firmware v{} does not support the IN_DATA readback (v8 or later is "
+                            "required)".format(FPGA.FwCaps.FwRevision))
+
+        self.BoardControl = FPGA.BoardControl
+        self.SyncGenerator = FPGA.SyncGenerator
+
+        if BoardList is None:
+            BoardList = [Brd for Brd in FPGA.BoardList if self.BoardControl.GetEnable(Brd)]
+        if not BoardList:
+            raise Exception("LiveSampler: no board to capture")
+        self.BoardList = list(BoardList)
+        self.SyncBoard = self.BoardList[0] if SyncBoard is None else SyncBoard
+        self.ChannelNumber = ChannelNumber
+        self.Depth = Depth
+
+        # Ring buffer of the IN_DATA words and of the timestamps they were captured at
+        self.Data = numpy.zeros((Depth, len(self.BoardList), ChannelNumber), dtype=numpy.uint32)
+        self.Timestamps = numpy.zeros(Depth, dtype=numpy.uint32)
+
+        # Total number of samples captured, and of samples skipped because the thread was late
+        self.Count = 0
+        self.Missed = 0
+
+        # Notified each time a sample is stored
+        self.Cond = threading.Condition()
+
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Start the capture thread
+    def Start(self):
+        if self.Thread is None:
+            self.StopEvent.clear()
+            self.Thread = threading.Thread(target=self.Run, name="LiveSampler", daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def GetRunning(self):
+        return self.Thread is not None
+
+    def Run(self):
+
+        Timestamp = self.SyncGenerator.GetTimestamp(self.SyncBoard)
+        # The sample period is read once, the divider can't be changed while the sync generator is running
+        Period = self.SyncGenerator.GetSamplePeriod(self.SyncBoard)
+        while not self.StopEvent.is_set():
+            try:
+                NewTimestamp = self.SyncGenerator.WaitTimestampChange(self.SyncBoard, Timestamp, self.StopLatency,
+                                                                      Period)
+            except TimeoutError:
+                # Acquisition stopped, or sample period longer than StopLatency
+                continue
+            self.Store(NewTimestamp, self.BoardControl.GetInDataSnapshot(self.BoardList, self.ChannelNumber),
+                       (NewTimestamp - Timestamp - 1) & 0xFFFFFFFF)
+            Timestamp = NewTimestamp
+
+    # Store a sample in the ring buffer. Missed is the number of timestamps skipped since the previous sample
+    def Store(self, Timestamp, Snapshot, Missed=0):
+
+        with self.Cond:
+            Index = self.Count % self.Depth
+            self.Data[Index] = Snapshot
+            self.Timestamps[Index] = Timestamp
+            self.Count += 1
+            # A timestamp reset looks like a huge jump, it is not a loss
+            if Missed < self.Depth:
+                self.Missed += Missed
+            self.Cond.notify_all()
+
+    # Get the last N samples (by default all the samples in the buffer), oldest first. Returns the timestamps, as a
+    # (N,) array, and the samples, as a (N, boards, channels) array of 24-bit ADC codes (or of IN_DATA words, if Codes
+    # is False)
+    def GetLast(self, N=None, Codes=True):
+
+        with self.Cond:
+            Available = min(self.Count, self.Depth)
+            if N is None:
+                N = Available
+            if N > Available:
+                raise Exception("LiveSampler: {} samples requested, {} available".format(N, Available))
+            Index = (numpy.arange(self.Count - N, self.Count) % self.Depth)
+            Timestamps = self.Timestamps[Index]
+            Data = self.Data[Index]
+
+        if Codes:
+            Data = (Data >> 8) & 0xFFFFFF
+        return Timestamps, Data
+
+    # Mean of the ADC codes of the last N samples, as a (boards, channels) array
+    def GetMean(self, N=None):
+        return self.GetLast(N)[1].mean(axis=0)
+
+    # Standard deviation of the ADC codes of the last N samples, as a (boards, channels) array
+    def GetStd(self, N=None):
+        return self.GetLast(N)[1].std(axis=0)
+
+    # Wait until N samples newer than the call have been captured, then return them as in GetLast. Raises
+    # TimeoutError if they are not available within Timeout seconds (None waits forever)
+    def WaitSamples(self, N, Timeout=None, Codes=True):
+
+        if N > self.Depth:
+            raise Exception("LiveSampler: {} samples requested, buffer depth is {}".format(N, self.Depth))
+
+        Deadline = None if Timeout is None else time.monotonic() + Timeout
+        with self.Cond:
+            Target = self.Count + N
+            while self.Count < Target:
+                Remaining = None if Deadline is None else Deadline - time.monotonic()
+                if Remaining is not None and Remaining <= 0:
+                    raise TimeoutError("LiveSampler: {} of {} samples captured".format(N - (Target - self.Count), N))
+                self.Cond.wait(Remaining)
+            return self.GetLast(N, Codes)
+
+    # Statistics of the capture
+    def GetStats(self):
+        with self.Cond:
+            return {"Count": self.Count, "Missed": self.Missed, "Depth": self.Depth, "BoardList": self.BoardList}
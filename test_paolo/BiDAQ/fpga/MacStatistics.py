@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import CounterSampler
+
+
+############################################################
+# Statistics of the Ethernet MAC, extended to 64 bits      #
+############################################################
+class MacStatistics(CounterSampler.CounterSampler):
+
+    # Bytes on the line for each frame besides the ones counted in the octet counters: preamble, start of frame
+    # delimiter and inter-packet gap
+    FrameOverhead = 20
+
+    # Frame-size buckets of the RMON counters, (Name, Counter). The MAC counts only the received frames in them
+    RxFrameSizes = (
+        ("64", "etherStatsPkts64Octets"),
+        ("65-127", "etherStatsPkts65to127Octets"),
+        ("128-255", "etherStatsPkts128to255Octets"),
+        ("256-511", "etherStatsPkts256to511Octets"),
+        ("512-1023", "etherStatsPkts512to1023Octets"),
+        ("1024-1518", "etherStatsPkts1024to1518Octets"),
+        ("1519-", "etherStatsPkts1519toXOctets"),
+    )
+
+    # Class constructor. FPGA is the BiDAQFPGA class, LineRate the bit rate of the link, Period and History as in
+    # CounterSampler. At 1 Gbit/s the octet counters wrap in about 34 s, so Period must be shorter than that
+    def __init__(self, FPGA, Period=1.0, History=3600, LineRate=1e9):
+
+        self.TxMac = FPGA.TxMac
+        self.LineRate = LineRate
+
+        self.Names = [Name for Name in self.TxMac.StatisticsCounters if Name is not None]
+        self.Columns = [Index for Index, Name in enumerate(self.TxMac.StatisticsCounters) if Name is not None]
+        self.Index = {Name: Index for Index, Name in enumerate(self.Names)}
+
+        CounterSampler.CounterSampler.__init__(self, self.ReadCounters, len(self.Names), Period, History)
+
+    # Read all the counters with a single block read, as a uint32 vector in the order of Names
+    def ReadCounters(self):
+        return self.TxMac.GetStatisticsBlockArray()[self.Columns]
+
+    # Get the 64-bit counters of the last sample, as {Name: Value}
+    def GetTotals(self):
+        Total = self.GetTotal()
+        if Total is None:
+            return dict()
+        return dict(zip(self.Names, Total.tolist()))
+
+    # Fraction of the line rate used by Frames frames of Octets bytes in Elapsed seconds
+    def GetUtilisation(self, Octets, Frames, Elapsed):
+        return (Octets + self.FrameOverhead * Frames) * 8 / (self.LineRate * Elapsed)
+
+    # Fraction of the received frames in each size bucket, from a vector of counter differences
+    def GetRxFrameSizes(self, Delta):
+
+        Counts = [int(Delta[self.Index[Counter]]) for _, Counter in self.RxFrameSizes]
+        Frames = sum(Counts)
+        return {Name: Count / Frames if Frames else 0.0 for (Name, _), Count in zip(self.RxFrameSizes, Counts)}
+
+    # Get the statistics of the last Window seconds (by default between the last two samples), as {"Time", "Window",
+    # "Counters": {Name: Count}, "Rates": {Name: Count/s}, "TxUtilisation", "RxUtilisation", "RxFrameSizes":
+    # {Bucket: Fraction}}. The frame-size buckets are the RMON ones of the MAC, which count only the received frames.
+    # None if there are less than two samples
+    def GetStatistics(self, Window=None):
+
+        Samples = self.GetWindow(Window)
+        if Samples is None:
+            return None
+        First, Last = Samples
+        Elapsed = Last[1] - First[1]
+        if Elapsed <= 0:
+            return None
+
+        Delta = Last[2] - First[2]
+        Index = self.Index
+        return {"Time": Last[0], "Window": Elapsed,
+                "Counters": dict(zip(self.Names, Delta.tolist())),
+                "Rates": dict(zip(self.Names, (Delta.astype(numpy.float64) / Elapsed).tolist())),
+                "TxUtilisation": self.GetUtilisation(int(Delta[Index["aOctetsTransmittedOK"]]),
+                                                     int(Delta[Index["aFramesTransmittedOK"]]), Elapsed),
+                "RxUtilisation": self.GetUtilisation(int(Delta[Index["aOctetsReceivedOK"]]),
+                                                     int(Delta[Index["aFramesReceivedOK"]]), Elapsed),
+                "RxFrameSizes": self.GetRxFrameSizes(Delta)}
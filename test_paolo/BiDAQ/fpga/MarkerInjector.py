@@ -0,0 +1,157 @@
+#!/usr/bin/python
+
+import logging
+import math
+import threading
+import time
+
+log = logging.getLogger('BiDAQ.MarkerInjector')
+
+
+############################################################
+# Periodic markers in the virtual GPIO channels            #
+############################################################
+class MarkerInjector:
+
+    # Width of the virtual GPIO values
+    ValueMask = 0xFFFFFF
+
+    # Time before each tick spent polling the clock instead of sleeping, in seconds
+    SpinTime = 0.0005
+
+    # Class constructor. GpioControl is the GpioControl block. The markers are updated every Period seconds, at the
+    # multiples of Period of the wall clock (so the markers of different crates change together)
+    def __init__(self, GpioControl, Period=1.0):
+
+        self.GpioControl = GpioControl
+        self.Period = Period
+
+        # Virtual GPIO channels present in the register map (packetized with the GPIO data), and their value
+        # registers, looked up once
+        self.Channels = sorted(GpioControl.VirtualGpioRegs)
+        self.Reg = GpioControl.FpgaReg.FpgaMem
+        self.Fields = {Ch: self.Reg.RegIndex[("BiDAQ_virtual_gpio_control_" + str(Ch), "VALUE")]
+                       for Ch in self.Channels}
+
+        # Markers, {Channel: Value or function returning the value}, and values last written, {Channel: Value}
+        self.Markers = dict()
+        self.Written = dict()
+        self.Lock = threading.Lock()
+
+        # Wall-clock time of the next tick (None if not running)
+        self.TickTime = None
+
+        # Ticks, register writes, and delay of the ticks from their scheduled time
+        self.Ticks = 0
+        self.Writes = 0
+        self.MaxLate = 0.0
+        self.SumLate = 0.0
+
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Wall-clock seconds of the tick the markers are computed for, truncated to the 24 bits of a channel (they wrap
+    # every 194 days). To be used as a marker, SetMarker(Channel, Injector.WallClock)
+    def WallClock(self):
+        if self.TickTime is None:
+            return int(time.time()) & self.ValueMask
+        return int(self.TickTime + 1e-6) & self.ValueMask
+
+    # Set the marker of a channel (one of Channels): a constant (e.g. the run number or a calibration state code) or a function
+    # called at each tick (e.g. WallClock, or the reading of a slow-control value). Only the lower 24 bits are used.
+    # The new value is written at the next tick
+    def SetMarker(self, Channel, Marker):
+        if Channel not in self.Channels:
+            raise Exception("MarkerInjector: invalid channel {}".format(Channel))
+        with self.Lock:
+            self.Markers[Channel] = Marker
+
+    def RemoveMarker(self, Channel):
+        with self.Lock:
+            self.Markers.pop(Channel, None)
+
+    # Evaluate all the markers, as {Channel: Value}. A function that fails keeps the last value of its channel
+    def GetValues(self):
+
+        with self.Lock:
+            Markers = list(self.Markers.items())
+        Values = dict()
+        for Channel, Marker in Markers:
+            if callable(Marker):
+                try:
+                    Marker = Marker()
+                except Exception as Err:
+                    log.warning("Marker of channel {} failed: {}".format(Channel, Err))
+                    continue
+            Values[Channel] = int(Marker) & self.ValueMask
+        return Values
+
+    # Write the values that changed since the last write, all in one transaction. Returns the number of registers
+    # written
+    def Write(self, Values):
+
+        Changed = [(Channel, Value) for Channel, Value in Values.items() if self.Written.get(Channel) != Value]
+        if Changed:
+            with self.Reg.Transaction():
+                for Channel, Value in Changed:
+                    self.Reg.WriteField(self.Fields[Channel], Value)
+            self.Written.update(Changed)
+            self.Writes += len(Changed)
+        return len(Changed)
+
+    # Start the injection in background, enabling the channels with a marker
+    def Start(self):
+        if self.Thread is None:
+            with self.Lock:
+                Channels = list(self.Markers)
+            with self.GpioControl.FpgaReg.Transaction():
+                for Channel in Channels:
+                    self.GpioControl.SetVirtualGpioEnable(1, Channel)
+            self.Written.clear()
+            self.StopEvent.clear()
+            self.Thread = threading.Thread(target=self.Run, name="MarkerInjector", daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def GetRunning(self):
+        return self.Thread is not None
+
+    # Update the markers at each tick. The values are computed before the tick, so that only the register writes are
+    # done on time
+    def Run(self):
+
+        StopEvent = self.StopEvent
+        # Offset of the wall clock from the high resolution clock the ticks are timed with
+        Offset = time.time() - time.perf_counter()
+        Tick = math.floor((time.perf_counter() + Offset) / self.Period) + 1
+
+        while True:
+            self.TickTime = Tick * self.Period
+            Values = self.GetValues()
+            Deadline = self.TickTime - Offset
+            Remaining = Deadline - time.perf_counter() - self.SpinTime
+            if (Remaining > 0 and StopEvent.wait(Remaining)) or StopEvent.is_set():
+                self.TickTime = None
+                return
+            while time.perf_counter() < Deadline:
+                pass
+            self.Write(Values)
+
+            Late = time.perf_counter() - Deadline
+            self.Ticks += 1
+            self.SumLate += Late
+            if Late > self.MaxLate:
+                self.MaxLate = Late
+
+            # Skip the ticks already missed
+            Tick = max(Tick + 1, math.floor((time.perf_counter() + Offset) / self.Period) + 1)
+
+    # Statistics of the injection, delays of the writes from the ticks in seconds
+    def GetStats(self):
+        return {"Ticks": self.Ticks, "Writes": self.Writes, "MaxLate": self.MaxLate,
+                "MeanLate": self.SumLate / self.Ticks if self.Ticks else 0.0}
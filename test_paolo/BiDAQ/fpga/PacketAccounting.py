@@ -0,0 +1,142 @@
+#!/usr/bin/python
+
+import collections
+import logging
+import threading
+
+from . import CounterRates
+
+log = logging.getLogger('BiDAQ.PacketAccounting')
+
+
+############################################################
+# Packet accounting along the data path                    #
+############################################################
+class PacketAccounting:
+
+    # Stages of the data path. The packets of the packetizer of each board ("Packetizer_<Board>", and of the GPIO) go
+    # through the UDP inserter to the MAC, where they are merged with the packets of the HPS (kernel interface, then
+    # GMII converter). PacketizerTotal is the sum of all the packetizers
+    Stages = ("PacketizerTotal", "UdpStreamer", "Kernel", "HpsToMac", "TxMac")
+
+    # Links between the stages, (Name, Input stages, Output stages): the packets lost in a link are the input ones
+    # minus the output ones
+    Links = (
+        ("PacketizerToUdpStreamer", ("PacketizerTotal",), ("UdpStreamer",)),
+        ("KernelToHpsMac", ("Kernel",), ("HpsToMac",)),
+        ("UdpStreamerAndHpsToTxMac", ("UdpStreamer", "HpsToMac"), ("TxMac",)),
+    )
+
+    # Class constructor. FPGA is the BiDAQFPGA class, Interface the kernel network interface of the HPS. The counters
+    # are sampled every Period seconds (History samples are kept), the losses are computed over the last Window
+    # seconds. A link leaking more than Threshold packets in the window raises an alert: it is logged and passed to
+    # Callback(Link, Lost, Accounting), if given. The threshold must cover the packets in flight between the stages.
+    # The packetizer of a board dropping samples in the window raises an alert too, with the packetizer stage as Link
+    # and the samples dropped as Lost
+    def __init__(self, FPGA, Period=1.0, Window=10.0, Threshold=8, Interface='eth0', History=3600, Callback=None):
+
+        self.Period = Period
+        self.Window = Window
+        self.Threshold = Threshold
+        self.Callback = Callback
+        self.StatPath = '/sys/class/net/{}/statistics/tx_packets'.format(Interface)
+
+        # The FPGA counters and the kernel one are sampled together, and extended to 64 bits
+        self.Rates = CounterRates.CounterRates(FPGA, Period, History)
+        self.Rates.AddCounter("Kernel", "PacketsSent", self.ReadKernelPackets)
+        self.Index = {
+            "UdpStreamer": self.Rates.GetIndex("UdpStreamer", "PacketsSent"),
+            "Kernel": self.Rates.GetIndex("Kernel", "PacketsSent"),
+            "HpsToMac": self.Rates.GetIndex("HpsToMac", "PacketsSent"),
+            "TxMac": self.Rates.GetIndex("TxMac", "PacketsSent"),
+        }
+
+        # Last alerts, (Time, Link, Lost)
+        self.Alerts = collections.deque(maxlen=100)
+
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Packets sent by the kernel interface
+    def ReadKernelPackets(self):
+        with open(self.StatPath) as TxPackets:
+            return int(TxPackets.read())
+
+    # Packets through each stage, from a counter vector of CounterRates
+    def GetStagePackets(self, Total):
+
+        # PKT_CNT of each packetizer (board and GPIO), then their sum
+        Packets = {"Packetizer_{}".format(Brd): int(Total[2 * Row]) for Row, Brd in enumerate(self.Rates.BoardList)}
+        Packets["PacketizerTotal"] = int(Total[0:self.Rates.DroppedStart:2].sum())
+        Packets.update({Stage: int(Total[Index]) for Stage, Index in self.Index.items()})
+        return Packets
+
+    # Samples dropped by the packetizer of each board (the most of its channels), from a counter vector of
+    # CounterRates
+    def GetDroppedSamples(self, Total):
+
+        Dropped = Total[self.Rates.DroppedStart:self.Rates.GlobalStart].reshape(-1, 12).max(axis=1)
+        return {"Packetizer_{}".format(Brd): int(Dropped[Row]) for Row, Brd in enumerate(self.Rates.BoardList)}
+
+    # Get the packets through each stage and lost in each link in the last Window seconds (by default the window given
+    # to the constructor), as {"Time", "Window", "Packets": {Stage: Packets}, "Lost": {Link: Packets},
+    # "DroppedSamples": {Packetizer stage: Samples}}. None if there are less than two samples
+    def GetAccounting(self, Window=None):
+
+        Samples = self.Rates.GetWindow(self.Window if Window is None else Window)
+        if Samples is None:
+            return None
+        First, Last = Samples
+
+        Delta = Last[2] - First[2]
+        Packets = self.GetStagePackets(Delta)
+        Lost = dict()
+        for Link, Inputs, Outputs in self.Links:
+            Lost[Link] = sum(Packets[Stage] for Stage in Inputs) - sum(Packets[Stage] for Stage in Outputs)
+
+        return {"Time": Last[0], "Window": Last[1] - First[1], "Packets": Packets, "Lost": Lost,
+                "DroppedSamples": self.GetDroppedSamples(Delta)}
+
+    # Sample the counters and check the losses of the links
+    def Sample(self):
+
+        self.Rates.Sample()
+        Accounting = self.GetAccounting()
+        if Accounting is None:
+            return None
+
+        for Link, Lost in Accounting["Lost"].items():
+            if Lost > self.Threshold:
+                log.warning("Packet loss - {}: {} packets in {:.1f} s".format(Link, Lost, Accounting["Window"]))
+                self.Alert(Accounting, Link, Lost)
+        for Stage, Dropped in Accounting["DroppedSamples"].items():
+            if Dropped:
+                log.warning("Sample loss - {}: {} samples in {:.1f} s".format(Stage, Dropped, Accounting["Window"]))
+                self.Alert(Accounting, Stage, Dropped)
+        return Accounting
+
+    def Alert(self, Accounting, Link, Lost):
+        self.Alerts.append((Accounting["Time"], Link, Lost))
+        if self.Callback is not None:
+            self.Callback(Link, Lost, Accounting)
+
+    def GetAlerts(self):
+        return list(self.Alerts)
+
+    # Start the thread sampling the counters every Period seconds
+    def Start(self):
+        if self.Thread is None:
+            self.StopEvent.clear()
+            self.Sample()
+            self.Thread = threading.Thread(target=self.Run, name="PacketAccounting", daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def Run(self):
+        while not self.StopEvent.wait(self.Period):
+            self.Sample()
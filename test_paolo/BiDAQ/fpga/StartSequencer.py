@@ -0,0 +1,156 @@
+#!/usr/bin/python
+
+import logging
+import time
+
+from .register import RegTransaction
+
+log = logging.getLogger('BiDAQ.StartSequencer')
+
+
+############################################################
+# Staged start of the acquisition on all the boards        #
+############################################################
+class StartSequencer:
+
+    # Stages of the start, each one written as a single batch of word updates:
+    #   Readout: ADC readout mode and enable of the boards (see EnableReadout)
+    #   Setup:   general enable, timestamp reset value and reset asserted on the sync generators
+    #   Arm:     reset released and sync generators enabled (they wait for the common clock)
+    #   Fire:    common sync clock enabled, all the boards start on the same edge
+    Stages = ("Readout", "Setup", "Arm", "Fire")
+
+    # Class constructor. FPGA is the BiDAQFPGA class, BoardList the boards whose ADC readout is enabled, SyncBoardList
+    # the boards whose sync generator is armed (by default BoardList, it also includes the GPIO when it is started).
+    # All the register values are computed here, so that Arm and Fire only write them
+    def __init__(self, FPGA, BoardList, SyncBoardList=None, AdcParallelReadout=True):
+
+        if SyncBoardList is None:
+            SyncBoardList = BoardList
+        self.BoardList = list(BoardList)
+        self.SyncBoardList = list(SyncBoardList)
+
+        # All the blocks are in the same memory region
+        self.BoardControlReg = FPGA.BoardControl.FpgaReg.FpgaMem
+        self.SyncGeneratorReg = FPGA.SyncGenerator.FpgaReg.FpgaMem
+        self.GeneralEnableReg = FPGA.GeneralEnable.FpgaReg.FpgaMem
+        self.ClockRefReg = FPGA.ClockRefGenerator.FpgaReg.FpgaMem
+        self.Region = self.SyncGeneratorReg.Region
+
+        # Updates of each stage, {Stage: [(RegAdr, Mask, Value, Cacheable)]}
+        self.Plan = dict()
+
+        Readout = RegTransaction.RegTransaction(self.Region)
+        for Brd in self.BoardList:
+            self.AddField(Readout, self.BoardControlReg, "BiDAQ_control_" + str(Brd), "SER_PAR",
+                          int(AdcParallelReadout))
+            self.AddField(Readout, self.BoardControlReg, "BiDAQ_control_" + str(Brd), "EN", 1)
+        self.Plan["Readout"] = self.GetUpdates(Readout)
+
+        Setup = RegTransaction.RegTransaction(self.Region)
+        # General enable (this is obsolete)
+        self.AddField(Setup, self.GeneralEnableReg, "pio_en_n", "EN_N", 0)
+        for Brd in self.SyncBoardList:
+            RegName = "BiDAQ_sync_generator_" + str(Brd)
+            if FPGA.FwCaps.TimestampReset:
+                self.AddField(Setup, self.SyncGeneratorReg, RegName, "TIMESTAMP_RESET_VALUE", 0xFFFFFFFF)
+            self.AddField(Setup, self.SyncGeneratorReg, RegName, "RESET", 1)
+            self.AddField(Setup, self.SyncGeneratorReg, RegName, "RESET_TIMESTAMP", 1)
+        self.Plan["Setup"] = self.GetUpdates(Setup)
+
+        # Reset bits read back after the setup, to check that the reset of each sync generator has been applied
+        self.ResetFields = [(Brd, [self.SyncGeneratorReg.RegIndex[("BiDAQ_sync_generator_" + str(Brd), BitName)]
+                                   for BitName in ("RESET", "RESET_TIMESTAMP")]) for Brd in self.SyncBoardList]
+
+        # One word per board: reset released and generator enabled with a single write
+        Arm = RegTransaction.RegTransaction(self.Region)
+        for Brd in self.SyncBoardList:
+            RegName = "BiDAQ_sync_generator_" + str(Brd)
+            self.AddField(Arm, self.SyncGeneratorReg, RegName, "RESET", 0)
+            self.AddField(Arm, self.SyncGeneratorReg, RegName, "RESET_TIMESTAMP", 0)
+            self.AddField(Arm, self.SyncGeneratorReg, RegName, "ENABLE", 1)
+        self.Plan["Arm"] = self.GetUpdates(Arm)
+
+        Fire = RegTransaction.RegTransaction(self.Region)
+        self.AddField(Fire, self.ClockRefReg, "BiDAQ_sync_ref_generator", "ENABLE", 1)
+        self.Plan["Fire"] = self.GetUpdates(Fire)
+
+        # Timing of the last run (see Arm and Fire)
+        self.StartTime = None
+        self.ArmStart = None
+        self.ArmEnd = None
+        self.Durations = None
+        self.ResetErrors = None
+        self.Report = None
+
+    # Add a bit field write to the updates of a stage
+    @staticmethod
+    def AddField(Stage, Reg, RegName, BitName, Data):
+
+        Field = Reg.RegIndex.get((RegName, BitName))
+        if Field is None:
+            raise Exception("Register not found - RegName: {}, BitName: {}".format(RegName, BitName))
+        RegAdr, Shift, Mask, Width, Cacheable = Field
+        Stage.Write(RegAdr, Mask << Shift, Data << Shift, Cacheable)
+
+    # Get the updates of a stage, as accepted by RegRegion.ModifyWords
+    @staticmethod
+    def GetUpdates(Stage):
+        return [(RegAdr, Mask, Value, Cacheable) for RegAdr, (Mask, Value, Cacheable) in Stage.Pending.items()]
+
+    # Enable the ADC readout (SPI block) of the boards, to be called before Arm (or Run)
+    def EnableReadout(self):
+        self.Region.ModifyWords(self.Plan["Readout"])
+
+    # Boards whose sync generator reset could not be read back as applied
+    def CheckReset(self):
+
+        ReadField = self.SyncGeneratorReg.ReadField
+        Errors = [Brd for Brd, Fields in self.ResetFields if not all(ReadField(Field) for Field in Fields)]
+        for Brd in Errors:
+            log.warning("Sync generator reset not applied - Brd: {}".format(Brd))
+        return Errors
+
+    # Write the setup and arm stages, the sync generators are then waiting for the common clock (see Fire). Each stage
+    # is written as a single batch
+    def Arm(self):
+
+        Region = self.Region
+        self.Durations = dict()
+
+        self.StartTime = time.perf_counter()
+        Region.ModifyWords(self.Plan["Setup"])
+        self.ResetErrors = self.CheckReset()
+        self.ArmStart = time.perf_counter()
+        self.Durations["Setup"] = self.ArmStart - self.StartTime
+
+        Region.ModifyWords(self.Plan["Arm"])
+        self.ArmEnd = time.perf_counter()
+        self.Durations["Arm"] = self.ArmEnd - self.ArmStart
+
+    # Write the fire stage and start the acquisition, Arm must have been called before. Returns the timing report,
+    # {"Stages": {Stage: Duration}, "ArmLatency" (time to write the arm batch, the boards are armed within it),
+    # "FireLatency" (from the start of the arm batch to the clock enabled), "StartLatency" (from the start of the setup
+    # to the clock enabled), all in seconds, and "ResetErrors" (boards whose sync generator reset was not applied, see
+    # CheckReset)}
+    def Fire(self):
+
+        FireStart = time.perf_counter()
+        self.Region.ModifyWords(self.Plan["Fire"])
+        End = time.perf_counter()
+        self.Durations["Fire"] = End - FireStart
+
+        self.Report = {"Stages": self.Durations,
+                       "ArmLatency": self.Durations["Arm"],
+                       "FireLatency": End - self.ArmStart,
+                       "StartLatency": End - self.StartTime,
+                       "ResetErrors": self.ResetErrors}
+
+        log.debug("Start - Boards: {}, ArmLatency: {:.1f} us, StartLatency: {:.1f} us".format(
+            self.SyncBoardList, self.Report["ArmLatency"] * 1e6, self.Report["StartLatency"] * 1e6))
+        return self.Report
+
+    # Write the setup, arm and fire stages and start the acquisition, returns the timing report (see Fire)
+    def Run(self):
+        self.Arm()
+        return self.Fire()
@@ -2,6 +2,11 @@
 
 from ..register import FpgaReg
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class BoardControl:
 
@@ -15,8 +20,12 @@ class BoardControl:
         # Initialize register management class
         self.FpgaReg = FpgaReg.FpgaReg(BoardList)
 
+        # Typed register accessors, {Board: RegBank}
+        self.Regs = self.FpgaReg.GetBoardBanks("BiDAQ_control_")
+
     def SetADCMode(self, Mode, Board=None):
-        self.FpgaReg.SetBoardSettingNoGpio("BiDAQ_control_", "SER_PAR", Mode, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board, Gpio=False):
+            Bank.SER_PAR = Mode
 
     def SetADCModeSerial(self, Board=None):
         self.SetADCMode(0, Board)
@@ -25,22 +34,55 @@ class BoardControl:
         self.SetADCMode(1, Board)
 
     def GetADCMode(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_control_", "SER_PAR", Board)
+        return self.Regs[Board].SER_PAR
 
     def SetSPIClockDivider(self, Divider, Board=None):
-        self.FpgaReg.SetBoardSettingNoGpio("BiDAQ_control_", "SPI_CLK_DIV", Divider, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board, Gpio=False):
+            Bank.SPI_CLK_DIV = Divider
 
     def GetSPIClockDivider(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_control_", "SPI_CLK_DIV", Board)
+        return self.Regs[Board].SPI_CLK_DIV
 
     def SetEnable(self, Enable, Board=None):
-        self.FpgaReg.SetBoardSettingNoGpio("BiDAQ_control_", "EN", Enable, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board, Gpio=False):
+            Bank.EN = Enable
 
     def GetEnable(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_control_", "EN", Board)
+        return self.Regs[Board].EN
 
     def GetInData(self, Board, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_control_", "IN_DATA_{}".format(Channel), Board)
+        return self.Regs[Board].IN_DATA[Channel]
+
+    def GetInDataAll(self, Board, ChannelNumber=12):
+        return self.FpgaReg.GetBoardSettingBlock("BiDAQ_control_", "IN_DATA_0", ChannelNumber, Board)
+
+    # Read the IN_DATA registers of all the channels of the boards in BoardList (default all), with one block read per
+    # board. Returns a (boards, ChannelNumber) NumPy uint32 array of register words
+    def GetInDataSnapshot(self, BoardList=None, ChannelNumber=12):
+
+        if numpy is None:
+            raise ImportError("NumPy is required by BoardControl.GetInDataSnapshot")
+
+        if BoardList is None:
+            BoardList = self.FpgaReg.BoardList
+
+        Reg = self.FpgaReg.FpgaMem
+        Snapshot = numpy.empty((len(BoardList), ChannelNumber), dtype=numpy.uint32)
+        for Row, Brd in enumerate(BoardList):
+            Snapshot[Row] = Reg.ReadBlockArray("BiDAQ_control_" + str(Brd), "IN_DATA_0", ChannelNumber)
+        return Snapshot
+
+    # Same as GetInDataSnapshot, but returns the 24-bit ADC codes
+    def GetInputCodeSnapshot(self, BoardList=None, ChannelNumber=12):
+        return (self.GetInDataSnapshot(BoardList, ChannelNumber) >> 8) & 0xFFFFFF
+
+    # Same as GetInDataSnapshot, but returns the input voltages. FullRange and FilterGain are the ADC full range and
+    # the filter gain of each board in BoardList (see BiDAQBoard.ADCFullRange and BiDAQBoard.FilterGain)
+    def GetInputVoltageSnapshot(self, FullRange, FilterGain, BoardList=None, ChannelNumber=12):
+
+        Codes = self.GetInputCodeSnapshot(BoardList, ChannelNumber)
+        Scale = numpy.asarray(FullRange, dtype=numpy.float64) * numpy.asarray(FilterGain, dtype=numpy.float64)
+        return (Codes / 2 ** 23 - 1) * Scale[:, numpy.newaxis]
 
     def GetMonitorRegisters(self, BoardList=None, ChannelList=None):
 
@@ -53,13 +95,14 @@ class BoardControl:
         RetDict = dict()
 
         for Brd in BoardList:
+            # Read all the channels of the board at once
+            InData = self.GetInDataAll(Brd)
             RetDict["Board_{}".format(Brd)] = dict()
             RetDict["Board_{}".format(Brd)]["Board"] = Brd
             RetDict["Board_{}".format(Brd)]["BoardControl"] = dict()
             for Ch in ChannelList:
                 RetDict["Board_{}".format(Brd)]["BoardControl"]["Channel_{}".format(Ch)] = dict()
                 RetDict["Board_{}".format(Brd)]["BoardControl"]["Channel_{}".format(Ch)]["Channel"] = Ch
-                RetDict["Board_{}".format(Brd)]["BoardControl"]["Channel_{}".format(Ch)]["InData"] = \
-                    self.GetInData(Brd, Ch)
+                RetDict["Board_{}".format(Brd)]["BoardControl"]["Channel_{}".format(Ch)]["InData"] = InData[Ch]
 
         return RetDict
@@ -1,6 +1,12 @@
 #!/usr/bin/python
 
 from ..register import FpgaReg
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class DataPacketizer:
@@ -15,62 +21,85 @@ class DataPacketizer:
         # Initialize register management class
         self.FpgaReg = FpgaReg.FpgaReg(BoardList, Gpio)
 
+        # Typed register accessors, {Board: RegBank}, e.g. self.Regs[Board].FIFO_FILL_LEVEL[Channel]
+        self.Regs = self.FpgaReg.GetBoardBanks("BiDAQ_packetizer_")
+
+        # Addresses of the counter blocks of each board, {Board: (PKT_CNT, FIFO_FILL_LEVEL_0, MAX_FILL_LEVEL_0,
+        # CNT_DROPPED_0)}, resolved on first use by GetSnapshot
+        self.SnapshotAdr = dict()
+
     def SetEnable(self, Enable, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "EN", Enable, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.EN = Enable
 
     def GetEnable(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "EN", Board)
+        return self.Regs[Board].EN
 
     def SetDropTimestamp(self, DropTimestamp, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "DROP_TIMESTAMP", DropTimestamp, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.DROP_TIMESTAMP = DropTimestamp
 
     def GetDropTimestamp(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "DROP_TIMESTAMP", Board)
+        return self.Regs[Board].DROP_TIMESTAMP
 
     def SetDropOnError(self, DropOnError, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "DROP_ON_ERROR", DropOnError, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.DROP_ON_ERROR = DropOnError
 
     def GetDropOnError(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "DROP_ON_ERROR", Board)
+        return self.Regs[Board].DROP_ON_ERROR
 
     def SetRTPPayloadType(self, PayloadType, Marker=True, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "RTP_PAYLOAD_TYPE", PayloadType | (Marker << 7), Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.RTP_PAYLOAD_TYPE = PayloadType | (Marker << 7)
 
     def GetRTPPayloadType(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "RTP_PAYLOAD_TYPE", Board)
+        return self.Regs[Board].RTP_PAYLOAD_TYPE
 
     def SetPacketSamples(self, Samples, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "PACKET_SAMPLES", Samples - 1, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.PACKET_SAMPLES = Samples - 1
 
     def GetPacketSamples(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "PACKET_SAMPLES", Board) + 1
+        return self.Regs[Board].PACKET_SAMPLES + 1
 
     def SetRTPSource(self, Source, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "RTP_SOURCE", Source, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.RTP_SOURCE = Source
 
     def GetRTPSource(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "RTP_SOURCE", Board)
+        return self.Regs[Board].RTP_SOURCE
 
     def SetPayloadHeader(self, Header, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "PAYLOAD_HEADER", Header, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.PAYLOAD_HEADER = Header
 
     def GetPayloadHeader(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "PAYLOAD_HEADER", Board)
+        return self.Regs[Board].PAYLOAD_HEADER
 
     def GetFIFOFillCount(self, Board, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "FIFO_FILL_LEVEL_{}".format(Channel), Board)
+        return self.Regs[Board].FIFO_FILL_LEVEL[Channel]
 
     def GetPacketCount(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "PKT_CNT", Board)
+        return self.Regs[Board].PKT_CNT
 
     def GetDataCount(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "DAT_CNT", Board)
+        return self.Regs[Board].DAT_CNT
 
     def GetFIFOMaxFillCount(self, Board, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "MAX_FILL_LEVEL_{}".format(Channel), Board)
+        return self.Regs[Board].MAX_FILL_LEVEL[Channel]
 
     def GetDroppedDataCount(self, Board, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_packetizer_", "CNT_DROPPED_{}".format(Channel), Board)
+        return self.Regs[Board].CNT_DROPPED[Channel]
+
+    def GetFIFOFillCountAll(self, Board, ChannelNumber=12):
+        return self.FpgaReg.GetBoardSettingBlock("BiDAQ_packetizer_", "FIFO_FILL_LEVEL_0", ChannelNumber, Board)
+
+    def GetFIFOMaxFillCountAll(self, Board, ChannelNumber=12):
+        return self.FpgaReg.GetBoardSettingBlock("BiDAQ_packetizer_", "MAX_FILL_LEVEL_0", ChannelNumber, Board)
+
+    def GetDroppedDataCountAll(self, Board, ChannelNumber=12):
+        return self.FpgaReg.GetBoardSettingBlock("BiDAQ_packetizer_", "CNT_DROPPED_0", ChannelNumber, Board)
 
     def ResetCounters(self, Board=None, Channel=None):
 
@@ -80,15 +109,16 @@ class DataPacketizer:
         else:
             ChannelList = list(range(Channel, 1))
 
-        # Reset channel registers
-        for i in ChannelList:
-            self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "FIFO_FILL_LEVEL_{}".format(i), 0, Board)
-            self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "MAX_FILL_LEVEL_{}".format(i), 0, Board)
-            self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "CNT_DROPPED_{}".format(i), 0, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            # Reset channel registers
+            for i in ChannelList:
+                Bank.FIFO_FILL_LEVEL[i] = 0
+                Bank.MAX_FILL_LEVEL[i] = 0
+                Bank.CNT_DROPPED[i] = 0
 
-        # Reset block registers
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "PKT_CNT", 0, Board)
-        self.FpgaReg.SetBoardSetting("BiDAQ_packetizer_", "DAT_CNT", 0, Board)
+            # Reset block registers
+            Bank.PKT_CNT = 0
+            Bank.DAT_CNT = 0
 
     def CheckAllFifoEmpty(self, BoardList=None, ChannelList=None):
 
@@ -105,9 +135,9 @@ class DataPacketizer:
                 ChannelListCurr = list(range(0, self.FpgaReg.Gpio))
             else:
                 ChannelListCurr = ChannelList
+            FifoFillCount = self.GetFIFOFillCountAll(Brd)
             for Ch in ChannelListCurr:
-                FifoFillCount = self.GetFIFOFillCount(Brd, Ch)
-                if not FifoFillCount == 0:
+                if not FifoFillCount[Ch] == 0:
                     return False
 
         return True
@@ -130,36 +160,93 @@ class DataPacketizer:
 
         return True
 
-    def GetMonitorRegisters(self, BoardList=None, ChannelList=None):
+    # Read the counters of the boards in BoardList (by default all the boards and the GPIO), with four block reads
+    # per board. Returns a DataPacketizerSnapshot
+    def GetSnapshot(self, BoardList=None):
+
+        if numpy is None:
+            raise ImportError("NumPy is required by DataPacketizer.GetSnapshot")
 
         if BoardList is None:
             BoardList = self.FpgaReg.BoardList.copy()
             if self.FpgaReg.Gpio is not None:
                 BoardList.append(self.FpgaReg.Gpio)
 
+        Snapshot = DataPacketizerSnapshot(BoardList, self.FpgaReg.Gpio)
+        Region = self.FpgaReg.FpgaMem.Region
+        for Row, Brd in enumerate(BoardList):
+            Adr = self.SnapshotAdr.get(Brd)
+            if Adr is None:
+                RegName = "BiDAQ_packetizer_" + str(Brd)
+                Adr = tuple(self.FpgaReg.FpgaMem.GetField(RegName, BitName)[0] for BitName in (
+                    "PKT_CNT", "FIFO_FILL_LEVEL_0", "MAX_FILL_LEVEL_0", "CNT_DROPPED_0"))
+                self.SnapshotAdr[Brd] = Adr
+            # PKT_CNT and DAT_CNT are consecutive. With a broker, the counters are taken from its snapshot
+            Snapshot.Counters[Row] = Region.ReadSnapshotArray(Adr[0], 2)
+            Snapshot.FifoFill[Row] = Region.ReadSnapshotArray(Adr[1], 12)
+            Snapshot.MaxFill[Row] = Region.ReadSnapshotArray(Adr[2], 12)
+            Snapshot.Dropped[Row] = Region.ReadSnapshotArray(Adr[3], 12)
+        return Snapshot
+
+    def GetMonitorRegisters(self, BoardList=None, ChannelList=None):
+        return self.GetSnapshot(BoardList).ToDict(ChannelList)
+
+
+class DataPacketizerSnapshot:
+
+    # Class constructor, allocates the arrays for the boards in BoardList (Gpio is the board number of the GPIO
+    # packetizer, None if not present). Filled by DataPacketizer.GetSnapshot
+    def __init__(self, BoardList, Gpio=None):
+
+        self.BoardList = list(BoardList)
+        self.Gpio = Gpio
+        self.Time = time.time()
+
+        # Per board: packets and samples sent, one row per board of BoardList
+        self.Counters = numpy.zeros((len(self.BoardList), 2), dtype=numpy.uint32)
+        self.PacketCount = self.Counters[:, 0]
+        self.DataCount = self.Counters[:, 1]
+
+        # Per board and channel: FIFO fill level, maximum fill level and dropped samples
+        self.FifoFill = numpy.zeros((len(self.BoardList), 12), dtype=numpy.uint32)
+        self.MaxFill = numpy.zeros((len(self.BoardList), 12), dtype=numpy.uint32)
+        self.Dropped = numpy.zeros((len(self.BoardList), 12), dtype=numpy.uint32)
+
+    # Get the row of a board in the arrays
+    def GetRow(self, Board):
+        return self.BoardList.index(Board)
+
+    # Channels of a board (the GPIO packetizer has one channel per board)
+    def GetChannelList(self, Board, ChannelList=None):
+        if Board == self.Gpio:
+            return list(range(0, self.Gpio))
         if ChannelList is None:
-            ChannelList = list(range(0, 12))
+            return list(range(0, 12))
+        return ChannelList
+
+    # Get the content as the nested dictionary of DataPacketizer.GetMonitorRegisters
+    def ToDict(self, ChannelList=None):
 
         RetDict = dict()
 
-        for Brd in BoardList:
+        for Row, Brd in enumerate(self.BoardList):
             RetDict["Board_{}".format(Brd)] = dict()
             RetDict["Board_{}".format(Brd)]["Board"] = Brd
             RetDict["Board_{}".format(Brd)]["DataPacketizer"] = dict()
-            RetDict["Board_{}".format(Brd)]["DataPacketizer"]["SamplesSent"] = self.GetDataCount(Brd)
-            RetDict["Board_{}".format(Brd)]["DataPacketizer"]["PacketsSent"] = self.GetPacketCount(Brd)
-            if Brd == self.FpgaReg.Gpio:
-                ChannelListCurr = list(range(0, self.FpgaReg.Gpio))
-            else:
-                ChannelListCurr = ChannelList
+            RetDict["Board_{}".format(Brd)]["DataPacketizer"]["SamplesSent"] = int(self.DataCount[Row])
+            RetDict["Board_{}".format(Brd)]["DataPacketizer"]["PacketsSent"] = int(self.PacketCount[Row])
+            ChannelListCurr = self.GetChannelList(Brd, ChannelList)
+            DroppedSamples = self.Dropped[Row].tolist()
+            FIFOFillLevel = self.FifoFill[Row].tolist()
+            FIFOMaxFillLevel = self.MaxFill[Row].tolist()
             for Ch in ChannelListCurr:
                 RetDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)] = dict()
                 RetDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)]["Channel"] = Ch
                 RetDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)]["DroppedSamples"] = \
-                    self.GetDroppedDataCount(Brd, Ch)
+                    DroppedSamples[Ch]
                 RetDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)]["FIFOFillLevel"] = \
-                    self.GetFIFOFillCount(Brd, Ch)
+                    FIFOFillLevel[Ch]
                 RetDict["Board_{}".format(Brd)]["DataPacketizer"]["Channel_{}".format(Ch)]["FIFOMaxFillLevel"] = \
-                    self.GetFIFOMaxFillCount(Brd, Ch)
+                    FIFOMaxFillLevel[Ch]
 
         return RetDict
@@ -18,6 +18,9 @@ class GpioControl:
 
         self.FpgaReg.BoardList.pop(0)
 
+        # Typed register accessors, {Channel: RegBank}
+        self.VirtualGpioRegs = self.FpgaReg.GetBoardBanks("BiDAQ_virtual_gpio_control_")
+
     def SetEnable(self, Enable):
         self.FpgaReg.FpgaMem.WriteBits("BiDAQ_gpio_control", "ENABLE", Enable)
 
@@ -45,13 +48,12 @@ class GpioControl:
     def GetPinEnable(self, Pin):
         return (self.GetPortEnable() >> Pin) & 1
 
+    # Update only the pins selected by Mask, with a single write
+    def ModifyPortEnable(self, Mask, Enable):
+        self.FpgaReg.FpgaMem.ModifyBits("BiDAQ_gpio_control", "PIN_ENABLE", Mask, Enable)
+
     def SetPinEnable(self, Pin, Enable):
-        Curr = self.GetPortEnable()
-        if Enable:
-            New = Curr | (1 << Pin)
-        else:
-            New = Curr & ~(1 << Pin)
-        self.SetPortEnable(New)
+        self.ModifyPortEnable(1 << Pin, 0xFF if Enable else 0)
 
     def GetPortDirection(self):
         return self.FpgaReg.FpgaMem.ReadBits("BiDAQ_gpio_control", "PIN_DIRECTION")
@@ -68,13 +70,12 @@ class GpioControl:
     def GetPinDirection(self, Pin):
         return (self.GetPortDirection() >> Pin) & 1
 
+    # Update only the pins selected by Mask, with a single write
+    def ModifyPortDirection(self, Mask, Dir):
+        self.FpgaReg.FpgaMem.ModifyBits("BiDAQ_gpio_control", "PIN_DIRECTION", Mask, Dir)
+
     def SetPinDirection(self, Pin, Dir):
-        Curr = self.GetPortDirection()
-        if Dir:
-            New = Curr | (1 << Pin)
-        else:
-            New = Curr & ~(1 << Pin)
-        self.SetPortDirection(New)
+        self.ModifyPortDirection(1 << Pin, 0xFF if Dir else 0)
 
     def SetPinOutput(self, Pin):
         self.SetPinDirection(Pin, 1)
@@ -91,13 +92,24 @@ class GpioControl:
     def GetPinOutputValue(self, Pin):
         return (self.GetPortOutputValue() >> Pin) & 1
 
+    # Update only the pins selected by Mask, with a single write
+    def ModifyPortOutputValue(self, Mask, Value):
+        self.FpgaReg.FpgaMem.ModifyBits("BiDAQ_gpio_control", "PIN_OUTPUT_VALUE", Mask, Value)
+
     def SetPinOutputValue(self, Pin, Value):
-        Curr = self.GetPortOutputValue()
-        if Value:
-            New = Curr | (1 << Pin)
-        else:
-            New = Curr & ~(1 << Pin)
-        self.SetPortOutputValue(New)
+        self.ModifyPortOutputValue(1 << Pin, 0xFF if Value else 0)
+
+    # Update output values, directions and enables of the pins selected by each mask in one batch (one write per
+    # register, all sent in a single request with a broker). The output values are written first and the enables
+    # last, so that a pin becoming an enabled output drives its new value from the start
+    def UpdatePort(self, OutputMask=0, OutputValue=0, DirMask=0, Dir=0, EnableMask=0, Enable=0):
+        with self.FpgaReg.Transaction():
+            if OutputMask:
+                self.ModifyPortOutputValue(OutputMask, OutputValue)
+            if DirMask:
+                self.ModifyPortDirection(DirMask, Dir)
+            if EnableMask:
+                self.ModifyPortEnable(EnableMask, Enable)
 
     def GetPortInputValue(self):
         return self.FpgaReg.FpgaMem.ReadBits("BiDAQ_gpio_control", "PIN_INPUT_VALUE")
@@ -106,13 +118,15 @@ class GpioControl:
         return (self.GetPortInputValue() >> Pin) & 1
 
     def SetVirtualGpioEnable(self, Enable, Channel=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_virtual_gpio_control_", "ENABLE", Enable, Channel)
+        for Bank in self.FpgaReg.SelectBanks(self.VirtualGpioRegs, Channel):
+            Bank.ENABLE = Enable
 
     def GetVirtualGpioEnable(self, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_virtual_gpio_control_", "ENABLE", Channel)
+        return self.VirtualGpioRegs[Channel].ENABLE
 
     def SetVirtualGpioValue(self, Value, Channel=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_virtual_gpio_control_", "VALUE", Value, Channel)
+        for Bank in self.FpgaReg.SelectBanks(self.VirtualGpioRegs, Channel):
+            Bank.VALUE = Value
 
     def GetVirtualGpioValue(self, Channel):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_virtual_gpio_control_", "VALUE", Channel)
+        return self.VirtualGpioRegs[Channel].VALUE
@@ -1,11 +1,13 @@
 #!/usr/bin/python
 
 from ..register import FpgaReg
-from ..block import SysId
 
 
 class SyncGenerator:
 
+    # Reference clock of the generators, the sample rate is SyncClock / Divider
+    SyncClock = 500000
+
     # Class constructor
     def __init__(self, BoardList=None, Gpio=None):
 
@@ -15,37 +17,39 @@ class SyncGenerator:
 
         # Initialize register management class
         self.FpgaReg = FpgaReg.FpgaReg(BoardList, Gpio)
+
+        # Typed register accessors, {Board: RegBank}
+        self.Regs = self.FpgaReg.GetBoardBanks("BiDAQ_sync_generator_")
         self.BoardList = BoardList
-        self.SysId = SysId.SysId()
 
     def SetReset(self, Reset, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "RESET", Reset, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.RESET = Reset
 
     def GetReset(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "RESET", Board)
+        return self.Regs[Board].RESET
 
     def SetTimestampReset(self, Reset, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "RESET_TIMESTAMP", Reset, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.RESET_TIMESTAMP = Reset
 
     def GetTimestampReset(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "RESET_TIMESTAMP", Board)
+        return self.Regs[Board].RESET_TIMESTAMP
 
     def Reset(self, Board=None):
         self.SetReset(1, Board)
         self.SetTimestampReset(1, Board)
-        if self.GetReset(Board) & self.GetTimestampReset(Board):
-            Err = False
-        else:
-            Err = True
+        Err = not all(Bank.RESET & Bank.RESET_TIMESTAMP for Bank in self.FpgaReg.SelectBanks(self.Regs, Board))
         self.SetReset(0, Board)
         self.SetTimestampReset(0, Board)
         return -Err
 
     def SetEnable(self, Enable, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "ENABLE", Enable, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.ENABLE = Enable
 
     def GetEnable(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "ENABLE", Board)
+        return self.Regs[Board].ENABLE
 
     def SetDivider(self, Divider, Board=None):
         if Board is None:
@@ -55,27 +59,54 @@ class SyncGenerator:
         else:
             Enable = self.GetEnable(Board)
         if not Enable:
-            self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "DIVIDER", Divider - 1, Board)
+            for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+                Bank.DIVIDER = Divider - 1
         else:
             raise Exception("Divider can't be set while SyncGenerator is running")
 
     def GetDivider(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "DIVIDER", Board) + 1
+        return self.Regs[Board].DIVIDER + 1
 
     def SetPulseWidth(self, PulseWidth, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "PULSE_WIDTH", PulseWidth, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.PULSE_WIDTH = PulseWidth
 
     def GetPulseWidth(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "PULSE_WIDTH", Board)
+        return self.Regs[Board].PULSE_WIDTH
 
     def SetTimestampResetValue(self, TimestampResetValue, Board=None):
-        self.FpgaReg.SetBoardSetting("BiDAQ_sync_generator_", "TIMESTAMP_RESET_VALUE", TimestampResetValue, Board)
+        for Bank in self.FpgaReg.SelectBanks(self.Regs, Board):
+            Bank.TIMESTAMP_RESET_VALUE = TimestampResetValue
 
     def GetTimestampResetValue(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "TIMESTAMP_RESET_VALUE", Board)
+        return self.Regs[Board].TIMESTAMP_RESET_VALUE
 
     def GetTimestamp(self, Board):
-        return self.FpgaReg.GetBoardSetting("BiDAQ_sync_generator_", "TIMESTAMP", Board)
+        return self.Regs[Board].TIMESTAMP
+
+    # Time between two samples (and timestamp increments), in seconds
+    def GetSamplePeriod(self, Board):
+        return self.GetDivider(Board) / self.SyncClock
+
+    # Wait until the timestamp of Board differs from Timestamp (i.e. a new sample has been taken), sleeping between
+    # the polls. Period is the sample period (see GetSamplePeriod, read from the registers if not given: pass it when
+    # waiting in a loop). Returns the new timestamp, as read by the poll that detected the change, raises TimeoutError
+    # after Timeout seconds (by default two sample periods)
+    def WaitTimestampChange(self, Board, Timestamp, Timeout=None, Period=None):
+
+        if Period is None:
+            Period = self.GetSamplePeriod(Board)
+        if Timeout is None:
+            Timeout = Period * 2 * 1.1 + 0.001
+
+        Observed = [Timestamp]
+
+        def Changed(Value):
+            Observed[0] = Value
+            return Value != Timestamp
+
+        self.FpgaReg.FpgaMem.WaitFor([("BiDAQ_sync_generator_" + str(Board), "TIMESTAMP")], Changed, Timeout, Period)
+        return Observed[0]
 
     def GetMonitorRegisters(self, BoardList=None):
 
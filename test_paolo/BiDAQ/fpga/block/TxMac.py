@@ -7,6 +7,18 @@ from ..register import FpgaReg
 
 class TxMac:
 
+    # Statistics counters of the MAC, in address order (one contiguous block starting from aFramesTransmittedOK). The
+    # word without a name (ifOutDiscards in the TSE documentation) is not in the register dictionary
+    StatisticsCounters = (
+        "aFramesTransmittedOK", "aFramesReceivedOK", "aFrameCheckSequenceErrors", "aAlignmentErrors",
+        "aOctetsTransmittedOK", "aOctetsReceivedOK", "aTxPAUSEMACCtrlFrames", "aRxPAUSEMACCtrlFrames",
+        "ifInErrors", "ifOutErrors", "ifInUcastPkts", "ifInMulticastPkts", "ifInBroadcastPkts", None,
+        "ifOutUcastPkts", "ifOutMulticastPkts", "ifOutBroadcastPkts",
+        "etherStatsDropEvents", "etherStatsOctets", "etherStatsPkts", "etherStatsUndersizePkts",
+        "etherStatsOversizePkts", "etherStatsPkts64Octets", "etherStatsPkts65to127Octets",
+        "etherStatsPkts128to255Octets", "etherStatsPkts256to511Octets", "etherStatsPkts512to1023Octets",
+        "etherStatsPkts1024to1518Octets", "etherStatsPkts1519toXOctets", "etherStatsJabbers", "etherStatsFragments")
+
     # Class constructor
     def __init__(self):
         # Initialize register management class
@@ -108,6 +120,21 @@ class TxMac:
     def GetStatisticsCounter(self, Name):
         return self.FpgaReg.FpgaMem.ReadBits("eth_mac", Name)
 
+    # Read all the statistics counters with a single block read (from the snapshot of the broker, if there is one), as
+    # a list in the order of StatisticsCounters
+    def GetStatisticsBlock(self):
+        return self.FpgaReg.FpgaMem.ReadSnapshotBlock("eth_mac", "aFramesTransmittedOK", len(self.StatisticsCounters))
+
+    # Same as GetStatisticsBlock, but returns a NumPy uint32 array
+    def GetStatisticsBlockArray(self):
+        return self.FpgaReg.FpgaMem.ReadSnapshotBlockArray("eth_mac", "aFramesTransmittedOK",
+                                                           len(self.StatisticsCounters))
+
+    # Read all the statistics counters with a single block read, as {Name: Value}
+    def GetStatistics(self):
+        return {Name: Value for Name, Value in zip(self.StatisticsCounters, self.GetStatisticsBlock())
+                if Name is not None}
+
     def Reset(self):
 
         self.SetReset(1)
@@ -124,19 +151,22 @@ class TxMac:
         Interface = 'eth0'
         MacStr = netifaces.ifaddresses(Interface)[netifaces.AF_LINK][0]['addr']
         Mac = int(MacStr.replace(':', ''), 16)
-        self.SetMac(Mac)
-        self.SetPauseQuanta(0x2000)
-        self.SetRxSectionEmpty(FifoSize - SectionThr)
-        self.SetRxSectionFull(SectionThr)
-        self.SetTxSectionEmpty(FifoSize - SectionThr)
-        self.SetTxSectionFull(SectionThr)
-        self.SetRxAlmostEmpty(AlmostThr)
-        self.SetRxAlmostFull(AlmostThr)
-        self.SetTxAlmostEmpty(AlmostThr)
-        self.SetTxAlmostFull(TxAlmostFullThr)
-        self.SetTxIpgLength(0xc)
-        self.SetTxShift16(1)
-        self.SetRxShift16(1)
+
+        # Write all the settings in a single transaction, so that each register is accessed only once
+        with self.FpgaReg.Transaction():
+            self.SetMac(Mac)
+            self.SetPauseQuanta(0x2000)
+            self.SetRxSectionEmpty(FifoSize - SectionThr)
+            self.SetRxSectionFull(SectionThr)
+            self.SetTxSectionEmpty(FifoSize - SectionThr)
+            self.SetTxSectionFull(SectionThr)
+            self.SetRxAlmostEmpty(AlmostThr)
+            self.SetRxAlmostFull(AlmostThr)
+            self.SetTxAlmostEmpty(AlmostThr)
+            self.SetTxAlmostFull(TxAlmostFullThr)
+            self.SetTxIpgLength(0xc)
+            self.SetTxShift16(1)
+            self.SetRxShift16(1)
 
     def StartTx(self):
 
@@ -159,13 +189,16 @@ class TxMac:
     def GetMonitorRegisters(self):
         RetDict = dict()
 
+        # Read all the counters at once
+        Statistics = self.GetStatistics()
+
         RetDict["TxMac"] = dict()
-        RetDict["TxMac"]["PacketsSent"] = self.GetStatisticsCounter("aFramesTransmittedOK")
-        RetDict["TxMac"]["BytesSent"] = self.GetStatisticsCounter("aOctetsTransmittedOK")
-        RetDict["TxMac"]["PauseFrameSent"] = self.GetStatisticsCounter("aTxPAUSEMACCtrlFrames")
-        RetDict["TxMac"]["ErrorPackets"] = self.GetStatisticsCounter("ifOutErrors")
-        RetDict["TxMac"]["UnicastPackets"] = self.GetStatisticsCounter("ifOutUcastPkts")
-        RetDict["TxMac"]["MulticastPackets"] = self.GetStatisticsCounter("ifOutMulticastPkts")
-        RetDict["TxMac"]["BroadcastPackets"] = self.GetStatisticsCounter("ifOutBroadcastPkts")
+        RetDict["TxMac"]["PacketsSent"] = Statistics["aFramesTransmittedOK"]
+        RetDict["TxMac"]["BytesSent"] = Statistics["aOctetsTransmittedOK"]
+        RetDict["TxMac"]["PauseFrameSent"] = Statistics["aTxPAUSEMACCtrlFrames"]
+        RetDict["TxMac"]["ErrorPackets"] = Statistics["ifOutErrors"]
+        RetDict["TxMac"]["UnicastPackets"] = Statistics["ifOutUcastPkts"]
+        RetDict["TxMac"]["MulticastPackets"] = Statistics["ifOutMulticastPkts"]
+        RetDict["TxMac"]["BroadcastPackets"] = Statistics["ifOutBroadcastPkts"]
 
         return RetDict
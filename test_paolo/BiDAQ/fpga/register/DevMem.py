@@ -1,11 +1,17 @@
 #!/usr/bin/env python
 
+import array
 import mmap
 import optparse
 import os
 import struct
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 """
 This is designed primarily for use with accessing /dev/mem on OMAP platforms.
 It should work on other platforms and work to mmap() files rather then just
@@ -119,74 +125,136 @@ class DevMem:
         self.debug('init with base_addr = {0} and length = {1} on {2}'.
                    format(hex(self.base_addr), hex(self.length), self.fname))
 
-        # Open file and mmap
-        self.f = os.open(self.fname, os.O_RDWR | os.O_SYNC)
-        self.mem = mmap.mmap(self.f, self.length, mmap.MAP_SHARED,
-                             mmap.PROT_READ | mmap.PROT_WRITE,
-                             offset=self.base_addr)
+        # Open file and mmap. The mapping keeps its own reference to the
+        # file, so the descriptor is not needed after mmap()
+        f = os.open(self.fname, os.O_RDWR | os.O_SYNC)
+        try:
+            self.mem = mmap.mmap(f, self.length, mmap.MAP_SHARED,
+                                 mmap.PROT_READ | mmap.PROT_WRITE,
+                                 offset=self.base_addr)
+        finally:
+            os.close(f)
+
+        # Compensate for the base_address not being what the user requested
+        self.virt_base_addr = self.base_addr_offset & self.mask
+
+        # Zero-copy view of the whole mapping as 32-bit words, all the
+        # accesses go through it (no seek and no struct packing)
+        self.words = memoryview(self.mem).cast('I')
 
     def __del__(self):
-        os.close(self.f)
+        self.close()
 
     """
-    Read length number of words from offset
+    Unmap the memory, the object can't be used anymore afterwards
     """
 
-    def read(self, offset, length):
-        if offset < 0 or length < 0:
+    def close(self):
+        mem = getattr(self, 'mem', None)
+        if mem is not None and not mem.closed:
+            self.debug('closing mapping at base_addr = {0}'.
+                       format(hex(self.base_addr)))
+            self.words.release()
+            try:
+                mem.close()
+            except BufferError:
+                # Views returned by view() or read_array() are still alive,
+                # the mapping is released when they are garbage collected
+                self.debug('mapping still in use, not closed')
+
+    """
+    Get the index in self.words of the word at offset
+    """
+
+    def index(self, offset):
+        if offset < 0 or offset & ~self.mask:
             raise AssertionError
+        return (self.virt_base_addr + offset) >> 2
 
-        # Make reading easier (and faster... won't resolve dot in loops)
-        mem = self.mem
+    """
+    Zero-copy view of length words from offset. The returned memoryview
+    reads and writes directly the mapped memory
+    """
 
-        self.debug('reading {0} bytes from offset {1}'.
-                   format(length * self.word, hex(offset)))
+    def view(self, offset, length):
+        start = self.index(offset)
+        if length < 0 or start + length > len(self.words):
+            raise AssertionError
+        return self.words[start:start + length]
 
-        # Compensate for the base_address not being what the user requested
-        # and then seek to the aligned offset.
-        virt_base_addr = self.base_addr_offset & self.mask
-        mem.seek(virt_base_addr + offset)
+    """
+    Zero-copy NumPy uint32 view of length words from offset
+    """
 
-        # Read length words of size self.word and return it
-        data = []
-        for i in range(length):
-            data.append(struct.unpack('I', mem.read(self.word))[0])
+    def read_array(self, offset, length):
+        if numpy is None:
+            raise ImportError("NumPy is required by DevMem.read_array")
+        start = self.index(offset)
+        if length < 0 or start + length > len(self.words):
+            raise AssertionError
+        return numpy.frombuffer(self.mem, dtype=numpy.uint32, count=length,
+                                offset=start * self.word)
 
-        abs_addr = self.base_addr + virt_base_addr
-        return DevMemBuffer(abs_addr + offset, data)
+    """
+    Write a block of words to offset with a single copy. din can be a list,
+    an array or a NumPy array
+    """
+
+    def write_array(self, offset, din):
+        if len(din) <= 0:
+            raise AssertionError
+        if numpy is not None and isinstance(din, numpy.ndarray):
+            data = memoryview(numpy.ascontiguousarray(din, dtype=numpy.uint32))
+        else:
+            data = array.array('I', din)
+        self.view(offset, len(data))[:] = data
 
     """
-    Write length number of words to offset
+    Read a single word from offset
     """
 
-    def write(self, offset, din):
-        if offset < 0 or len(din) <= 0:
+    def read_word(self, offset):
+        return self.words[self.index(offset)]
+
+    """
+    Write a single word to offset
+    """
+
+    def write_word(self, offset, value):
+        self.words[self.index(offset)] = value
+
+    """
+    Read length number of words from offset
+    """
+
+    def read(self, offset, length):
+        if length < 0:
             raise AssertionError
 
-        self.debug('writing {0} bytes to offset {1}'.
-                   format(len(din) * self.word, hex(offset)))
+        if self._debug:
+            self.debug('reading {0} bytes from offset {1}'.
+                       format(length * self.word, hex(offset)))
 
-        # Make reading easier (and faster... won't resolve dot in loops)
-        mem = self.mem
+        # Read length words of size self.word and return it
+        data = self.view(offset, length).tolist()
 
-        # Compensate for the base_address not being what the user requested
-        # fix double plus offset
-        # offset += self.base_addr_offset
+        abs_addr = self.base_addr + self.virt_base_addr
+        return DevMemBuffer(abs_addr + offset, data)
 
-        # Check that the operation is going write to an aligned location
-        if offset & ~self.mask:
+    """
+    Write length number of words to offset
+    """
+
+    def write(self, offset, din):
+        if len(din) <= 0:
             raise AssertionError
 
-        # Seek to the aligned offset
-        virt_base_addr = self.base_addr_offset & self.mask
-        mem.seek(virt_base_addr + offset)
+        if self._debug:
+            self.debug('writing {0} bytes to offset {1}'.
+                       format(len(din) * self.word, hex(offset)))
 
-        # Read until the end of our aligned address
-        for i in range(len(din)):
-            self.debug('writing at position = {0}: 0x{1:x}'.
-                       format(self.mem.tell(), din[i]))
-            # Write one word at a time
-            mem.write(struct.pack('I', din[i]))
+        # Write all the words with a single copy
+        self.write_array(offset, din)
 
     def debug_set(self, value):
         self._debug = value
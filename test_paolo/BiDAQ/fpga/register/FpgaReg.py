@@ -2,6 +2,7 @@
 
 from . import FpgaRegDict
 from . import Reg
+from . import RegMapCache
 
 
 ############################################################
@@ -9,6 +10,9 @@ from . import Reg
 ############################################################
 class FpgaReg:
 
+    # Map the FPGA registers page by page, only when first accessed (see LazyDevMem)
+    LazyMapping = False
+
     # Class constructor
     def __init__(self, BoardList=None, Gpio=None):
 
@@ -29,8 +33,12 @@ class FpgaReg:
         # FPGA memory specs (BaseAdr is defined by Altera, MemLen by the last address used in the application)
         BaseAdr = 0xC0000000
         MemLen = 0x00040000
+
+        # Get the register map, built only once for each board list (the dictionary is shared, don't modify it)
+        RegDict, RegIndex = RegMapCache.RegMapCache.Get(RegDictClass, (tuple(BoardList), Gpio))
+
         # Initialize DevMem class
-        self.FpgaMem = Reg.Reg(BaseAdr, MemLen, RegDictClass.CreateDict(BoardList, Gpio))
+        self.FpgaMem = Reg.Reg(BaseAdr, MemLen, RegDict, RegDictClass.VolatileBits, RegIndex, self.LazyMapping)
 
     def SetBoardSettingGeneric(self, RegName, BitName, Data, Board=None, Gpio=None):
         Ret = 0
@@ -60,3 +68,38 @@ class FpgaReg:
 
     def GetBoardSetting(self, RegName, BitName, Board):
         return self.FpgaMem.ReadBits(RegName + str(Board), BitName)
+
+    # Get the typed accessors of the per-board registers RegName + Board, as {Board: RegBank}
+    #     Banks = FpgaReg.GetBoardBanks("BiDAQ_packetizer_")
+    #     Banks[Board].FIFO_FILL_LEVEL[Channel]
+    def GetBoardBanks(self, RegName):
+        Banks = dict()
+        for Name in self.FpgaMem.RegDict:
+            if Name.startswith(RegName) and Name[len(RegName):].isdigit():
+                Banks[int(Name[len(RegName):])] = self.FpgaMem.GetBank(Name)
+        return Banks
+
+    # Get the typed accessors a setter writes to, from the ones returned by GetBoardBanks: the one of Board, or the ones
+    # of all the boards (and of the GPIO, if Gpio is True) if Board is None
+    #     for Bank in FpgaReg.SelectBanks(Banks, Board):
+    #         Bank.EN = Enable
+    def SelectBanks(self, Banks, Board=None, Gpio=True):
+
+        if Board is None:
+            BoardList = self.BoardList.copy()
+            if Gpio and self.Gpio is not None:
+                BoardList.append(self.Gpio)
+        else:
+            BoardList = [Board]
+
+        for Brd in BoardList:
+            if Brd not in Banks:
+                raise Exception("Board not found in the register map - Board: {}".format(Brd))
+        return [Banks[Brd] for Brd in BoardList]
+
+    def GetBoardSettingBlock(self, RegName, BitName, Length, Board):
+        return self.FpgaMem.ReadBlock(RegName + str(Board), BitName, Length)
+
+    # Coalesce all the register writes inside a with block (see Reg.Transaction)
+    def Transaction(self):
+        return self.FpgaMem.Transaction()
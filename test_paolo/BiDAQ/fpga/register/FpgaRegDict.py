@@ -2,6 +2,42 @@
 
 class FpgaRegDict:
 
+    # Bit fields changed by the hardware: counters, fill levels, timestamps, input data, status and self-clearing
+    # bits. All the other fields are changed only by this software, so the registers not containing any of these
+    # fields can be cached
+    VolatileBits = frozenset(
+        ["IN_DATA_{}".format(i) for i in range(12)] +
+        ["FIFO_FILL_LEVEL_{}".format(i) for i in range(12)] +
+        ["MAX_FILL_LEVEL_{}".format(i) for i in range(12)] +
+        ["CNT_DROPPED_{}".format(i) for i in range(12)] +
+        [
+            # BiDAQ_control, BiDAQ_gpio_control, pio_ms_in
+            "PIN_INPUT_VALUE", "MASTER_IN", "START_IN",
+            # BiDAQ_packetizer, gmii_to_avalon_st_converter
+            "PKT_CNT", "DAT_CNT",
+            # BiDAQ_sync_generator
+            "RESET", "RESET_TIMESTAMP", "TIMESTAMP",
+            # udp_payload_inserter
+            "RUN", "ERR", "PACKET_COUNT",
+            # eth_mac (the command register is also changed by the MAC reset)
+            "COMMAND_CONFIG", "SW_RESET", "CNT_RESET",
+            "aFramesTransmittedOK", "aFramesReceivedOK", "aFrameCheckSequenceErrors", "aAlignmentErrors",
+            "aOctetsTransmittedOK", "aOctetsReceivedOK", "aTxPAUSEMACCtrlFrames", "aRxPAUSEMACCtrlFrames",
+            "ifInErrors", "ifOutErrors", "ifInUcastPkts", "ifInMulticastPkts", "ifInBroadcastPkts",
+            "ifOutUcastPkts", "ifOutMulticastPkts", "ifOutBroadcastPkts",
+            "etherStatsDropEvents", "etherStatsOctets", "etherStatsPkts", "etherStatsUndersizePkts",
+            "etherStatsOversizePkts", "etherStatsPkts64Octets", "etherStatsPkts65to127Octets",
+            "etherStatsPkts128to255Octets", "etherStatsPkts256to511Octets", "etherStatsPkts512to1023Octets",
+            "etherStatsPkts1024to1518Octets", "etherStatsPkts1519toXOctets", "etherStatsJabbers",
+            "etherStatsFragments",
+            # avalon_st_single_clock_fifo
+            "fill_level",
+            # hps_emac_interface_splitter (rewritten by the EMAC driver of the kernel when the link speed changes)
+            "MAC_SPEED"])
+
+    # Addresses of SYSTEM_ID and SYSTEM_ID_TIMESTAMP, identifying the firmware (see RegBroker)
+    FwIdAdr = (0x00001010, 0x00001014)
+
     # Dictionary creator
     @staticmethod
     def CreateDict(BoardsList=tuple(range(8)), Gpio=None):
@@ -0,0 +1,182 @@
+#!/usr/bin/python
+
+import os
+import threading
+import time
+
+from . import FpgaRegDict
+from . import RegMapCache
+
+
+############################################################
+# Behavioural model of the FPGA registers, for SimMem      #
+############################################################
+class FpgaSimModel:
+
+    # Reference clock of the sync generators (the sample rate is SyncClock / (DIVIDER + 1))
+    SyncClock = 500000
+
+    # Time the RESET and RESET_TIMESTAMP bits stay set before clearing themselves, in seconds
+    ResetHold = 0.01
+
+    # Depth of the packetizer FIFOs, in samples
+    FifoDepth = 1024
+
+    # Firmware revision reported when none is given (the IN_DATA readback needs 8 or later), it can be set with
+    # BIDAQ_SIMULATE_FWREV in the environment
+    DefaultFwRevision = 8
+
+    # Class constructor. Mem is the SimMem mapping of the FPGA registers, GetLock the function returning the lock of a
+    # word (see RegRegion.GetLock, the words are then updated atomically with respect to the software), BoardNumber and
+    # FwRevision are reported by the SysID block (with FwRevision > 5 the GPIO packetizer is also modelled), Period is
+    # the update period in seconds of the thread started by Start()
+    def __init__(self, Mem, GetLock, BoardNumber=8, FwRevision=None, Period=0.001):
+
+        if FwRevision is None:
+            FwRevision = self.DefaultFwRevision
+
+        self.Mem = Mem
+        self.Period = Period
+        self.GetLock = GetLock
+
+        BoardList = tuple(range(BoardNumber))
+        Gpio = BoardNumber if FwRevision > 5 else None
+        RegDict, self.RegIndex = RegMapCache.RegMapCache.Get(FpgaRegDict.FpgaRegDict(), (BoardList, Gpio))
+
+        # Firmware identification
+        self.Write(self.Field("sys_id", "SYSTEM_ID"), (BoardNumber << 8) | FwRevision)
+        self.Write(self.Field("sys_id", "SYSTEM_ID_TIMESTAMP"), int(time.time()))
+
+        # Modelled blocks, a sync generator and a packetizer for each board (and for the GPIO)
+        self.RefEnable = self.Field("BiDAQ_sync_ref_generator", "ENABLE")
+        self.Boards = list(BoardList) + ([Gpio] if Gpio is not None else [])
+        self.Sync = dict()
+        self.Packetizer = dict()
+        for Brd in self.Boards:
+            RegName = "BiDAQ_sync_generator_{}".format(Brd)
+            self.Sync[Brd] = {BitName: self.Field(RegName, BitName) for BitName in (
+                "RESET", "RESET_TIMESTAMP", "ENABLE", "DIVIDER", "TIMESTAMP_RESET_VALUE", "TIMESTAMP")}
+            RegName = "BiDAQ_packetizer_{}".format(Brd)
+            self.Packetizer[Brd] = {BitName: self.Field(RegName, BitName) for BitName in (
+                "EN", "PACKET_SAMPLES", "PKT_CNT", "DAT_CNT")}
+            for BitName in ("FIFO_FILL_LEVEL", "MAX_FILL_LEVEL", "CNT_DROPPED"):
+                self.Packetizer[Brd][BitName] = [self.Field(RegName, "{}_{}".format(BitName, Ch)) for Ch in range(12)]
+
+        # Time the reset bits were found set, {Board: Time}
+        self.ResetTime = dict()
+
+        # Fraction of sample not generated yet, {Board: Samples}
+        self.Fraction = {Brd: 0.0 for Brd in self.Boards}
+
+        self.LastStep = time.monotonic()
+        self.Thread = None
+        self.StopEvent = threading.Event()
+
+    # Get the word index, shift, mask and lock of a bit field
+    def Field(self, RegName, BitName):
+        RegAdr, Shift, Mask, Width, Cacheable = self.RegIndex[(RegName, BitName)]
+        return self.Mem.index(RegAdr), Shift, Mask, self.GetLock(RegAdr)
+
+    def Read(self, Field):
+        Index, Shift, Mask, Lock = Field
+        return (self.Mem.words[Index] >> Shift) & Mask
+
+    # Update a bit field, holding the lock of the word so that the other bits written by the software are not lost
+    def Write(self, Field, Value):
+        Index, Shift, Mask, Lock = Field
+        Words = self.Mem.words
+        with Lock:
+            Words[Index] = (Words[Index] & ~(Mask << Shift)) | ((Value & Mask) << Shift)
+
+    def Add(self, Field, Value):
+        Index, Shift, Mask, Lock = Field
+        Words = self.Mem.words
+        with Lock:
+            Value += (Words[Index] >> Shift) & Mask
+            Words[Index] = (Words[Index] & ~(Mask << Shift)) | ((Value & Mask) << Shift)
+
+    # Start the thread updating the model every Period seconds
+    def Start(self):
+        if self.Thread is None:
+            self.StopEvent.clear()
+            self.Thread = threading.Thread(target=self.Run, name="FpgaSimModel", daemon=True)
+            self.Thread.start()
+
+    def Stop(self):
+        if self.Thread is not None:
+            self.StopEvent.set()
+            self.Thread.join()
+            self.Thread = None
+
+    def Run(self):
+        while not self.StopEvent.wait(self.Period):
+            self.Step()
+
+    # Advance the model to the current time (or to Now, a time.monotonic() value)
+    def Step(self, Now=None):
+
+        if Now is None:
+            Now = time.monotonic()
+        Elapsed = Now - self.LastStep
+        self.LastStep = Now
+
+        RefEnable = self.Read(self.RefEnable)
+
+        for Brd in self.Boards:
+            Sync = self.Sync[Brd]
+
+            # While in reset the timestamp is held at the reset value, the reset bits clear themselves after ResetHold
+            if self.Read(Sync["RESET"]) or self.Read(Sync["RESET_TIMESTAMP"]):
+                self.Write(Sync["TIMESTAMP"], self.Read(Sync["TIMESTAMP_RESET_VALUE"]))
+                self.Fraction[Brd] = 0.0
+                ResetTime = self.ResetTime.setdefault(Brd, Now)
+                if Now - ResetTime >= self.ResetHold:
+                    self.Write(Sync["RESET"], 0)
+                    self.Write(Sync["RESET_TIMESTAMP"], 0)
+                    del self.ResetTime[Brd]
+                continue
+
+            # Samples are generated only when both the reference clock and the sync generator are enabled
+            Samples = 0
+            Running = RefEnable and self.Read(Sync["ENABLE"])
+            if Running:
+                self.Fraction[Brd] += Elapsed * self.SyncClock / (self.Read(Sync["DIVIDER"]) + 1)
+                Samples = int(self.Fraction[Brd])
+                self.Fraction[Brd] -= Samples
+                self.Add(Sync["TIMESTAMP"], Samples)
+
+            self.StepPacketizer(self.Packetizer[Brd], Samples, Running)
+
+    # Fill the FIFOs with the new samples and send the complete packets. When the sync generator stops, the last
+    # partial packet is sent too. When the packetizer is disabled the FIFOs fill up and samples are dropped
+    def StepPacketizer(self, Packetizer, Samples, Running):
+
+        Enable = self.Read(Packetizer["EN"])
+        PacketSamples = self.Read(Packetizer["PACKET_SAMPLES"]) + 1
+
+        Level = Samples + max(self.Read(Field) for Field in Packetizer["FIFO_FILL_LEVEL"])
+        Dropped = max(Level - self.FifoDepth, 0)
+        Level -= Dropped
+        MaxLevel = Level
+
+        if Enable:
+            if Running:
+                Packets = Level // PacketSamples
+                Sent = Packets * PacketSamples
+            else:
+                Packets = (Level + PacketSamples - 1) // PacketSamples
+                Sent = Level
+            Level -= Sent
+            self.Add(Packetizer["PKT_CNT"], Packets)
+            self.Add(Packetizer["DAT_CNT"], Sent)
+
+        for Ch in range(12):
+            self.Write(Packetizer["FIFO_FILL_LEVEL"][Ch], Level)
+            if MaxLevel > self.Read(Packetizer["MAX_FILL_LEVEL"][Ch]):
+                self.Write(Packetizer["MAX_FILL_LEVEL"][Ch], MaxLevel)
+            if Dropped:
+                self.Add(Packetizer["CNT_DROPPED"][Ch], Dropped)
+
+
+if os.environ.get('BIDAQ_SIMULATE_FWREV'):
+    FpgaSimModel.DefaultFwRevision = int(os.environ['BIDAQ_SIMULATE_FWREV'])
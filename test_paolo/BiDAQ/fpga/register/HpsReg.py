@@ -2,6 +2,7 @@
 
 from . import HpsRegDict
 from . import Reg
+from . import RegMapCache
 
 
 ############################################################
@@ -9,6 +10,10 @@ from . import Reg
 ############################################################
 class HpsReg:
 
+    # Only a few clock manager registers are used in the 16 MB window, so they are mapped page by page when first
+    # accessed (see LazyDevMem)
+    LazyMapping = True
+
     # Class constructor
     def __init__(self):
 
@@ -18,5 +23,9 @@ class HpsReg:
         # FPGA memory specs (BaseAdr is defined by Altera, MemLen by the last address used in the application)
         BaseAdr = 0xFF000000
         MemLen = 0x00400000
+
+        # Get the register map, built only once (the dictionary is shared, don't modify it)
+        RegDict, RegIndex = RegMapCache.RegMapCache.Get(RegDictClass, ())
+
         # Initialize DevMem class
-        self.HpsMem = Reg.Reg(BaseAdr, MemLen, RegDictClass.CreateDict())
+        self.HpsMem = Reg.Reg(BaseAdr, MemLen, RegDict, RegDictClass.VolatileBits, RegIndex, self.LazyMapping)
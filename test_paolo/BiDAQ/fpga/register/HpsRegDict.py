@@ -2,6 +2,9 @@
 
 class HpsRegDict:
 
+    # The clock manager registers are shared with the bootloader and the kernel, so they are never cached
+    VolatileBits = frozenset(["DIVIDER", "ENABLE", "DENOMINATOR", "NUMERATOR"])
+
     # Dictionary creator
     @staticmethod
     def CreateDict():
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+import mmap
+import os
+
+from . import DevMem
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+""" LazyDevMem
+Same interface of DevMem, but the window is not mapped all at once: each
+page is mapped only when a word in it is accessed for the first time.
+Only the pages actually used take virtual memory and mapping time, which
+matters for large, sparsely used windows (e.g. the HPS registers). At
+most max_pages mappings are kept, the oldest ones are dropped when the
+limit is reached
+"""
+
+
+class LazyDevMem(DevMem.DevMem):
+
+    # Words in a page, and shift from word index to page number
+    page_words = mmap.PAGESIZE // DevMem.DevMem.word
+    page_shift = page_words.bit_length() - 1
+
+    def __init__(self, base_addr, length=1, filename='/dev/mem', debug=0,
+                 max_pages=64):
+
+        if base_addr < 0 or length < 0 or max_pages < 1:
+            raise AssertionError
+        self._debug = debug
+
+        self.base_addr = base_addr & ~(mmap.PAGESIZE - 1)
+        self.base_addr_offset = base_addr - self.base_addr
+
+        stop = base_addr + length * self.word
+        if stop % self.mask:
+            stop = (stop + self.word) & ~(self.word - 1)
+
+        self.length = stop - self.base_addr
+        self.fname = filename
+        self.max_pages = max_pages
+
+        self.debug('lazy init with base_addr = {0} and length = {1} on {2}'.
+                   format(hex(self.base_addr), hex(self.length), self.fname))
+
+        self.virt_base_addr = self.base_addr_offset & self.mask
+
+        # The file stays open, pages are mapped on demand
+        self.fd = os.open(self.fname, os.O_RDWR | os.O_SYNC)
+
+        # Mapped pages, {page number: memoryview of the page words}, and
+        # mappings spanning more pages, {(first page, last page): view}
+        self.pages = dict()
+        self.spans = dict()
+
+    """
+    Unmap all the pages and close the file
+    """
+
+    def close(self):
+        fd = getattr(self, 'fd', None)
+        if fd is not None:
+            self.debug('closing lazy mapping at base_addr = {0}'.
+                       format(hex(self.base_addr)))
+            self.pages = dict()
+            self.spans = dict()
+            self.fd = None
+            os.close(fd)
+
+    """
+    Map the pages from first to last (included) and return the view of
+    their words. Dropped mappings are unmapped when no view is using them
+    """
+
+    def map_pages(self, first, last):
+        if last * mmap.PAGESIZE >= self.length:
+            raise AssertionError
+        if len(self.pages) + len(self.spans) >= self.max_pages:
+            if self.spans:
+                del self.spans[next(iter(self.spans))]
+            else:
+                del self.pages[next(iter(self.pages))]
+        self.debug('mapping pages {0} to {1}'.format(first, last))
+        mem = mmap.mmap(self.fd, (last - first + 1) * mmap.PAGESIZE,
+                        mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE,
+                        offset=self.base_addr + first * mmap.PAGESIZE)
+        return memoryview(mem).cast('I')
+
+    """
+    Get the view of the words of a page, mapping it if needed
+    """
+
+    def page(self, number):
+        words = self.pages.get(number)
+        if words is None:
+            words = self.map_pages(number, number)
+            self.pages[number] = words
+        return words
+
+    def view(self, offset, length):
+        start = self.index(offset)
+        if length < 0 or (start + length) * self.word > self.length:
+            raise AssertionError
+        first = start >> self.page_shift
+        last = (start + max(length, 1) - 1) >> self.page_shift
+        if first == last:
+            words = self.page(first)
+        else:
+            words = self.spans.get((first, last))
+            if words is None:
+                words = self.map_pages(first, last)
+                self.spans[(first, last)] = words
+        start -= first << self.page_shift
+        return words[start:start + length]
+
+    def read_array(self, offset, length):
+        if numpy is None:
+            raise ImportError("NumPy is required by DevMem.read_array")
+        return numpy.frombuffer(self.view(offset, length),
+                                dtype=numpy.uint32)
+
+    def read_word(self, offset):
+        index = self.index(offset)
+        words = self.pages.get(index >> self.page_shift)
+        if words is None:
+            if index * self.word >= self.length:
+                raise AssertionError
+            words = self.page(index >> self.page_shift)
+        return words[index & (self.page_words - 1)]
+
+    def write_word(self, offset, value):
+        index = self.index(offset)
+        words = self.pages.get(index >> self.page_shift)
+        if words is None:
+            if index * self.word >= self.length:
+                raise AssertionError
+            words = self.page(index >> self.page_shift)
+        words[index & (self.page_words - 1)] = value
@@ -1,6 +1,10 @@
 #!/usr/bin/python
 
-from . import DevMem
+from . import RegBank
+from . import RegRegion
+from . import RegTrace
+from . import RegTransaction
+from . import RegWait
 
 
 ############################################################
@@ -9,90 +13,101 @@ from . import DevMem
 class Reg:
 
     # Class constructor
-    def __init__(self, BaseAdr, MemLen, RegDict):
+    def __init__(self, BaseAdr, MemLen, RegDict, VolatileBits=frozenset(), RegIndex=None, Lazy=False):
 
-        # Initialize DevMem class
-        self.RegMem = DevMem.DevMem(BaseAdr, MemLen)
+        # Get the memory region, it is mapped only once and shared with all the other Reg classes (page by page, on
+        # first access, if Lazy is True)
+        self.Region = RegRegion.RegRegion.Get(BaseAdr, MemLen, Lazy=Lazy)
+        self.RegMem = self.Region.Mem
 
         # Create dictionary
         self.RegDict = RegDict
 
+        # Create the flat index used by all the accessors (unless an already built one is given, see RegMapCache)
+        if RegIndex is None:
+            RegIndex = self.BuildIndex(RegDict, VolatileBits)
+        self.RegIndex = RegIndex
+
+        # Typed accessors, created when first requested
+        self.Banks = dict()
+
+    def __del__(self):
+        self.Close()
+
+    # Release the memory region (it is unmapped when no other class is using it)
+    def Close(self):
+        Region = getattr(self, 'Region', None)
+        if Region is not None:
+            self.Region = None
+            Region.Release()
+
+    # Flatten the register dictionary into an index, so that each lookup is a single dictionary access.
+    # Keys are (RegName, BitName) for bit fields and (RegName, None) for whole registers, values are tuples
+    # (RegAdr, Shift, Mask, Width, Cacheable), with Mask not shifted.
+    # First-level names take precedence over second-level ones and, for first-level names with sub-registers, the
+    # first sub-register containing the bit name wins (same resolution order of the nested dictionary).
+    # A register is cacheable if none of the bit fields at its address is in VolatileBits.
+    @staticmethod
+    def BuildIndex(RegDict, VolatileBits=frozenset()):
+
+        # Find the addresses of the registers with at least a volatile bit field
+        VolatileAdr = set()
+        for reg in RegDict.values():
+            SubRegs = reg.values() if isinstance(reg, dict) else (reg,)
+            for SubReg in SubRegs:
+                if not VolatileBits.isdisjoint(SubReg[1]):
+                    VolatileAdr.add(SubReg[0])
+
+        RegIndex = dict()
+
+        # First level of the dictionary
+        for RegName, reg in RegDict.items():
+
+            # If the register has other sub-registers, bit names are looked up in all of them
+            if isinstance(reg, dict):
+                for SubReg in reg.values():
+                    for BitName, BitRange in SubReg[1].items():
+                        if (RegName, BitName) not in RegIndex:
+                            Width = BitRange[1] - BitRange[0] + 1
+                            RegIndex[(RegName, BitName)] = (SubReg[0], BitRange[0], (1 << Width) - 1, Width,
+                                                            SubReg[0] not in VolatileAdr)
+
+            # Otherwise the register can be accessed as a whole or by bit name
+            else:
+                Cacheable = reg[0] not in VolatileAdr
+                RegIndex[(RegName, None)] = (reg[0], 0, 0xFFFFFFFF, 32, Cacheable)
+                for BitName, BitRange in reg[1].items():
+                    Width = BitRange[1] - BitRange[0] + 1
+                    RegIndex[(RegName, BitName)] = (reg[0], BitRange[0], (1 << Width) - 1, Width, Cacheable)
+
+        # Second level of the dictionary, only whole register access is possible
+        for reg in RegDict.values():
+            if isinstance(reg, dict):
+                for SubRegName, SubReg in reg.items():
+                    if SubRegName not in RegDict and (SubRegName, None) not in RegIndex:
+                        RegIndex[(SubRegName, None)] = (SubReg[0], 0, 0xFFFFFFFF, 32, SubReg[0] not in VolatileAdr)
+
+        return RegIndex
+
     # Get register from the dictionary
     # Returns register address as first element, then high bit range and low bit range as second and third elements,
     # if a bit name was specified. If BitName is empty, only the address is returned
     # If there is an error or nothing is found, -1 is returned
     def GetRegister(self, RegName, BitName):
 
-        # Find register in the first level of RegDict
-        if RegName in self.RegDict:
-
-            # Extract register
-            reg = self.RegDict[RegName]
-
-            # If the register has other sub-registers
-            if isinstance(reg, dict):
-
-                # Cycle through the sub-registers
-                for key in reg.keys():
-
-                    # Extract bit names from the sub-register
-                    SubRegBitNames = reg[key][1]
-
-                    # If the bit name is in the current sub-register
-                    if BitName in SubRegBitNames.keys():
-                        # Extract the sub-register address
-                        RegAdr = reg[key][0]
-
-                        # Extract bit ranges for the selected bit name
-                        BitRange = SubRegBitNames[BitName]
-                        BitRangeH = BitRange[1]
-                        BitRangeL = BitRange[0]
-
-                        # Return address and ranges
-                        return RegAdr, BitRangeH, BitRangeL
-
-            # If the register doesn't have any sub-register
-            else:
-
-                # If the bit name is in the current register
-                if BitName in reg[1]:
-
-                    # Extract the register address
-                    RegAdr = reg[0]
-
-                    # Extract bit ranges for the selected bit name
-                    BitRange = reg[1][BitName]
-                    BitRangeH = BitRange[1]
-                    BitRangeL = BitRange[0]
-
-                    # Return address and ranges
-                    return RegAdr, BitRangeH, BitRangeL
-
-                # If no bit name is specified, the whole register is required
-                elif not BitName:
-                    RegAdr = reg[0]
-                    return RegAdr
-
-                # Otherwise nothing was found or there is something wrong
-                else:
-                    return -1
-
-        # If the register was not found in the first level of the dictionary hierarchy, it could be in the second
-        else:
-
-            # Cycle through the first level registers
-            for key in self.RegDict.keys():
-
-                # Extract sub-register
-                SubRegs = self.RegDict[key]
-
-                # If sub-register is a dictionary itself
-                if isinstance(SubRegs, dict):
+        # Look for the bit field first, then for the whole register
+        if BitName:
+            Field = self.RegIndex.get((RegName, BitName))
+            if Field is not None:
+                RegAdr, Shift, Mask, Width, Cacheable = Field
+                return RegAdr, Shift + Width - 1, Shift
+            # Second-level registers return the address even if a bit name is specified
+            if RegName in self.RegDict:
+                return -1
 
-                    # Check if the required reg is withing this dictionary
-                    if RegName in SubRegs.keys():
-                        # Return the address of this register
-                        return SubRegs[RegName][0]
+        Field = self.RegIndex.get((RegName, None))
+        if Field is not None:
+            return Field[0]
 
         # Otherwise nothing was found anywhere...
         return -1
@@ -101,69 +116,228 @@ class Reg:
     def ReadRegister(self, RegName):
 
         # Get register address
-        RegAdr = self.GetRegister(RegName, None)
-        if RegAdr == -1:
+        Field = self.RegIndex.get((RegName, None))
+        if Field is None:
             # Error
-            return RegAdr
+            return -1
         else:
-            # Read register data
-            Value = self.RegMem.read(RegAdr, 1)
-            return Value[0]
+            # Read register data (from the shadow copy, if cacheable)
+            Value = self.Region.ReadWord(Field[0], Field[4])
+            # Include the updates not committed yet
+            Transaction = self.Region.GetTransaction()
+            if Transaction is not None:
+                Value = Transaction.Overlay(Field[0], Value)
+            return Value
 
     # Write the whole register
     def WriteRegister(self, RegName, Value):
 
         # Get register address
-        RegAdr = self.GetRegister(RegName, None)
-        if RegAdr == -1:
+        Field = self.RegIndex.get((RegName, None))
+        if Field is None:
             # Error
-            return RegAdr
+            return -1
         else:
-            # Write register
-            self.RegMem.write(RegAdr, [Value])
+            # Write register, or add it to the open transaction
+            Transaction = self.Region.GetTransaction()
+            if Transaction is not None:
+                Transaction.Write(Field[0], 0xFFFFFFFF, Value, Field[4])
+            else:
+                self.Region.ModifyWord(Field[0], 0xFFFFFFFF, Value, Field[4])
             return 0
 
     # Read a specific bit (or group of bits) BitName, from a register RegName
     def ReadBits(self, RegName, BitName):
 
         # Get register address and bit range
-        Ret = self.GetRegister(RegName, BitName)
-        if Ret == -1:
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
             # Error
-            return Ret
+            return -1
         else:
-            # Extract address and ranges
-            RegAdr, BitRangeH, BitRangeL = Ret
-            # Read whole address
-            Value = self.RegMem.read(RegAdr, 1)
-            # Mask away undesired bits
-            Value = Value[0] & ((2 ** (BitRangeH - BitRangeL + 1) - 1) << BitRangeL)
-            # Return requested bits
-            return Value >> BitRangeL
+            return self.ReadField(Field)
 
     # Write a specific bit (or group of bits) BitName, from a register RegName
     def WriteBits(self, RegName, BitName, Data):
 
         # Get register address and bit range
-        Ret = self.GetRegister(RegName, BitName)
-        if Ret == -1:
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            # Error
+            return -1
+        else:
+            self.WriteField(Field, Data)
+            return 0
+
+    # Read a bit field given its index entry (see BuildIndex)
+    def ReadField(self, Field):
+
+        # Extract address, shift and mask
+        RegAdr, Shift, Mask, Width, Cacheable = Field
+        # Read whole address (from the shadow copy, if cacheable)
+        Value = self.Region.ReadWord(RegAdr, Cacheable)
+        # Include the updates not committed yet
+        Transaction = self.Region.GetTransaction()
+        if Transaction is not None:
+            Value = Transaction.Overlay(RegAdr, Value)
+        # Return requested bits
+        return (Value >> Shift) & Mask
+
+    # Write a bit field given its index entry (see BuildIndex)
+    def WriteField(self, Field, Data):
+
+        # Extract address, shift and mask
+        RegAdr, Shift, Mask, Width, Cacheable = Field
+        # If a transaction is open, the update is merged with the others and written when it is committed
+        Transaction = self.Region.GetTransaction()
+        if Transaction is not None:
+            Transaction.Write(RegAdr, Mask << Shift, Data << Shift, Cacheable)
+            return
+        # Update the bits in the selected range, holding the lock of the word so that concurrent updates from other
+        # threads are not lost (cacheable registers are taken from the shadow copy, without reading the hardware)
+        self.Region.ModifyWord(RegAdr, Mask << Shift, (Data & Mask) << Shift, Cacheable)
+
+    # Write only the bits of a specific bit field BitName selected by Select (relative to the field), leaving the others
+    # unchanged, with a single atomic update of the register
+    def ModifyBits(self, RegName, BitName, Select, Data):
+
+        # Get register address and bit range
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
             # Error
-            return Ret
+            return -1
         else:
-            # Extract address and ranges
-            RegAdr, BitRangeH, BitRangeL = Ret
-            # Read whole address
-            Value = self.RegMem.read(RegAdr, 1)
-            # Create masks with selected bits
-            Mask = (2 ** (BitRangeH - BitRangeL + 1) - 1)
-            # Clear all the bits in the selected range
-            Value = Value[0] & ~(Mask << BitRangeL)
-            # Update register with new data
-            Value = Value | ((Data & Mask) << BitRangeL)
-            # Write to memory
-            self.RegMem.write(RegAdr, [Value])
+            self.ModifyField(Field, Select, Data)
             return 0
 
+    # Write the bits of a bit field selected by Select, given its index entry (see BuildIndex)
+    def ModifyField(self, Field, Select, Data):
+
+        # Extract address, shift and mask, restricted to the selected bits
+        RegAdr, Shift, Mask, Width, Cacheable = Field
+        Mask &= Select
+        Transaction = self.Region.GetTransaction()
+        if Transaction is not None:
+            Transaction.Write(RegAdr, Mask << Shift, Data << Shift, Cacheable)
+            return
+        self.Region.ModifyWord(RegAdr, Mask << Shift, (Data & Mask) << Shift, Cacheable)
+
+    # Get the index entry of a bit field (see BuildIndex), raises an exception if it is not in the register map
+    def GetField(self, RegName, BitName):
+
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            raise Exception("Register not found - RegName: {}, BitName: {}".format(RegName, BitName))
+        return Field
+
+    # Get the typed accessor of a first-level register, with one attribute per bit field (see RegBank)
+    #     Reg.GetBank("BiDAQ_packetizer_0").FIFO_FILL_LEVEL[Ch]
+    def GetBank(self, RegName):
+
+        Bank = self.Banks.get(RegName)
+        if Bank is None:
+            if RegName not in self.RegDict:
+                raise Exception("Register not found - RegName: {}".format(RegName))
+            Bank = RegBank.RegBank.Create(self, RegName)
+            self.Banks[RegName] = Bank
+        return Bank
+
+    # Drop the shadow copy of the cacheable registers, so that they are read again from the hardware. To be used if
+    # something else (e.g. another process or a FPGA reconfiguration) may have changed them
+    def InvalidateShadow(self):
+        self.Region.InvalidateShadow()
+
+    # Read again from the hardware all the registers in the shadow copy
+    def ResyncShadow(self):
+        self.Region.ResyncShadow()
+
+    # Start recording the statistics of all the accesses to the memory region (from any Reg class sharing it)
+    def StartTrace(self):
+        self.Region.StartTrace()
+
+    # Stop recording the access statistics
+    def StopTrace(self):
+        self.Region.StopTrace()
+
+    # Get the access statistics of the last trace, as a list of dictionaries (see RegTrace.GetStats)
+    def GetTraceStats(self):
+        if self.Region.Trace is None:
+            return []
+        return self.Region.Trace.GetStats(RegTrace.RegTrace.GetRegNames(self.RegDict))
+
+    # Get a text report of the last trace, with the Top registers by total access time
+    def GetTraceReport(self, Top=30):
+        if self.Region.Trace is None:
+            return ""
+        return self.Region.Trace.Report(RegTrace.RegTrace.GetRegNames(self.RegDict), Top)
+
+    # Wait until Predicate, called with the values of the bit fields in Fields (list of (RegName, BitName)), returns
+    # True. The fields are read again at each poll, with an adaptive sleep in between (see RegWait.WaitFor). Returns
+    # the number of polls, raises TimeoutError after Timeout seconds
+    #     Reg.WaitFor([("sc_fifo_data", "fill_level")], lambda Fill: Fill == 0, 1.0)
+    def WaitFor(self, Fields, Predicate, Timeout, ExpectedPeriod=None):
+
+        IndexFields = [self.GetField(RegName, BitName) for RegName, BitName in Fields]
+
+        ReadField = self.ReadField
+        return RegWait.RegWait.WaitFor(lambda: Predicate(*[ReadField(Field) for Field in IndexFields]), Timeout,
+                                       ExpectedPeriod)
+
+    # Open a transaction: inside the with block, all the register writes on this memory region (from any Reg class
+    # sharing it) are collected and merged per word, then committed with one read and one write per touched word
+    #     with Reg.Transaction():
+    #         Reg.WriteBits(...)
+    def Transaction(self):
+        return RegTransaction.RegTransaction(self.Region)
+
+    # Read Length consecutive registers with a single copy, starting from the one containing BitName (or from RegName
+    # if BitName is None). Returns a list of words, or -1 if the register is not found
+    def ReadBlock(self, RegName, BitName, Length):
+
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            # Error
+            return -1
+        else:
+            return self.Region.ReadBlock(Field[0], Length)
+
+    # Same as ReadBlock, but returns a NumPy uint32 array (a copy, so that it is a consistent snapshot)
+    def ReadBlockArray(self, RegName, BitName, Length):
+
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            # Error
+            return -1
+        else:
+            return self.Region.ReadBlockArray(Field[0], Length)
+
+    # Same as ReadBlock, from the counter snapshot published by the broker if the region is accessed through one (see
+    # RegRegion.ReadSnapshot). Only for volatile registers (counters, fill levels), which may be a few ms old
+    def ReadSnapshotBlock(self, RegName, BitName, Length):
+
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            # Error
+            return -1
+        else:
+            return self.Region.ReadSnapshot(Field[0], Length)
+
+    # Same as ReadSnapshotBlock, but returns a NumPy uint32 array
+    def ReadSnapshotBlockArray(self, RegName, BitName, Length):
+
+        Field = self.RegIndex.get((RegName, BitName))
+        if Field is None:
+            # Error
+            return -1
+        else:
+            return self.Region.ReadSnapshotArray(Field[0], Length)
+
+    # Read a volatile bit field given its index entry, from the counter snapshot of the broker if there is one
+    def ReadSnapshotField(self, Field):
+
+        RegAdr, Shift, Mask, Width, Cacheable = Field
+        return (self.Region.ReadSnapshot(RegAdr, 1)[0] >> Shift) & Mask
+
     # Dump FPGA registers
     def DumpRegisterList(self, RegList):
 
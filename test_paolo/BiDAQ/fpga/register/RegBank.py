@@ -0,0 +1,56 @@
+#!/usr/bin/python
+
+import re
+
+from . import RegField
+
+
+############################################################
+# Typed accessor of a register, one attribute per bit field #
+############################################################
+class RegBank:
+
+    __slots__ = ('Reg',)
+
+    # Create the accessor of the first-level register RegName of the Reg class. A class is generated with one RegField
+    # attribute for each bit field, so that each access goes straight to the precomputed address, shift and mask:
+    #     Bank.EN = 1
+    #     Level = Bank.FIFO_FILL_LEVEL_3
+    # Bit fields numbered from 0 (e.g. FIFO_FILL_LEVEL_0 ... FIFO_FILL_LEVEL_11) are also grouped in a RegFieldArray
+    # named without the number:
+    #     Level = Bank.FIFO_FILL_LEVEL[3]
+    @classmethod
+    def Create(cls, Reg, RegName):
+
+        reg = Reg.RegDict[RegName]
+        SubRegs = reg.values() if isinstance(reg, dict) else (reg,)
+
+        # Bit fields, with the same resolution order of Reg.BuildIndex
+        Fields = dict()
+        for SubReg in SubRegs:
+            for BitName in SubReg[1]:
+                if BitName.isidentifier() and BitName not in Fields:
+                    Fields[BitName] = Reg.RegIndex[(RegName, BitName)]
+
+        # Group the numbered bit fields, {Name: {Number: Field}}
+        Groups = dict()
+        for BitName, Field in Fields.items():
+            Match = re.fullmatch(r'(\w+?)_?(\d+)', BitName)
+            if Match is not None and Match.group(1) not in Fields:
+                Groups.setdefault(Match.group(1), dict())[int(Match.group(2))] = Field
+
+        # Only groups numbered without gaps from 0 become arrays
+        Arrays = dict()
+        for Name, Group in Groups.items():
+            if sorted(Group) == list(range(len(Group))):
+                Arrays[Name] = [Group[i] for i in range(len(Group))]
+
+        Attributes = {BitName: RegField.RegField(Field) for BitName, Field in Fields.items()}
+        Attributes['__slots__'] = tuple(Arrays)
+        Bank = type(RegName, (cls,), Attributes)()
+
+        Bank.Reg = Reg
+        for Name, ArrayFields in Arrays.items():
+            setattr(Bank, Name, RegField.RegFieldArray(Reg, ArrayFields))
+
+        return Bank
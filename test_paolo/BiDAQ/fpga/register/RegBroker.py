@@ -0,0 +1,249 @@
+#!/usr/bin/python
+
+import logging
+import marshal
+import mmap
+import optparse
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+from . import FpgaRegDict
+from . import RegMapCache
+from . import RegRegion
+
+log = logging.getLogger('BiDAQ.RegBroker')
+
+
+############################################################
+# Process owning the FPGA registers, serving other clients #
+############################################################
+class RegBroker:
+
+    # Default paths of the request socket and of the counter snapshot
+    SocketPath = '/run/bidaq/regbroker.sock'
+    SnapshotPath = '/dev/shm/bidaq_regsnapshot'
+
+    # Snapshot header, at the beginning of the snapshot file: sequence number (odd while the broker is updating the
+    # snapshot), time of the last update in ns (time.time_ns). The copy of the registers starts at SnapshotOffset,
+    # with the same offsets of the register window
+    SnapshotHeader = struct.Struct('<IQ')
+    SnapshotOffset = mmap.PAGESIZE
+
+    # Message framing: length of the marshalled content
+    MessageHeader = struct.Struct('<I')
+
+    # Class constructor. The broker maps the register window (BaseAdr, MemLen as in DevMem), serves the batched
+    # requests of the clients (see RegBrokerClient) on a Unix socket, and copies the volatile registers (counters,
+    # fill levels, ...) in a shared memory file every Period seconds
+    def __init__(self, BaseAdr=0xC0000000, MemLen=0x00040000, SocketPath=None, SnapshotPath=None, Period=0.01):
+
+        self.BaseAdr = BaseAdr
+        self.MemLen = MemLen
+        self.SocketPath = SocketPath if SocketPath is not None else self.SocketPath
+        self.SnapshotPath = SnapshotPath if SnapshotPath is not None else self.SnapshotPath
+        self.Period = Period
+
+        # The broker always maps the memory directly (even if BIDAQ_BROKER is set in its environment)
+        RegRegion.RegRegion.SetBroker(None, BaseAdr)
+        self.Region = RegRegion.RegRegion.Get(BaseAdr, MemLen)
+        # All the clients write through the broker, so its shadow copy stays valid
+        self.Region.SetShadowEnable(True)
+
+        # Snapshot content, list of (RegAdr, Length)
+        self.SnapshotRanges = self.GetVolatileRanges()
+
+        self.Sock = None
+        self.Snapshot = None
+        self.StopEvent = threading.Event()
+
+    # Contiguous ranges of volatile registers of the FPGA, for the firmware currently loaded
+    def GetVolatileRanges(self):
+
+        SysId = self.Region.Mem.read_word(FpgaRegDict.FpgaRegDict.FwIdAdr[0])
+        BoardList = tuple(range((SysId >> 8) & 0xF))
+        Gpio = len(BoardList) if (SysId & 0xFF) > 5 else None
+        RegDict, RegIndex = RegMapCache.RegMapCache.Get(FpgaRegDict.FpgaRegDict(), (BoardList, Gpio))
+
+        Ranges = list()
+        for RegAdr in sorted({Field[0] for Field in RegIndex.values() if not Field[4]}):
+            if Ranges and Ranges[-1][0] + 4 * Ranges[-1][1] == RegAdr:
+                Ranges[-1][1] += 1
+            else:
+                Ranges.append([RegAdr, 1])
+        return [tuple(Range) for Range in Ranges]
+
+    # Send a message (any object supported by marshal) on a stream socket
+    @classmethod
+    def SendMessage(cls, Sock, Message):
+        Data = marshal.dumps(Message)
+        Sock.sendall(cls.MessageHeader.pack(len(Data)) + Data)
+
+    # Receive a message from a stream socket, None if the connection has been closed
+    @classmethod
+    def RecvMessage(cls, Sock):
+
+        Data = b''
+        Length = None
+        while True:
+            Needed = cls.MessageHeader.size if Length is None else Length
+            while len(Data) < Needed:
+                Chunk = Sock.recv(Needed - len(Data))
+                if not Chunk:
+                    return None
+                Data += Chunk
+            if Length is not None:
+                return marshal.loads(Data)
+            Length = cls.MessageHeader.unpack_from(Data)[0]
+            Data = Data[cls.MessageHeader.size:]
+
+    # Execute a batch of requests, returns the list of results. Requests are tuples:
+    #     ("r", RegAdr, Cacheable)                 read a word
+    #     ("m", RegAdr, Mask, Value, Cacheable)    read-modify-write a word (see RegRegion.ModifyWord)
+    #     ("b", RegAdr, Length)                    read a block of words
+    #     ("i",)                                   invalidate the shadow copy
+    def Execute(self, Requests):
+
+        Region = self.Region
+        Results = list()
+        for Request in Requests:
+            Op = Request[0]
+            if Op == "r":
+                Results.append(Region.ReadWord(Request[1], Request[2]))
+            elif Op == "m":
+                Region.ModifyWord(Request[1], Request[2], Request[3], Request[4])
+                Results.append(None)
+            elif Op == "b":
+                Results.append(Region.ReadBlock(Request[1], Request[2]))
+            elif Op == "i":
+                Region.InvalidateShadow()
+                Results.append(None)
+            else:
+                raise Exception("Unknown request: {}".format(Op))
+        return Results
+
+    # Serve a client until it disconnects. The first message is the window the client wants to access
+    def HandleClient(self, Conn):
+
+        with Conn:
+            Window = self.RecvMessage(Conn)
+            if Window != (self.BaseAdr, self.MemLen):
+                self.SendMessage(Conn, ("error", "Broker serves window {}".format((self.BaseAdr, self.MemLen))))
+                return
+            self.SendMessage(Conn, ("ok", self.SnapshotPath))
+
+            while True:
+                Requests = self.RecvMessage(Conn)
+                if Requests is None:
+                    return
+                try:
+                    Reply = ("ok", self.Execute(Requests))
+                except Exception as Err:
+                    Reply = ("error", str(Err))
+                self.SendMessage(Conn, Reply)
+
+    # Open the snapshot file, sized to hold the whole register window
+    def OpenSnapshot(self):
+
+        Length = self.SnapshotOffset + 4 * self.MemLen
+        f = os.open(self.SnapshotPath, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            os.ftruncate(f, Length)
+            self.Snapshot = mmap.mmap(f, Length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(f)
+
+    # Copy the volatile registers to the snapshot. The sequence number is odd during the copy, so that the clients can
+    # detect a torn read and retry
+    def UpdateSnapshot(self):
+
+        Words = memoryview(self.Snapshot).cast('I')
+        Sequence = self.SnapshotHeader.unpack_from(self.Snapshot)[0]
+        self.SnapshotHeader.pack_into(self.Snapshot, 0, (Sequence + 1) & 0xFFFFFFFF, time.time_ns())
+        Start = self.SnapshotOffset // 4
+        for RegAdr, Length in self.SnapshotRanges:
+            Words[Start + RegAdr // 4:Start + RegAdr // 4 + Length] = self.Region.Mem.view(RegAdr, Length)
+        self.SnapshotHeader.pack_into(self.Snapshot, 0, (Sequence + 2) & 0xFFFFFFFF, time.time_ns())
+        Words.release()
+
+    def RunSnapshot(self):
+        while not self.StopEvent.wait(self.Period):
+            self.UpdateSnapshot()
+
+    # Serve the clients, until Stop is called
+    def Run(self):
+
+        self.OpenSnapshot()
+        self.UpdateSnapshot()
+        threading.Thread(target=self.RunSnapshot, name="RegBrokerSnapshot", daemon=True).start()
+
+        # Only the owner of the broker (root, as it maps /dev/mem) can connect
+        os.makedirs(os.path.dirname(self.SocketPath), mode=0o700, exist_ok=True)
+        if os.path.exists(self.SocketPath):
+            os.unlink(self.SocketPath)
+        self.Sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.Sock.bind(self.SocketPath)
+        os.chmod(self.SocketPath, 0o600)
+        self.Sock.listen()
+        log.info("Register broker listening on {}".format(self.SocketPath))
+
+        try:
+            while not self.StopEvent.is_set():
+                try:
+                    Conn, _ = self.Sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self.HandleClient, args=(Conn,), name="RegBrokerClient", daemon=True).start()
+        finally:
+            self.Stop()
+
+    def Stop(self):
+
+        self.StopEvent.set()
+        if self.Sock is not None:
+            # Wake up the accept() in Run
+            try:
+                self.Sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.Sock.close()
+            self.Sock = None
+            if os.path.exists(self.SocketPath):
+                os.unlink(self.SocketPath)
+
+
+def main():
+    Parser = optparse.OptionParser()
+
+    Parser.set_usage("python -m fpga.register.RegBroker [options]")
+
+    Parser.add_option("-s", "--socket", dest="SocketPath", type="string", default=RegBroker.SocketPath,
+                      help="path of the request socket", metavar="PATH")
+
+    Parser.add_option("-n", "--snapshot", dest="SnapshotPath", type="string", default=RegBroker.SnapshotPath,
+                      help="path of the counter snapshot", metavar="PATH")
+
+    Parser.add_option("-p", "--period", dest="Period", type=float, default=0.01,
+                      help="snapshot update period in seconds", metavar="SECONDS")
+
+    Parser.add_option("-v", action="store_true", dest="Verbose",
+                      help="provide more information regarding operation")
+
+    (Options, Args) = Parser.parse_args()
+
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if Options.Verbose else logging.WARNING)
+
+    Broker = RegBroker(SocketPath=Options.SocketPath, SnapshotPath=Options.SnapshotPath, Period=Options.Period)
+    try:
+        Broker.Run()
+    except KeyboardInterrupt:
+        Broker.Stop()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
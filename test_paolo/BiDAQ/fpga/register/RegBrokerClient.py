@@ -0,0 +1,126 @@
+#!/usr/bin/python
+
+import array
+import mmap
+import socket
+import threading
+import time
+
+from . import RegBroker
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+############################################################
+# Access to the registers through a RegBroker process      #
+############################################################
+class RegBrokerClient:
+
+    # Attempts to copy the snapshot while the broker is updating it, and sleep between two attempts in seconds. After
+    # the last attempt the registers are read through the broker
+    SnapshotRetries = 20
+    SnapshotRetrySleep = 0.0001
+
+    # Class constructor, connects to the broker serving the register window (BaseAdr, MemLen as in DevMem)
+    def __init__(self, SocketPath, BaseAdr, MemLen):
+
+        self.SocketPath = SocketPath
+        self.Lock = threading.Lock()
+
+        self.Sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.Sock.connect(SocketPath)
+        self.SnapshotPath = self.Request((BaseAdr, MemLen))
+
+        # Read-only mapping of the counter snapshot refreshed by the broker
+        with open(self.SnapshotPath, 'rb') as File:
+            self.Snapshot = mmap.mmap(File.fileno(), 0, mmap.MAP_SHARED, mmap.PROT_READ)
+
+    def __del__(self):
+        self.Close()
+
+    def Close(self):
+        Sock = getattr(self, 'Sock', None)
+        if Sock is not None:
+            self.Sock = None
+            Sock.close()
+
+    # Send a message to the broker and wait for the reply
+    def Request(self, Message):
+
+        with self.Lock:
+            RegBroker.RegBroker.SendMessage(self.Sock, Message)
+            Reply = RegBroker.RegBroker.RecvMessage(self.Sock)
+        if Reply is None:
+            raise Exception("Register broker {} closed the connection".format(self.SocketPath))
+        if Reply[0] != "ok":
+            raise Exception("Register broker error: {}".format(Reply[1]))
+        return Reply[1]
+
+    # Execute a batch of requests in the broker (see RegBroker.Execute), with a single round trip
+    def Execute(self, Requests):
+        return self.Request(list(Requests))
+
+    def ReadWord(self, RegAdr, Cacheable):
+        return self.Request([("r", RegAdr, Cacheable)])[0]
+
+    # Update a list of words, [(RegAdr, Mask, Value, Cacheable)], with a single round trip
+    def ModifyWords(self, Updates):
+        self.Request([("m", RegAdr, Mask, Value, Cacheable) for RegAdr, Mask, Value, Cacheable in Updates])
+
+    def ReadBlock(self, RegAdr, Length):
+        return self.Request([("b", RegAdr, Length)])[0]
+
+    def InvalidateShadow(self):
+        self.Request([("i",)])
+
+    # Read Length words at RegAdr from the last snapshot of the broker (only the volatile registers are in the
+    # snapshot), as an array of unsigned 32-bit words. The copy is retried if the broker was updating the snapshot
+    # meanwhile
+    def CopySnapshot(self, RegAdr, Length):
+
+        Header = RegBroker.RegBroker.SnapshotHeader
+        Start = RegBroker.RegBroker.SnapshotOffset + RegAdr
+        for Attempt in range(self.SnapshotRetries):
+            Sequence = Header.unpack_from(self.Snapshot)[0]
+            if not Sequence & 1:
+                Data = array.array('I', self.Snapshot[Start:Start + 4 * Length])
+                if Header.unpack_from(self.Snapshot)[0] == Sequence:
+                    return Data
+            time.sleep(self.SnapshotRetrySleep)
+        return array.array('I', self.ReadBlock(RegAdr, Length))
+
+    # Same as CopySnapshot, as a list
+    def ReadSnapshot(self, RegAdr, Length):
+        return self.CopySnapshot(RegAdr, Length).tolist()
+
+    # Same as CopySnapshot, as a NumPy uint32 array
+    def ReadSnapshotArray(self, RegAdr, Length):
+        if numpy is None:
+            raise ImportError("NumPy is required by RegBrokerClient.ReadSnapshotArray")
+        return numpy.frombuffer(self.CopySnapshot(RegAdr, Length), dtype=numpy.uint32)
+
+    # Time of the last snapshot update, in ns (time.time_ns)
+    def GetSnapshotTime(self):
+        return RegBroker.RegBroker.SnapshotHeader.unpack_from(self.Snapshot)[1]
+
+    # DevMem interface, so that the client can replace DevMem in RegRegion
+
+    def close(self):
+        self.Close()
+
+    def read_word(self, offset):
+        return self.ReadWord(offset, False)
+
+    def write_word(self, offset, value):
+        self.ModifyWords([(offset, 0xFFFFFFFF, value, False)])
+
+    def view(self, offset, length):
+        return memoryview(array.array('I', self.ReadBlock(offset, length)))
+
+    def read_array(self, offset, length):
+        if numpy is None:
+            raise ImportError("NumPy is required by DevMem.read_array")
+        return numpy.array(self.ReadBlock(offset, length), dtype=numpy.uint32)
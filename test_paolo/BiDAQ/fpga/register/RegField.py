@@ -0,0 +1,45 @@
+#!/usr/bin/python
+
+
+############################################################
+# Typed accessor of a register bit field                   #
+############################################################
+class RegField:
+
+    # Class constructor, Field is the index entry of the bit field (see Reg.BuildIndex)
+    def __init__(self, Field):
+        self.Field = Field
+
+    # Reading the attribute of the bank reads the bit field
+    def __get__(self, Bank, Owner=None):
+        if Bank is None:
+            return self
+        return Bank.Reg.ReadField(self.Field)
+
+    # Assigning the attribute of the bank writes the bit field
+    def __set__(self, Bank, Data):
+        Bank.Reg.WriteField(self.Field, Data)
+
+
+############################################################
+# Typed accessor of numbered bit fields (e.g. per channel) #
+############################################################
+class RegFieldArray:
+
+    # Class constructor, Fields are the index entries of the bit fields, in order of number
+    def __init__(self, Reg, Fields):
+        self.Reg = Reg
+        self.Fields = Fields
+
+    def __len__(self):
+        return len(self.Fields)
+
+    def __getitem__(self, Index):
+        return self.Reg.ReadField(self.Fields[Index])
+
+    def __setitem__(self, Index, Data):
+        self.Reg.WriteField(self.Fields[Index], Data)
+
+    # Read all the bit fields
+    def ReadAll(self):
+        return [self.Reg.ReadField(Field) for Field in self.Fields]
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import threading
+
+from . import Reg
+
+log = logging.getLogger('BiDAQ.RegMapCache')
+
+
+############################################################
+# Cache of the register maps (dictionary and flat index)   #
+############################################################
+class RegMapCache:
+
+    # Maps built or loaded in this process, {(DictName, Args): (RegDict, RegIndex)}
+    Maps = dict()
+    MapsLock = threading.Lock()
+
+    # Files already loaded in this process
+    LoadedFiles = set()
+
+    # Hashes of the sources computed in this process, {Module name: Hash}
+    SourceHashes = dict()
+
+    # Directory of the on-disk cache (None disables it). It must be writable only by the user running the DAQ
+    CacheDir = '/var/cache/bidaq'
+
+    # Cache file format version
+    FormatVersion = 2
+
+    # Get the register dictionary and its index for the given CreateDict arguments of RegDictClass (an instance of
+    # FpgaRegDict or HpsRegDict). The map is built only once per process, and it is also stored on disk (it depends
+    # only on the arguments and on the sources, see SourceHash), so that the next processes can load it
+    @classmethod
+    def Get(cls, RegDictClass, Args):
+
+        Key = (type(RegDictClass).__name__, Args)
+
+        with cls.MapsLock:
+
+            Map = cls.Maps.get(Key)
+            if Map is not None:
+                return Map
+
+            FileName = None
+            if cls.CacheDir is not None:
+                FileName = os.path.join(cls.CacheDir, '{}.marshal'.format(type(RegDictClass).__name__))
+                if FileName not in cls.LoadedFiles:
+                    cls.LoadedFiles.add(FileName)
+                    cls.Load(RegDictClass, FileName)
+                    Map = cls.Maps.get(Key)
+                    if Map is not None:
+                        return Map
+
+            RegDict = RegDictClass.CreateDict(*Args)
+            Map = (RegDict, Reg.Reg.BuildIndex(RegDict, RegDictClass.VolatileBits))
+            cls.Maps[Key] = Map
+
+            if FileName is not None:
+                cls.Save(RegDictClass, FileName)
+
+        return Map
+
+    # Drop all the maps built in this process
+    @classmethod
+    def Clear(cls):
+        with cls.MapsLock:
+            cls.Maps.clear()
+            cls.LoadedFiles.clear()
+
+    # Hash of the sources the maps depend on, so that the cache is rebuilt when the software is updated. The sources
+    # are read only the first time in each process
+    @classmethod
+    def SourceHash(cls, RegDictClass):
+
+        ModuleName = RegDictClass.__module__
+        Value = cls.SourceHashes.get(ModuleName)
+        if Value is None:
+            Hash = hashlib.sha1()
+            for Module in (sys.modules[ModuleName], Reg):
+                with open(Module.__file__, 'rb') as File:
+                    Hash.update(File.read())
+            Value = Hash.hexdigest()
+            cls.SourceHashes[ModuleName] = Value
+        return Value
+
+    # Load the maps stored in a cache file
+    @classmethod
+    def Load(cls, RegDictClass, FileName):
+
+        try:
+            with open(FileName, 'rb') as File:
+                Content = marshal.loads(File.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+
+        if not isinstance(Content, dict) or Content.get('Version') != cls.FormatVersion or \
+                Content.get('Source') != cls.SourceHash(RegDictClass):
+            log.debug("Discarding stale register map cache {}".format(FileName))
+            return
+
+        for Args, Map in Content['Maps'].items():
+            cls.Maps.setdefault((type(RegDictClass).__name__, Args), Map)
+
+        log.debug("Loaded register map cache {}".format(FileName))
+
+    # Store all the maps built from RegDictClass to a cache file
+    @classmethod
+    def Save(cls, RegDictClass, FileName):
+
+        Maps = {Key[1]: Map for Key, Map in cls.Maps.items() if Key[0] == type(RegDictClass).__name__}
+        Content = {'Version': cls.FormatVersion, 'Source': cls.SourceHash(RegDictClass), 'Maps': Maps}
+
+        try:
+            os.makedirs(os.path.dirname(FileName), mode=0o700, exist_ok=True)
+            TmpFileName = '{}.{}.tmp'.format(FileName, os.getpid())
+            with open(TmpFileName, 'wb') as File:
+                File.write(marshal.dumps(Content))
+            os.replace(TmpFileName, FileName)
+        except (OSError, ValueError) as Err:
+            log.debug("Can't write register map cache {}: {}".format(FileName, Err))
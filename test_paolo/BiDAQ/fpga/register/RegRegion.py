@@ -0,0 +1,354 @@
+#!/usr/bin/python
+
+import atexit
+import os
+import threading
+import time
+
+from . import DevMem
+from . import FpgaSimModel
+from . import LazyDevMem
+from . import RegBrokerClient
+from . import RegTrace
+from . import SimMem
+
+
+############################################################
+# Process-wide registry of the mapped register regions     #
+############################################################
+class RegRegion:
+
+    # Regions currently mapped, indexed by (FileName, BaseAdr, MemLen)
+    Regions = dict()
+    RegionsLock = threading.RLock()
+
+    # Number of locks serializing the read-modify-write of the words, each lock covers the words with the same index
+    # modulo LockStripes
+    LockStripes = 64
+
+    # Simulation models, {BaseAdr: Model class}, or None to map the real memory (see SetSimulation)
+    Simulation = None
+
+    # Sockets of the RegBroker processes owning the regions, {BaseAdr: SocketPath} (see SetBroker)
+    Brokers = dict()
+
+    # Enable the shadow copy of the cacheable registers in the new regions. It is disabled by default: the shadow copy
+    # is valid only if no other process writes the same registers (e.g. a long-lived server and the command line
+    # scripts), set BIDAQ_SHADOW=1 in the environment (or call SetShadowDefault) only if this process is the only
+    # writer
+    ShadowDefault = False
+
+    # Class constructor (use Get() instead, so that each region is mapped only once). If Lazy is True, the pages of the
+    # region are mapped only when first accessed (see LazyDevMem)
+    def __init__(self, BaseAdr, MemLen, FileName='/dev/mem', Lazy=False):
+
+        self.BaseAdr = BaseAdr
+        self.MemLen = MemLen
+        self.FileName = FileName
+
+        # Number of users of this region
+        self.RefCount = 0
+
+        # Map the physical memory, or the simulated one, or connect to the broker owning the region
+        self.Model = None
+        self.Broker = None
+        if BaseAdr in self.Brokers:
+            self.Broker = RegBrokerClient.RegBrokerClient(self.Brokers[BaseAdr], BaseAdr, MemLen)
+            self.Mem = self.Broker
+        elif self.Simulation is None:
+            if Lazy:
+                self.Mem = LazyDevMem.LazyDevMem(BaseAdr, MemLen, FileName)
+            else:
+                self.Mem = DevMem.DevMem(BaseAdr, MemLen, FileName)
+        else:
+            self.Mem = SimMem.SimMem(BaseAdr, MemLen)
+
+        # Per-thread state (e.g. the open transaction)
+        self.Local = threading.local()
+
+        # Write-through shadow copy of the cacheable registers, {RegAdr: Value} (None if disabled, see ShadowDefault).
+        # With a broker, the shadow copy is the one of the broker
+        self.Shadow = dict() if self.ShadowDefault and self.Broker is None else None
+
+        # Locks for the read-modify-write of the words (reads are not locked)
+        self.Locks = [threading.Lock() for i in range(self.LockStripes)]
+
+        # The simulation model updates the words under the same locks as the software
+        if self.Simulation is not None and self.Broker is None:
+            Model = self.Simulation.get(BaseAdr)
+            if Model is not None:
+                self.Model = Model(self.Mem, self.GetLock)
+                self.Model.Start()
+
+        # Access statistics of the last trace (see StartTrace)
+        self.Trace = None
+
+    # Get the shared region for the requested memory window, mapping it only the first time it is requested (Lazy is
+    # used only at that time)
+    @classmethod
+    def Get(cls, BaseAdr, MemLen, FileName='/dev/mem', Lazy=False):
+
+        Key = (FileName, BaseAdr, MemLen)
+        with cls.RegionsLock:
+            Region = cls.Regions.get(Key)
+            if Region is None:
+                Region = cls(BaseAdr, MemLen, FileName, Lazy)
+                cls.Regions[Key] = Region
+            Region.RefCount += 1
+
+        return Region
+
+    # Map all the regions on simulated memory instead of /dev/mem, so that the software can run without the FPGA.
+    # Models is {BaseAdr: Model class}, by default the FPGA registers are driven by FpgaSimModel and all the others
+    # are plain memory. Each model is built as Model(Mem, GetLock), see GetLock. It must be called before any region
+    # is mapped (or set BIDAQ_SIMULATE=1 in the environment)
+    @classmethod
+    def SetSimulation(cls, Enable=True, Models=None):
+
+        with cls.RegionsLock:
+            if cls.Regions:
+                raise Exception("Simulation must be set before mapping the registers")
+            if not Enable:
+                cls.Simulation = None
+            elif Models is None:
+                cls.Simulation = {0xC0000000: FpgaSimModel.FpgaSimModel}
+            else:
+                cls.Simulation = Models
+
+    # Enable or disable the shadow copy in the regions mapped from now on (see ShadowDefault, and SetShadowEnable for
+    # a region already mapped)
+    @classmethod
+    def SetShadowDefault(cls, Enable):
+        cls.ShadowDefault = Enable
+
+    # Access the regions starting at BaseAdr through the RegBroker process listening on SocketPath, instead of mapping
+    # them in this process. It must be called before the region is mapped (or set BIDAQ_BROKER=SocketPath in the
+    # environment for the FPGA registers)
+    @classmethod
+    def SetBroker(cls, SocketPath, BaseAdr=0xC0000000):
+
+        with cls.RegionsLock:
+            if any(Key[1] == BaseAdr for Key in cls.Regions):
+                raise Exception("Broker must be set before mapping the registers")
+            if SocketPath is None:
+                cls.Brokers.pop(BaseAdr, None)
+            else:
+                cls.Brokers[BaseAdr] = SocketPath
+
+    # Get the transaction open on this region by the current thread (None if there is no open transaction)
+    def GetTransaction(self):
+        return getattr(self.Local, 'Transaction', None)
+
+    # Set the transaction open on this region by the current thread
+    def SetTransaction(self, Transaction):
+        self.Local.Transaction = Transaction
+
+    # Read a word, cacheable registers are read from the hardware only the first time
+    def ReadWord(self, RegAdr, Cacheable):
+
+        Shadow = self.Shadow
+        if Cacheable and Shadow is not None:
+            Value = Shadow.get(RegAdr)
+            if Value is None:
+                Value = self.Mem.read_word(RegAdr)
+                Shadow[RegAdr] = Value
+            return Value
+
+        return self.Mem.read_word(RegAdr)
+
+    # Write a word, cacheable registers are also stored in the shadow copy
+    def WriteWord(self, RegAdr, Value, Cacheable):
+
+        self.Mem.write_word(RegAdr, Value)
+        Shadow = self.Shadow
+        if Cacheable and Shadow is not None:
+            Shadow[RegAdr] = Value
+
+    # Get the lock serializing the updates of a word, to be held by whoever else updates the words directly (e.g. the
+    # simulation model) or when a read-modify-write spans more calls
+    def GetLock(self, RegAdr):
+        return self.Locks[(RegAdr >> 2) % self.LockStripes]
+
+    # Update the bits of a word selected by Mask (Value is already shifted), atomically with respect to the other
+    # threads updating the same word. Words completely overwritten are not read
+    def ModifyWord(self, RegAdr, Mask, Value, Cacheable):
+
+        # The broker serializes the updates of all its clients
+        if self.Broker is not None:
+            self.BrokerModifyWords([(RegAdr, Mask, Value, Cacheable)])
+            return
+
+        with self.Locks[(RegAdr >> 2) % self.LockStripes]:
+            if Mask != 0xFFFFFFFF:
+                Value = (self.ReadWord(RegAdr, Cacheable) & ~Mask) | (Value & Mask)
+            self.WriteWord(RegAdr, Value, Cacheable)
+
+    # Update a list of words, [(RegAdr, Mask, Value, Cacheable)], each one as in ModifyWord. With a broker, all the
+    # updates are sent in a single request
+    def ModifyWords(self, Updates):
+
+        if self.Broker is not None:
+            self.BrokerModifyWords(Updates)
+            return
+
+        for RegAdr, Mask, Value, Cacheable in Updates:
+            self.ModifyWord(RegAdr, Mask, Value, Cacheable)
+
+    # Send a list of word updates to the broker, in a single request
+    def BrokerModifyWords(self, Updates):
+        self.Broker.ModifyWords(Updates)
+
+    # Read Length consecutive words from the counter snapshot of the broker (refreshed periodically, only volatile
+    # registers), as a list. Without a broker the words are read from the memory
+    def ReadSnapshot(self, RegAdr, Length):
+
+        if self.Broker is not None:
+            return self.Broker.ReadSnapshot(RegAdr, Length)
+        return self.ReadBlock(RegAdr, Length)
+
+    # Same as ReadSnapshot, as a NumPy uint32 array
+    def ReadSnapshotArray(self, RegAdr, Length):
+
+        if self.Broker is not None:
+            return self.Broker.ReadSnapshotArray(RegAdr, Length)
+        return self.ReadBlockArray(RegAdr, Length)
+
+    # Read Length consecutive words with a single copy, as a list
+    def ReadBlock(self, RegAdr, Length):
+        return self.Mem.view(RegAdr, Length).tolist()
+
+    # Read Length consecutive words with a single copy, as a NumPy uint32 array
+    def ReadBlockArray(self, RegAdr, Length):
+        return self.Mem.read_array(RegAdr, Length).copy()
+
+    # Start recording the statistics of all the accesses (see RegTrace). The accessors are replaced by the tracing
+    # ones only while the trace is running, so there is no cost when it is not
+    def StartTrace(self):
+
+        self.Trace = RegTrace.RegTrace()
+        self.ReadWord = self.TraceReadWord
+        self.WriteWord = self.TraceWriteWord
+        self.ReadBlock = self.TraceReadBlock
+        self.ReadBlockArray = self.TraceReadBlockArray
+        self.BrokerModifyWords = self.TraceBrokerModifyWords
+
+    # Stop recording, returns the RegTrace with the statistics (also kept in self.Trace)
+    def StopTrace(self):
+
+        for Name in ("ReadWord", "WriteWord", "ReadBlock", "ReadBlockArray", "BrokerModifyWords"):
+            self.__dict__.pop(Name, None)
+        if self.Trace is not None:
+            self.Trace.Stop()
+        return self.Trace
+
+    def GetTraceEnable(self):
+        return "ReadWord" in self.__dict__
+
+    def TraceReadWord(self, RegAdr, Cacheable):
+
+        Shadow = self.Shadow
+        if Cacheable and Shadow is not None and RegAdr in Shadow:
+            Start = time.perf_counter_ns()
+            Value = Shadow[RegAdr]
+            self.Trace.Record(RegAdr, "cached", 4, time.perf_counter_ns() - Start)
+            return Value
+
+        Start = time.perf_counter_ns()
+        Value = RegRegion.ReadWord(self, RegAdr, Cacheable)
+        self.Trace.Record(RegAdr, "read", 4, time.perf_counter_ns() - Start)
+        return Value
+
+    def TraceWriteWord(self, RegAdr, Value, Cacheable):
+
+        Start = time.perf_counter_ns()
+        RegRegion.WriteWord(self, RegAdr, Value, Cacheable)
+        self.Trace.Record(RegAdr, "write", 4, time.perf_counter_ns() - Start)
+
+    # The updates sent to the broker are recorded as writes, the time of the request is split among its words
+    def TraceBrokerModifyWords(self, Updates):
+
+        Start = time.perf_counter_ns()
+        RegRegion.BrokerModifyWords(self, Updates)
+        Ns = (time.perf_counter_ns() - Start) // max(len(Updates), 1)
+        for Update in Updates:
+            self.Trace.Record(Update[0], "write", 4, Ns)
+
+    def TraceReadBlock(self, RegAdr, Length):
+
+        Start = time.perf_counter_ns()
+        Block = RegRegion.ReadBlock(self, RegAdr, Length)
+        self.Trace.Record(RegAdr, "block", 4 * Length, time.perf_counter_ns() - Start)
+        return Block
+
+    def TraceReadBlockArray(self, RegAdr, Length):
+
+        Start = time.perf_counter_ns()
+        Block = RegRegion.ReadBlockArray(self, RegAdr, Length)
+        self.Trace.Record(RegAdr, "block", 4 * Length, time.perf_counter_ns() - Start)
+        return Block
+
+    # Enable or disable the shadow copy of the cacheable registers
+    def SetShadowEnable(self, Enable):
+        if not Enable:
+            self.Shadow = None
+        elif self.Shadow is None:
+            self.Shadow = dict()
+
+    def GetShadowEnable(self):
+        return self.Shadow is not None
+
+    # Drop the shadow copy, all the registers will be read again from the hardware
+    def InvalidateShadow(self):
+        if self.Broker is not None:
+            self.Broker.InvalidateShadow()
+        if self.Shadow is not None:
+            self.Shadow = dict()
+
+    # Read again from the hardware all the registers in the shadow copy
+    def ResyncShadow(self):
+        if self.Broker is not None:
+            self.Broker.InvalidateShadow()
+        Shadow = self.Shadow
+        if Shadow is not None:
+            for RegAdr in Shadow:
+                Shadow[RegAdr] = self.Mem.read_word(RegAdr)
+
+    # Release the region, the mapping is closed when the last user releases it
+    def Release(self):
+
+        with self.RegionsLock:
+            self.RefCount -= 1
+            if self.RefCount <= 0:
+                self.Close()
+
+    # Unmap the region and remove it from the registry
+    def Close(self):
+
+        with self.RegionsLock:
+            Key = (self.FileName, self.BaseAdr, self.MemLen)
+            if self.Regions.get(Key) is self:
+                del self.Regions[Key]
+            self.RefCount = 0
+            if self.Model is not None:
+                self.Model.Stop()
+            self.Mem.close()
+
+    # Unmap all the regions (called automatically at exit)
+    @classmethod
+    def CloseAll(cls):
+
+        with cls.RegionsLock:
+            for Region in list(cls.Regions.values()):
+                Region.Close()
+
+
+atexit.register(RegRegion.CloseAll)
+
+if os.environ.get('BIDAQ_SIMULATE', '0') != '0':
+    RegRegion.SetSimulation()
+
+if os.environ.get('BIDAQ_SHADOW', '0') != '0':
+    RegRegion.SetShadowDefault(True)
+
+if os.environ.get('BIDAQ_BROKER'):
+    RegRegion.SetBroker(os.environ['BIDAQ_BROKER'])
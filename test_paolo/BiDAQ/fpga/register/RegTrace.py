@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+import threading
+import time
+
+
+############################################################
+# Statistics of the register accesses on a memory region   #
+############################################################
+class RegTrace:
+
+    # Number of latency histogram bins, bin i counts the accesses that took from 2**(i-1) to 2**i - 1 ns
+    Bins = 32
+
+    # Access kinds: hardware read, read served by the shadow copy, hardware write, block read
+    Kinds = ("read", "cached", "write", "block")
+
+    # Class constructor
+    def __init__(self):
+
+        # Statistics, {(RegAdr, Kind): [Count, Bytes, TotalNs, MaxNs, Histogram]}
+        self.Stats = dict()
+
+        # The accesses are recorded from any thread using the region
+        self.Lock = threading.Lock()
+
+        # Start of the recording, in seconds since the epoch
+        self.StartTime = time.time()
+        self.StopTime = None
+
+    # Record an access of Bytes bytes, starting at RegAdr and lasting Ns nanoseconds
+    def Record(self, RegAdr, Kind, Bytes, Ns):
+
+        with self.Lock:
+            Stat = self.Stats.get((RegAdr, Kind))
+            if Stat is None:
+                Stat = [0, 0, 0, 0, [0] * self.Bins]
+                self.Stats[(RegAdr, Kind)] = Stat
+            Stat[0] += 1
+            Stat[1] += Bytes
+            Stat[2] += Ns
+            if Ns > Stat[3]:
+                Stat[3] = Ns
+            Stat[4][min(Ns.bit_length(), self.Bins - 1)] += 1
+
+    def Stop(self):
+        self.StopTime = time.time()
+
+    # Map each register address to a readable name, "RegName:BitName,BitName...", given one or more register
+    # dictionaries (the first name found for an address is used)
+    @staticmethod
+    def GetRegNames(*RegDicts):
+
+        RegNames = dict()
+        for RegDict in RegDicts:
+            for RegName, reg in RegDict.items():
+                SubRegs = reg.values() if isinstance(reg, dict) else (reg,)
+                for SubReg in SubRegs:
+                    if SubReg[0] not in RegNames:
+                        RegNames[SubReg[0]] = "{}:{}".format(RegName, ",".join(SubReg[1]))
+        return RegNames
+
+    # Get the statistics as a list of dictionaries, sorted by total access time (slowest first)
+    def GetStats(self, RegNames=None):
+
+        if RegNames is None:
+            RegNames = dict()
+
+        with self.Lock:
+            Stats = [(Key, Stat[:4] + [list(Stat[4])]) for Key, Stat in self.Stats.items()]
+
+        StatList = list()
+        for (RegAdr, Kind), (Count, Bytes, TotalNs, MaxNs, Histogram) in Stats:
+            StatList.append({
+                "Address": RegAdr,
+                "Name": RegNames.get(RegAdr, hex(RegAdr)),
+                "Kind": Kind,
+                "Count": Count,
+                "Bytes": Bytes,
+                "TotalNs": TotalNs,
+                "MeanNs": TotalNs / Count,
+                "MaxNs": MaxNs,
+                "Histogram": Histogram})
+        StatList.sort(key=lambda Stat: Stat["TotalNs"], reverse=True)
+        return StatList
+
+    # Get a text report, with the totals per access kind and the Top registers by total access time
+    def Report(self, RegNames=None, Top=30):
+
+        StatList = self.GetStats(RegNames)
+        Duration = (self.StopTime if self.StopTime is not None else time.time()) - self.StartTime
+
+        Lines = ["Register access trace, {:.3f} s".format(Duration)]
+        for Kind in self.Kinds:
+            KindList = [Stat for Stat in StatList if Stat["Kind"] == Kind]
+            Lines.append("  {:<6}: {:>9} accesses, {:>10} bytes, {:>12.1f} us".format(
+                Kind, sum(Stat["Count"] for Stat in KindList), sum(Stat["Bytes"] for Stat in KindList),
+                sum(Stat["TotalNs"] for Stat in KindList) / 1000))
+
+        Lines.append("")
+        Lines.append("{:>10} {:<6} {:>9} {:>10} {:>10} {:>10}  {}".format(
+            "Address", "Kind", "Count", "Total us", "Mean ns", "Max ns", "Name"))
+        for Stat in StatList[:Top]:
+            Lines.append("{:>10} {:<6} {:>9} {:>10.1f} {:>10.0f} {:>10}  {}".format(
+                hex(Stat["Address"]), Stat["Kind"], Stat["Count"], Stat["TotalNs"] / 1000, Stat["MeanNs"],
+                Stat["MaxNs"], Stat["Name"]))
+
+        return "\n".join(Lines)
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+
+############################################################
+# Class to coalesce register writes on a memory region     #
+############################################################
+class RegTransaction:
+
+    # Class constructor
+    def __init__(self, Region):
+
+        # Shared memory region the transaction writes to
+        self.Region = Region
+
+        # Pending writes, {RegAdr: [Mask, Value, Cacheable]}, in the order the words were first touched
+        self.Pending = dict()
+
+        # Outer transaction, if this one has been opened inside another one
+        self.Outer = None
+
+    def __enter__(self):
+
+        # Nested transactions are merged into the outer one, which is committed when closed
+        self.Outer = self.Region.GetTransaction()
+        if self.Outer is not None:
+            return self.Outer
+
+        self.Region.SetTransaction(self)
+        return self
+
+    def __exit__(self, exc_type=None, exc_value=None, exc_traceback=None):
+
+        if self.Outer is not None:
+            self.Outer = None
+            return
+
+        self.Region.SetTransaction(None)
+
+        # Commit only if the block completed without exceptions
+        if exc_type is None:
+            self.Commit()
+        else:
+            self.Pending.clear()
+
+    # Add a bit field update to the pending writes. Mask and Value are already shifted to the field position
+    def Write(self, RegAdr, Mask, Value, Cacheable=False):
+
+        Word = self.Pending.get(RegAdr)
+        if Word is None:
+            self.Pending[RegAdr] = [Mask, Value & Mask, Cacheable]
+        else:
+            Word[0] |= Mask
+            Word[1] = (Word[1] & ~Mask) | (Value & Mask)
+
+    # Return the value of a register as it will be after the commit, given the current value in memory
+    def Overlay(self, RegAdr, Value):
+
+        Word = self.Pending.get(RegAdr)
+        if Word is None:
+            return Value
+        return (Value & ~Word[0]) | Word[1]
+
+    # Write all the pending updates, with one read and one write per touched word (each one atomic with respect to the
+    # other threads, and all sent in one request if the region is owned by a broker). Words that are completely
+    # overwritten, or that are in the shadow copy, are not read from the hardware
+    def Commit(self):
+
+        self.Region.ModifyWords([(RegAdr, Mask, Value, Cacheable)
+                                 for RegAdr, (Mask, Value, Cacheable) in self.Pending.items()])
+        self.Pending.clear()
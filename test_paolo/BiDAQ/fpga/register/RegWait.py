@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+import logging
+import time
+
+log = logging.getLogger('BiDAQ.RegWait')
+
+
+############################################################
+# Polling of the registers with adaptive backoff           #
+############################################################
+class RegWait:
+
+    # Shortest and longest sleep between two polls, in seconds
+    MinSleep = 50e-6
+    MaxSleep = 0.01
+
+    # Wait until Predicate() returns True, polling it with an increasing sleep in between, so that the CPU is not
+    # pinned while waiting. ExpectedPeriod is the time in seconds after which the condition is expected to change
+    # (e.g. the sample period of the sync generator), if known: the sleep starts from a fraction of it and never exceeds
+    # half of it, so that the change is detected with a bounded delay. Returns the number of polls, raises TimeoutError
+    # if the condition is not met within Timeout seconds (None waits forever)
+    @classmethod
+    def WaitFor(cls, Predicate, Timeout, ExpectedPeriod=None):
+
+        if ExpectedPeriod:
+            Sleep = min(max(ExpectedPeriod / 8, cls.MinSleep), cls.MaxSleep)
+            MaxSleep = max(ExpectedPeriod / 2, Sleep)
+        else:
+            Sleep = cls.MinSleep
+            MaxSleep = cls.MaxSleep
+
+        Start = time.monotonic()
+        Deadline = None if Timeout is None else Start + Timeout
+        Polls = 0
+        while True:
+            Polls += 1
+            if Predicate():
+                log.debug("Condition met after {} polls, {:.6f} s".format(Polls, time.monotonic() - Start))
+                return Polls
+            Now = time.monotonic()
+            if Deadline is not None:
+                if Now >= Deadline:
+                    raise TimeoutError("Condition not met after {} polls, {:.6f} s".format(Polls, Now - Start))
+                time.sleep(min(Sleep, Deadline - Now))
+            else:
+                time.sleep(Sleep)
+            Sleep = min(Sleep * 2, MaxSleep)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+import mmap
+import os
+
+from . import DevMem
+
+""" SimMem
+Same interface of DevMem, but backed by an anonymous mapping (or by a
+regular file, if filename is given) instead of /dev/mem, so that the
+register layer can run without the FPGA. The content of the registers is
+changed only by the software and by a simulation model, if any
+"""
+
+
+class SimMem(DevMem.DevMem):
+
+    def __init__(self, base_addr, length=1, filename=None, debug=0):
+
+        if base_addr < 0 or length < 0:
+            raise AssertionError
+        self._debug = debug
+
+        # Same layout of DevMem, so that offsets are the same
+        self.base_addr = base_addr & ~(mmap.PAGESIZE - 1)
+        self.base_addr_offset = base_addr - self.base_addr
+
+        stop = base_addr + length * self.word
+        if stop % self.mask:
+            stop = (stop + self.word) & ~(self.word - 1)
+
+        self.length = stop - self.base_addr
+        self.fname = filename
+
+        self.debug('init simulated memory with base_addr = {0} and '
+                   'length = {1} on {2}'.format(hex(self.base_addr),
+                                                hex(self.length),
+                                                self.fname))
+
+        if filename is None:
+            # Anonymous mapping, private to this process
+            self.mem = mmap.mmap(-1, self.length)
+        else:
+            # File-backed mapping, can be shared with other processes. The
+            # file holds only the mapped window (it starts at base_addr)
+            f = os.open(filename, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(f).st_size < self.length:
+                    os.ftruncate(f, self.length)
+                self.mem = mmap.mmap(f, self.length, mmap.MAP_SHARED,
+                                     mmap.PROT_READ | mmap.PROT_WRITE)
+            finally:
+                os.close(f)
+
+        self.virt_base_addr = self.base_addr_offset & self.mask
+        self.words = memoryview(self.mem).cast('I')
@@ -0,0 +1,44 @@
+#!/usr/bin/python
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpga.register import FpgaReg
+from fpga.register import RegMapCache
+from fpga.register import RegRegion
+
+
+# Each test maps the registers on a new simulated memory, without the behavioural model (see SimModel), without the
+# shadow copy, without broker and without the on-disk cache of the register maps
+@pytest.fixture(autouse=True)
+def Simulation(monkeypatch):
+
+    RegRegion.RegRegion.CloseAll()
+    monkeypatch.setattr(RegRegion.RegRegion, "Brokers", dict())
+    monkeypatch.setattr(RegRegion.RegRegion, "ShadowDefault", False)
+    monkeypatch.setattr(RegMapCache.RegMapCache, "CacheDir", None)
+    monkeypatch.setattr(RegRegion.RegRegion, "Simulation", {})
+    yield
+    RegRegion.RegRegion.CloseAll()
+
+
+# Same as Simulation, with the FPGA registers driven by FpgaSimModel (8 boards and the GPIO)
+@pytest.fixture
+def SimModel(Simulation):
+    RegRegion.RegRegion.SetSimulation()
+
+
+# Same as Simulation, with the shadow copy of the cacheable registers enabled
+@pytest.fixture
+def Shadow(Simulation):
+    RegRegion.RegRegion.SetShadowDefault(True)
+
+
+# Register access class of the FPGA, 8 boards and the GPIO
+@pytest.fixture
+def Reg():
+    return FpgaReg.FpgaReg(list(range(8)), 8).FpgaMem
@@ -0,0 +1,68 @@
+#!/usr/bin/python
+
+import numpy
+
+from fpga import CounterSampler
+from fpga.register import RegWait
+
+
+# Sampler of two counters, returning the given raw values at each sample
+def GetSampler(Values, History=3600):
+    Samples = iter(Values)
+    return CounterSampler.CounterSampler(lambda: numpy.array(next(Samples), dtype=numpy.uint32), 2, History=History)
+
+
+def testWrap():
+
+    Sampler = GetSampler([(0xFFFFFF00, 10), (0x100, 20), (0x300, 20)])
+    for i in range(3):
+        Sampler.Sample()
+    assert Sampler.GetTotal().tolist() == [0x100000300, 20]
+
+
+def testWindow():
+
+    Sampler = GetSampler([(0, 0), (5, 1), (12, 2)])
+    Sampler.Sample()
+    assert Sampler.GetWindow() is None
+    Sampler.Sample()
+    Sampler.Sample()
+
+    First, Last = Sampler.GetWindow()
+    assert (Last[2] - First[2]).tolist() == [7, 1]
+    First, Last = Sampler.GetWindow(Window=1e9)
+    assert (Last[2] - First[2]).tolist() == [12, 2]
+
+
+def testRebase():
+
+    # After a reset of the counters the drop is not taken as a wrap
+    Sampler = GetSampler([(1000, 1000), (0, 0), (3, 4)])
+    Sampler.Sample()
+    Sampler.Rebase()
+    Sampler.Sample()
+    assert Sampler.GetTotal().tolist() == [3, 4]
+    assert len(Sampler.GetHistory()[0]) == 2
+
+
+def testHistory():
+
+    Sampler = GetSampler([(i, i) for i in range(5)], History=3)
+    Times, Totals = Sampler.GetHistory()
+    assert Totals.shape == (0, 2)
+    for i in range(5):
+        Sampler.Sample()
+    Times, Totals = Sampler.GetHistory()
+    assert Totals[:, 0].tolist() == [2, 3, 4]
+    assert list(Times) == sorted(Times)
+
+
+def testThread():
+
+    Sampler = CounterSampler.CounterSampler(lambda: numpy.zeros(2, dtype=numpy.uint32), 2, Period=0.005)
+    Sampler.Start()
+    try:
+        RegWait.RegWait.WaitFor(lambda: Sampler.GetWindow() is not None, 1.0)
+    finally:
+        Sampler.Stop()
+    assert Sampler.Thread is None
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+
+import os
+
+import pytest
+
+from fpga.register import FpgaRegDict
+from fpga.register import RegMapCache
+
+Args = ((0, 1), None)
+
+
+# Register dictionary class counting the maps it builds
+class CountingRegDict(FpgaRegDict.FpgaRegDict):
+
+    Builds = 0
+
+    @staticmethod
+    def CreateDict(*Args):
+        CountingRegDict.Builds += 1
+        return FpgaRegDict.FpgaRegDict.CreateDict(*Args)
+
+
+@pytest.fixture
+def Cache(monkeypatch, tmp_path):
+
+    monkeypatch.setattr(RegMapCache.RegMapCache, "CacheDir", str(tmp_path))
+    monkeypatch.setattr(RegMapCache.RegMapCache, "Maps", dict())
+    monkeypatch.setattr(RegMapCache.RegMapCache, "LoadedFiles", set())
+    monkeypatch.setattr(RegMapCache.RegMapCache, "SourceHashes", dict())
+    CountingRegDict.Builds = 0
+    return RegMapCache.RegMapCache
+
+
+def testBuiltOncePerProcess(Cache):
+
+    First = Cache.Get(CountingRegDict(), Args)
+    assert Cache.Get(CountingRegDict(), Args) is First
+    assert CountingRegDict.Builds == 1
+
+
+def testLoadedFromDisk(Cache, tmp_path):
+
+    RegDict, RegIndex = Cache.Get(CountingRegDict(), Args)
+    assert os.listdir(str(tmp_path)) == ["CountingRegDict.marshal"]
+
+    # A new process only loads the file
+    Cache.Maps.clear()
+    Cache.LoadedFiles.clear()
+    Cache.SourceHashes.clear()
+    assert Cache.Get(CountingRegDict(), Args) == (RegDict, RegIndex)
+    assert CountingRegDict.Builds == 1
+
+
+def testStaleSourceRebuilds(Cache):
+
+    Cache.Get(CountingRegDict(), Args)
+
+    # Same file, written by a different version of the software
+    Cache.Maps.clear()
+    Cache.LoadedFiles.clear()
+    Cache.SourceHashes[CountingRegDict.__module__] = "0"
+    Cache.Get(CountingRegDict(), Args)
+    assert CountingRegDict.Builds == 2
+
+
+def testSourceHashedOnce(Cache):
+
+    Hash = Cache.SourceHash(CountingRegDict())
+    assert Cache.SourceHashes == {CountingRegDict.__module__: Hash}
+    Cache.SourceHashes[CountingRegDict.__module__] = "0"
+    assert Cache.SourceHash(CountingRegDict()) == "0"
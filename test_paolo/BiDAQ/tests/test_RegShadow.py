@@ -0,0 +1,41 @@
+#!/usr/bin/python
+
+
+# Change a register behind the back of the register layer, as another process or the FPGA would
+def WriteMemory(Reg, RegName, BitName, Data):
+    RegAdr, Shift, Mask, Width, Cacheable = Reg.RegIndex[(RegName, BitName)]
+    Reg.Region.Mem.write_word(RegAdr, (Data & Mask) << Shift)
+
+
+def testShadowDisabledByDefault(Reg):
+
+    assert not Reg.Region.GetShadowEnable()
+    Reg.WriteBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER", 1)
+    WriteMemory(Reg, "BiDAQ_packetizer_0", "PAYLOAD_HEADER", 2)
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 2
+
+
+def testCacheableReadFromShadow(Shadow, Reg):
+
+    Reg.WriteBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER", 1)
+    WriteMemory(Reg, "BiDAQ_packetizer_0", "PAYLOAD_HEADER", 2)
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 1
+
+    Reg.InvalidateShadow()
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 2
+
+
+def testVolatileReadFromMemory(Shadow, Reg):
+
+    assert not Reg.RegIndex[("BiDAQ_packetizer_0", "PKT_CNT")][4]
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PKT_CNT") == 0
+    WriteMemory(Reg, "BiDAQ_packetizer_0", "PKT_CNT", 5)
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PKT_CNT") == 5
+
+
+def testResyncShadow(Shadow, Reg):
+
+    Reg.WriteBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER", 1)
+    WriteMemory(Reg, "BiDAQ_packetizer_0", "PAYLOAD_HEADER", 3)
+    Reg.ResyncShadow()
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 3
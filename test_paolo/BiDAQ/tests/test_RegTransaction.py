@@ -0,0 +1,61 @@
+#!/usr/bin/python
+
+import pytest
+
+
+# Number of hardware writes of each address in the trace of Reg
+def GetWrites(Reg):
+    return {Stat["Address"]: Stat["Count"] for Stat in Reg.GetTraceStats() if Stat["Kind"] == "write"}
+
+
+def testCommitWritesEachWordOnce(Reg):
+
+    Reg.StartTrace()
+    with Reg.Transaction():
+        Reg.WriteBits("BiDAQ_packetizer_0", "EN", 1)
+        Reg.WriteBits("BiDAQ_packetizer_0", "DROP_TIMESTAMP", 1)
+        Reg.WriteBits("BiDAQ_packetizer_0", "RTP_PAYLOAD_TYPE", 33)
+        Reg.WriteBits("BiDAQ_packetizer_1", "EN", 1)
+        assert GetWrites(Reg) == {}
+    Reg.StopTrace()
+
+    assert sorted(GetWrites(Reg).values()) == [1, 1]
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "EN") == 1
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "DROP_TIMESTAMP") == 1
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "RTP_PAYLOAD_TYPE") == 33
+    assert Reg.ReadBits("BiDAQ_packetizer_1", "EN") == 1
+
+
+def testReadsSeePendingWrites(Reg):
+
+    RegAdr = Reg.RegIndex[("BiDAQ_packetizer_0", "PAYLOAD_HEADER")][0]
+    with Reg.Transaction():
+        Reg.WriteBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER", 0x1234)
+        assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 0x1234
+        assert Reg.Region.Mem.read_word(RegAdr) == 0
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "PAYLOAD_HEADER") == 0x1234
+
+
+def testExceptionDiscardsWrites(Reg):
+
+    with pytest.raises(RuntimeError):
+        with Reg.Transaction():
+            Reg.WriteBits("BiDAQ_packetizer_0", "EN", 1)
+            raise RuntimeError
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "EN") == 0
+    assert Reg.Region.GetTransaction() is None
+
+
+def testNestedTransactionsCommitOnce(Reg):
+
+    Reg.StartTrace()
+    with Reg.Transaction():
+        with Reg.Transaction():
+            Reg.WriteBits("BiDAQ_packetizer_0", "EN", 1)
+        assert GetWrites(Reg) == {}
+        Reg.WriteBits("BiDAQ_packetizer_0", "DROP_ON_ERROR", 1)
+    Reg.StopTrace()
+
+    assert list(GetWrites(Reg).values()) == [1]
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "EN") == 1
+    assert Reg.ReadBits("BiDAQ_packetizer_0", "DROP_ON_ERROR") == 1
@@ -0,0 +1,42 @@
+#!/usr/bin/python
+
+import threading
+import time
+
+import pytest
+
+from fpga.register import RegWait
+
+
+def testConditionMet(Reg):
+
+    Timer = threading.Timer(0.02, Reg.WriteBits, ("BiDAQ_packetizer_0", "PKT_CNT", 7))
+    Timer.start()
+    try:
+        Polls = Reg.WaitFor([("BiDAQ_packetizer_0", "PKT_CNT")], lambda Count: Count == 7, 1.0)
+    finally:
+        Timer.join()
+    assert Polls > 1
+
+
+def testTimeout():
+
+    Start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        RegWait.RegWait.WaitFor(lambda: False, 0.02)
+    assert time.monotonic() - Start < 0.5
+
+
+def testSleepBoundedByExpectedPeriod(monkeypatch):
+
+    Sleeps = list()
+    monkeypatch.setattr(time, "sleep", Sleeps.append)
+    with pytest.raises(TimeoutError):
+        RegWait.RegWait.WaitFor(lambda: False, 0.01, ExpectedPeriod=0.002)
+    assert Sleeps and max(Sleeps) <= 0.001
+
+
+def testRegisterNotFound(Reg):
+
+    with pytest.raises(Exception, match="Register not found"):
+        Reg.WaitFor([("BiDAQ_packetizer_0", "NOPE")], lambda Value: True, 1.0)
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+
+import types
+
+import pytest
+
+from fpga import FwCapabilities
+from fpga import StartSequencer
+from fpga.block import BoardControl
+from fpga.block import ClockRefGenerator
+from fpga.block import GeneralEnable
+from fpga.block import SyncGenerator
+from fpga.block import SysId
+
+
+# The blocks of BiDAQFPGA used by the sequencer, on the simulated FPGA (8 boards and the GPIO)
+@pytest.fixture
+def FPGA(SimModel):
+
+    FwCaps = FwCapabilities.FwCapabilities(SysId.SysId())
+    BoardList = list(range(FwCaps.BoardNumber))
+    FPGA = types.SimpleNamespace(FwCaps=FwCaps, BoardList=BoardList, Gpio=FwCaps.BoardNumber,
+                                 BoardControl=BoardControl.BoardControl(BoardList),
+                                 SyncGenerator=SyncGenerator.SyncGenerator(BoardList, FwCaps.BoardNumber),
+                                 GeneralEnable=GeneralEnable.GeneralEnable(),
+                                 ClockRefGenerator=ClockRefGenerator.ClockRefGenerator())
+    FPGA.SyncGenerator.SetDivider(500)
+    return FPGA
+
+
+@pytest.fixture
+def Sequencer(FPGA):
+    return StartSequencer.StartSequencer(FPGA, FPGA.BoardList, FPGA.BoardList + [FPGA.Gpio])
+
+
+def testStages(FPGA, Sequencer):
+
+    Sync = Sequencer.SyncBoardList
+
+    Sequencer.EnableReadout()
+    assert [FPGA.BoardControl.GetEnable(Brd) for Brd in FPGA.BoardList] == [1] * 8
+    assert [FPGA.BoardControl.GetADCMode(Brd) for Brd in FPGA.BoardList] == [1] * 8
+    assert not any(FPGA.SyncGenerator.GetEnable(Brd) for Brd in Sync)
+
+    Sequencer.Arm()
+    assert FPGA.GeneralEnable.GetEnable()
+    assert [FPGA.SyncGenerator.GetEnable(Brd) for Brd in Sync] == [1] * 9
+    assert not any(FPGA.SyncGenerator.GetReset(Brd) for Brd in Sync)
+    assert [FPGA.SyncGenerator.GetTimestampResetValue(Brd) for Brd in Sync] == [0xFFFFFFFF] * 9
+    assert not FPGA.ClockRefGenerator.GetEnable()
+
+    Report = Sequencer.Fire()
+    assert FPGA.ClockRefGenerator.GetEnable()
+    assert Report["ResetErrors"] == []
+    assert sorted(Report["Stages"]) == ["Arm", "Fire", "Setup"]
+    assert Report["ArmLatency"] <= Report["FireLatency"] <= Report["StartLatency"]
+
+
+def testArmSingleBatch(FPGA, Sequencer, monkeypatch):
+
+    # One word per board, all written with one call
+    Batches = list()
+    Region = Sequencer.Region
+    monkeypatch.setattr(Region, "ModifyWords", lambda Updates: Batches.append(list(Updates)))
+    Sequencer.Arm()
+    assert Batches == [Sequencer.Plan["Setup"], Sequencer.Plan["Arm"]]
+    assert len(Sequencer.Plan["Arm"]) == len(Sequencer.SyncBoardList)
+
+
+def testBoardsStartTogether(FPGA, Sequencer):
+
+    Sequencer.EnableReadout()
+    Sequencer.Run()
+
+    Period = FPGA.SyncGenerator.GetSamplePeriod(0)
+    Timestamp = FPGA.SyncGenerator.WaitTimestampChange(0, 0xFFFFFFFF, 1.0, Period)
+    Timestamp = FPGA.SyncGenerator.WaitTimestampChange(0, Timestamp, 1.0, Period)
+    assert Timestamp not in (0xFFFFFFFF, 0)
+
+    # The model steps all the generators together, from the same reset value
+    Sequencer.Region.Model.Stop()
+    Timestamps = [FPGA.SyncGenerator.GetTimestamp(Brd) for Brd in Sequencer.SyncBoardList]
+    assert len(set(Timestamps)) == 1